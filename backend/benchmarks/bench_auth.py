@@ -0,0 +1,99 @@
+"""
+Compare request throughput of remote and local token verification.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_auth --requests 500 --latency 0.02
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+import jwt
+
+from .stub_server import start_stub_server
+
+JWT_SECRET = "benchmark-jwt-secret-with-enough-length"
+
+
+def make_token(user_id: str) -> str:
+    return jwt.encode(
+        {"sub": user_id, "aud": "authenticated", "role": "authenticated", "exp": int(time.time()) + 3600},
+        JWT_SECRET,
+        algorithm="HS256",
+    )
+
+
+async def drive(app, tokens, concurrency: int):
+    import httpx
+
+    latencies = []
+    queue = list(tokens)
+
+    async def worker(client):
+        while queue:
+            token = queue.pop()
+            started = time.perf_counter()
+            response = await client.get("/whoami", headers={"Authorization": f"Bearer {token}"})
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.text
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.02, help="Stub auth server latency in seconds")
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency)
+    os.environ["SUPABASE_URL"] = base_url
+    os.environ["SUPABASE_SERVICE_ROLE_KEY"] = make_token("service-role")
+    os.environ["SUPABASE_JWT_SECRET"] = JWT_SECRET
+
+    from fastapi import Depends, FastAPI
+    from ..utils import auth
+
+    app = FastAPI()
+
+    @app.get("/whoami")
+    async def whoami(user_id: str = Depends(auth.get_current_user_id)):
+        return {"user_id": user_id}
+
+    unique_tokens = [make_token(str(uuid.uuid4())) for _ in range(args.requests)]
+    repeated_tokens = [make_token(str(uuid.uuid4())) for _ in range(10)] * (args.requests // 10)
+
+    scenarios = [
+        ("remote, unique tokens", "remote", unique_tokens),
+        ("remote, repeated tokens", "remote", repeated_tokens),
+        ("local, unique tokens", "local", unique_tokens),
+        ("local, repeated tokens", "local", repeated_tokens),
+    ]
+
+    print(f"{'scenario':<26}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, mode, tokens in scenarios:
+        auth.AUTH_VERIFY_MODE = mode
+        auth.token_cache.clear()
+        result = asyncio.run(drive(app, tokens, args.concurrency))
+        print(f"{name:<26}{result['rps']:>10.1f}{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
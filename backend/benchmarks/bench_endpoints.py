@@ -0,0 +1,301 @@
+"""
+Load test every API endpoint against the in-memory Supabase fake.
+
+Requests go through the real FastAPI app (middleware, auth, validation,
+routers, repositories and the PostgREST client) over an in-process ASGI
+transport; only Supabase itself is replaced. Each scenario is run at every
+requested concurrency and reported as throughput, latency percentiles,
+errors and database calls per request.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_endpoints --requests 500 --concurrency 1 16 64 --output endpoints.json
+
+Compare two saved reports with backend.benchmarks.compare.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import os
+import random
+import time
+import uuid
+
+from .bench_auth import JWT_SECRET, make_token
+from .fake_supabase import BASE_URL, FakeSupabase
+from .report import build_report, latency_summary, print_table, write_report
+
+GOAL_TYPES = [("strength", "kg"), ("endurance", "reps"), ("consistency", "workouts"), ("weight_loss", "kg")]
+EXERCISE_IDS = [str(exercise_id) for exercise_id in range(1, 11)]
+
+
+@dataclass
+class Population:
+    user_ids: List[str]
+    tokens: Dict[str, str]
+    goal_ids: Dict[str, List[str]]
+    notification_ids: Dict[str, List[str]]
+    created_goal_ids: List[Tuple[str, str]] = field(default_factory=list)
+
+
+def make_exercises(rng: random.Random, count: int = 3) -> List[Dict[str, Any]]:
+    return [
+        {
+            "exerciseId": rng.choice(EXERCISE_IDS),
+            "sets": [{"weight": rng.randint(20, 140), "reps": rng.randint(3, 15)} for _ in range(rng.randint(2, 5))],
+        }
+        for _ in range(count)
+    ]
+
+
+def seed(fake: FakeSupabase, users: int, goals: int, notifications: int, logs: int, rng: random.Random) -> Population:
+    from ..utils.workout_metrics import summarize_exercises
+
+    now = datetime.now(timezone.utc)
+    population = Population(user_ids=[], tokens={}, goal_ids={}, notification_ids={})
+    user_rows, goal_rows, notification_rows, log_rows, stat_rows = [], [], [], [], []
+
+    for _ in range(users):
+        user_id = str(uuid.uuid4())
+        population.user_ids.append(user_id)
+        population.tokens[user_id] = make_token(user_id)
+        user_rows.append({
+            "id": user_id,
+            "email": f"{user_id}@bench.local",
+            "name": "Bench user",
+            "last_workout_date": (now - timedelta(days=rng.randint(0, 30))).isoformat(),
+            "user_status_flags": {},
+            "weekly_workout_goal": 3,
+        })
+
+        population.goal_ids[user_id] = []
+        for index in range(goals):
+            goal_type, unit = GOAL_TYPES[index % len(GOAL_TYPES)]
+            goal_id = str(uuid.uuid4())
+            population.goal_ids[user_id].append(goal_id)
+            goal_rows.append({
+                "id": goal_id,
+                "user_id": user_id,
+                "type": goal_type,
+                "name": f"Bench goal {index}",
+                "target_value": 1000,
+                "current_value": 0,
+                "unit": unit,
+                "start_date": (now - timedelta(days=60)).isoformat(),
+                "end_date": None,
+                "status": "active",
+                "exercise_id": rng.choice(EXERCISE_IDS),
+                "description": None,
+                "created_at": (now - timedelta(days=60, minutes=index)).isoformat(),
+                "updated_at": now.isoformat(),
+            })
+
+        population.notification_ids[user_id] = []
+        for index in range(notifications):
+            notification_id = str(uuid.uuid4())
+            population.notification_ids[user_id].append(notification_id)
+            notification_rows.append({
+                "id": notification_id,
+                "user_id": user_id,
+                "type": "weekly_summary",
+                "message": "Your weekly summary is here!",
+                "details": {"total_workouts": 3},
+                "created_at": (now - timedelta(hours=index)).isoformat(),
+                "is_read": index % 3 == 0,
+            })
+
+        for index in range(logs):
+            log_id = str(uuid.uuid4())
+            log_date = (now - timedelta(days=index)).isoformat()
+            exercises = make_exercises(rng)
+            log_rows.append({
+                "id": log_id,
+                "user_id": user_id,
+                "workout_id": str(uuid.uuid4()),
+                "exercises": exercises,
+                "date": log_date,
+                "idempotency_key": None,
+            })
+            for summary in summarize_exercises(exercises):
+                stat_rows.append({**summary, "workout_log_id": log_id, "user_id": user_id, "date": log_date})
+
+    fake.seed("users", user_rows)
+    fake.seed("goals", goal_rows)
+    fake.seed("notifications", notification_rows)
+    fake.seed("workout_logs", log_rows)
+    fake.seed("exercise_session_stats", stat_rows)
+    return population
+
+
+# A scenario turns (population, rng, user_id) into (method, path, json body)
+RequestFactory = Callable[[Population, random.Random, str], Tuple[str, str, Optional[Any]]]
+
+
+def workout_log_body(rng: random.Random) -> Dict[str, Any]:
+    return {
+        "workout_id": str(uuid.uuid4()),
+        "exercises": make_exercises(rng),
+        "date": datetime.now(timezone.utc).isoformat(),
+        "idempotency_key": uuid.uuid4().hex,
+    }
+
+
+def create_goal(population: Population, rng: random.Random, user_id: str):
+    return "POST", "/goals/", {
+        "type": "strength",
+        "name": "Bench press 100kg",
+        "target_value": 100,
+        "unit": "kg",
+        "exercise_id": rng.choice(EXERCISE_IDS),
+    }
+
+
+def delete_goal(population: Population, rng: random.Random, user_id: str):
+    # Delete goals made by the create scenario so seeded goals stay in place
+    if population.created_goal_ids:
+        owner, goal_id = population.created_goal_ids.pop()
+        return "DELETE", f"/goals/{goal_id}", None, owner
+    return "DELETE", f"/goals/{uuid.uuid4()}", None
+
+
+SCENARIOS: List[Tuple[str, RequestFactory]] = [
+    ("POST /workout-logs", lambda p, rng, u: ("POST", "/workout-logs", workout_log_body(rng))),
+    ("POST /workout-logs/batch", lambda p, rng, u: ("POST", "/workout-logs/batch", {"logs": [workout_log_body(rng) for _ in range(10)]})),
+    ("GET /goals/", lambda p, rng, u: ("GET", "/goals/", None)),
+    ("GET /dashboard", lambda p, rng, u: ("GET", "/dashboard", None)),
+    # Every request from one user, as when the app resumes and refetches its screens at once
+    ("GET /dashboard (one user)", lambda p, rng, u: ("GET", "/dashboard", None, p.user_ids[0])),
+    ("GET /activity", lambda p, rng, u: ("GET", "/activity", None)),
+    ("POST /goals/", create_goal),
+    ("PUT /goals/{goal_id}", lambda p, rng, u: ("PUT", f"/goals/{rng.choice(p.goal_ids[u])}", {"description": "Updated by benchmark"})),
+    ("PATCH /goals/{goal_id}/progress", lambda p, rng, u: ("PATCH", f"/goals/{rng.choice(p.goal_ids[u])}/progress", {"current_value": rng.randint(1, 500)})),
+    ("DELETE /goals/{goal_id}", delete_goal),
+    ("GET /notifications", lambda p, rng, u: ("GET", "/notifications?limit=50", None)),
+    ("GET /notifications/unread-count", lambda p, rng, u: ("GET", "/notifications/unread-count", None)),
+    ("PATCH /notifications/{id}/read", lambda p, rng, u: ("PATCH", f"/notifications/{rng.choice(p.notification_ids[u])}/read", None)),
+    ("POST /notifications/read", lambda p, rng, u: ("POST", "/notifications/read", {"ids": rng.sample(p.notification_ids[u], min(5, len(p.notification_ids[u])))})),
+    ("POST /user-status", lambda p, rng, u: ("POST", "/user-status", {"status": {"low_motivation_sent": False}})),
+    ("GET /analytics/exercises/progression", lambda p, rng, u: ("GET", f"/analytics/exercises/progression?exercise_ids={rng.choice(EXERCISE_IDS)}&period=week", None)),
+]
+
+
+async def run_scenario(app, fake: FakeSupabase, population: Population, factory: RequestFactory,
+                       requests: int, concurrency: int, rng: random.Random) -> Dict[str, Any]:
+    import httpx
+
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker(client):
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            user_id = rng.choice(population.user_ids)
+            spec = factory(population, rng, user_id)
+            method, path, body = spec[:3]
+            if len(spec) > 3:
+                user_id = spec[3]
+            headers = {"Authorization": f"Bearer {population.tokens[user_id]}"}
+            started = time.perf_counter()
+            response = await client.request(method, path, json=body, headers=headers)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+            elif method == "POST" and path == "/goals/":
+                population.created_goal_ids.append((user_id, response.json()["id"]))
+
+    calls_before = fake.total_calls()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        **latency_summary(latencies),
+        "errors": errors,
+        "db_calls_per_request": round((fake.total_calls() - calls_before) / max(len(latencies), 1), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario and concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--latency", type=float, default=0.005, help="Simulated Supabase latency per call in seconds")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--goals", type=int, default=5, help="Goals per user")
+    parser.add_argument("--notifications", type=int, default=50, help="Notifications per user")
+    parser.add_argument("--logs", type=int, default=20, help="Workout logs per user")
+    parser.add_argument("--auth", choices=["local", "remote"], default="local", help="Token verification mode")
+    parser.add_argument("--no-read-cache", action="store_true", help="Disable the per-user read cache")
+    parser.add_argument("--rate-limit", action="store_true", help="Keep the rate limiter on (every request comes from one address)")
+    parser.add_argument("--scenario", action="append", help="Only run scenarios whose name contains this text")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    os.environ.update({
+        "SUPABASE_URL": BASE_URL,
+        "SUPABASE_SERVICE_ROLE_KEY": make_token("service-role"),
+        "SUPABASE_JWT_SECRET": JWT_SECRET,
+        "AUTH_VERIFY_MODE": args.auth,
+        "SCHEDULER_MODE": "off",
+        "LOG_LEVEL": "WARNING",
+    })
+    if args.no_read_cache:
+        os.environ["READ_CACHE_SIZE"] = "0"
+    if not args.rate_limit:
+        os.environ.update({"RATE_LIMIT_USER_RATE": "0", "RATE_LIMIT_IP_RATE": "0"})
+
+    fake = FakeSupabase(latency=args.latency)
+    fake.install()
+    rng = random.Random(args.seed)
+    population = seed(fake, args.users, args.goals, args.notifications, args.logs, rng)
+
+    from ..main import app
+    from ..utils import auth
+
+    scenarios = [
+        (name, factory) for name, factory in SCENARIOS
+        if not args.scenario or any(text in name for text in args.scenario)
+    ]
+
+    async def run_all() -> List[Dict[str, Any]]:
+        from .. import db
+
+        results = []
+        try:
+            for concurrency in args.concurrency:
+                for name, factory in scenarios:
+                    auth.token_cache.clear()
+                    result = await run_scenario(app, fake, population, factory, args.requests, concurrency, rng)
+                    results.append({"scenario": name, "concurrency": concurrency, **result})
+        finally:
+            await db.close_client()
+        return results
+
+    results = asyncio.run(run_all())
+    print_table(results, [
+        ("scenario", "scenario", ""),
+        ("concurrency", "conc", "d"),
+        ("rps", "req/s", ".1f"),
+        ("p50_ms", "p50 ms", ".2f"),
+        ("p95_ms", "p95 ms", ".2f"),
+        ("p99_ms", "p99 ms", ".2f"),
+        ("errors", "errors", "d"),
+        ("db_calls_per_request", "db/req", ".2f"),
+    ])
+
+    if args.output:
+        params = {key: value for key, value in vars(args).items() if key != "output"}
+        write_report(build_report("endpoints", params, results), args.output)
+
+
+if __name__ == "__main__":
+    main()
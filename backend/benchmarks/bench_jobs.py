@@ -0,0 +1,157 @@
+"""
+Benchmark the scheduled jobs against the in-memory Supabase fake.
+
+Seeds a synthetic population of users (with a mix of recent, lapsed and
+never-active workout histories), then runs each job through the same claim
+wrapper the scheduler uses and reports duration, users per second, database
+round trips and peak memory. With --repeat, each job runs again on the
+same data, which for the daily check shows the steady state once the
+backlog of due users has been worked off.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_jobs --users 10000 100000 --page-size 1000 --concurrency 4 --output jobs.json
+
+Compare two saved reports with backend.benchmarks.compare.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+import argparse
+import asyncio
+import os
+import random
+import resource
+import time
+import uuid
+
+from .bench_auth import JWT_SECRET, make_token
+from .fake_supabase import BASE_URL, FakeSupabase
+from .report import build_report, print_table, write_report
+
+JOBS = ["daily_check_job", "weekly_summary_job"]
+
+
+def max_rss_mb() -> float:
+    # ru_maxrss is kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def seed_users(fake: FakeSupabase, users: int, logs_per_active_user: int, rng: random.Random) -> None:
+    now = datetime.now(timezone.utc)
+    user_rows, log_rows = [], []
+    for _ in range(users):
+        user_id = str(uuid.uuid4())
+        roll = rng.random()
+        if roll < 0.1:
+            last_workout = None
+        elif roll < 0.6:
+            last_workout = now - timedelta(days=rng.randint(0, 6))
+        else:
+            last_workout = now - timedelta(days=rng.randint(7, 60))
+        user_rows.append({
+            "id": user_id,
+            "email": f"{user_id}@bench.local",
+            "last_workout_date": last_workout.isoformat() if last_workout else None,
+            "user_status_flags": {},
+        })
+        if last_workout and last_workout > now - timedelta(days=7):
+            for index in range(logs_per_active_user):
+                log_rows.append({
+                    "id": str(uuid.uuid4()),
+                    "user_id": user_id,
+                    "workout_id": str(uuid.uuid4()),
+                    "exercises": [{"exerciseId": "1", "sets": [{"weight": 60, "reps": 8}] * 3}],
+                    "date": (last_workout - timedelta(days=index)).isoformat(),
+                    "idempotency_key": None,
+                })
+    fake.seed("users", user_rows)
+    fake.seed("workout_logs", log_rows)
+
+
+async def run_job(job_name: str, run_key: str) -> Dict[str, Any]:
+    from .. import scheduler
+
+    job = scheduler.JOB_REGISTRY[job_name]
+    started = time.perf_counter()
+    stats = await job(run_key=run_key) or {}
+    return {"seconds": time.perf_counter() - started, "stats": stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="+", default=[10000], help="Population sizes to run")
+    parser.add_argument("--logs", type=int, default=3, help="Workout logs per user active in the last week")
+    parser.add_argument("--page-size", type=int, default=1000, help="JOB_PAGE_SIZE")
+    parser.add_argument("--concurrency", type=int, default=4, help="JOB_CONCURRENCY")
+    parser.add_argument("--latency", type=float, default=0.005, help="Simulated Supabase latency per call in seconds")
+    parser.add_argument("--job", action="append", choices=JOBS, help="Only run these jobs")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs of each job per population")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    # The scheduler reads its settings at import time
+    os.environ.update({
+        "SUPABASE_URL": BASE_URL,
+        "SUPABASE_SERVICE_ROLE_KEY": make_token("service-role"),
+        "SUPABASE_JWT_SECRET": JWT_SECRET,
+        "SCHEDULER_MODE": "off",
+        "LOG_LEVEL": "WARNING",
+        "JOB_PAGE_SIZE": str(args.page_size),
+        "JOB_CONCURRENCY": str(args.concurrency),
+    })
+
+    rng = random.Random(args.seed)
+    results: List[Dict[str, Any]] = []
+
+    async def run_all() -> None:
+        from .. import db
+
+        try:
+            for users in args.users:
+                fake = FakeSupabase(latency=args.latency)
+                fake.install()
+                seed_users(fake, users, args.logs, rng)
+                for job_name in args.job or JOBS:
+                    for run_number in range(1, args.repeat + 1):
+                        calls_before = fake.total_calls()
+                        run = await run_job(job_name, f"bench-{users}-{uuid.uuid4().hex[:8]}")
+                        stats = run["stats"]
+                        results.append({
+                            "job": job_name,
+                            **({"run": run_number} if args.repeat > 1 else {}),
+                            "users": users,
+                            "seconds": round(run["seconds"], 3),
+                            "users_per_second": round(stats.get("users_processed", 0) / run["seconds"], 1) if run["seconds"] else 0.0,
+                            "users_processed": stats.get("users_processed", 0),
+                            "notifications_created": stats.get("notifications_created", 0),
+                            "db_calls": fake.total_calls() - calls_before,
+                            "errors": int(stats.get("errors", 0)) + int(stats.get("failed_chunks", 0)) + (1 if stats.get("error") else 0),
+                            "max_rss_mb": max_rss_mb(),
+                        })
+                # Each population gets a fresh fake, so drop the client bound to the old transport
+                await db.close_client()
+        finally:
+            await db.close_client()
+
+    asyncio.run(run_all())
+    print_table(results, [
+        ("job", "job", ""),
+        *([("run", "run", "d")] if args.repeat > 1 else []),
+        ("users", "users", "d"),
+        ("seconds", "seconds", ".2f"),
+        ("users_per_second", "users/s", ".1f"),
+        ("users_processed", "processed", "d"),
+        ("notifications_created", "notified", "d"),
+        ("db_calls", "db calls", "d"),
+        ("errors", "errors", "d"),
+        ("max_rss_mb", "max RSS MB", ".1f"),
+    ])
+
+    if args.output:
+        params = {key: value for key, value in vars(args).items() if key != "output"}
+        write_report(build_report("jobs", params, results), args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Load test the async data-access layer against a local PostgREST stub.
+
+Each request in the stub sleeps for --latency seconds, so a client that does
+not block the event loop should scale with concurrency up to the pool size,
+while the synchronous client stays flat.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_repositories --requests 400 --latency 0.02
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+
+from .stub_server import start_stub_server
+
+
+def make_goal(user_id: str) -> dict:
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "type": "strength",
+        "name": "Bench 100kg",
+        "target_value": 100,
+        "current_value": 80,
+        "unit": "kg",
+        "start_date": "2025-01-01T00:00:00Z",
+        "status": "active",
+        "created_at": "2025-01-01T00:00:00Z",
+        "updated_at": "2025-01-01T00:00:00Z",
+    }
+
+
+async def run_async(requests: int, concurrency: int) -> float:
+    from ..repositories import goals as goals_repo
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await goals_repo.list_goals("bench-user")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return requests / (time.perf_counter() - started)
+
+
+async def run_sync(base_url: str, key: str, requests: int, concurrency: int) -> float:
+    from postgrest import SyncPostgrestClient
+
+    client = SyncPostgrestClient(f"{base_url}/rest/v1", headers={"apikey": key, "Authorization": f"Bearer {key}"})
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            # The pre-existing pattern: a blocking execute() inside a coroutine
+            client.table("goals").select("*").eq("user_id", "bench-user").execute()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    client.aclose()
+    return requests / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.02, help="Stub PostgREST latency in seconds")
+    parser.add_argument("--rows", type=int, default=20, help="Goals returned per select")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(
+        latency=args.latency,
+        rows={"goals": [make_goal("bench-user") for _ in range(args.rows)]},
+    )
+    os.environ["SUPABASE_URL"] = base_url
+    os.environ["SUPABASE_SERVICE_ROLE_KEY"] = "benchmark-service-role-key"
+
+    from .. import db
+
+    print(f"{'concurrency':>12}{'sync req/s':>14}{'async req/s':>14}")
+    for concurrency in args.concurrency:
+        sync_rps = asyncio.run(run_sync(base_url, "benchmark-service-role-key", args.requests, concurrency))
+
+        async def async_round():
+            try:
+                return await run_async(args.requests, concurrency)
+            finally:
+                await db.close_client()
+
+        async_rps = asyncio.run(async_round())
+        print(f"{concurrency:>12}{sync_rps:>14.1f}{async_rps:>14.1f}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Measure CPU time per request spent turning database rows into a JSON
+response, for large goal and notification lists.
+
+Two paths are timed over the same rows:
+
+- legacy: a model per row, jsonable_encoder over the result, a stdlib
+  json.dumps for the ETag and another for the response body (the path the
+  list endpoints used before the single-validation serializer);
+- current: utils.serialization.to_jsonable (one TypeAdapter validation)
+  encoded once with orjson, which is also what the ETag is computed from.
+
+With --app, the current path is also timed end to end through the API
+(auth, routing, middleware) against the in-memory Supabase fake with the
+read cache disabled, so every request loads and serializes the rows.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_serialization --rows 1000 --app --output serialization.json
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+
+from .bench_auth import JWT_SECRET, make_token
+from .fake_supabase import BASE_URL, FakeSupabase
+from .report import build_report, print_table, write_report
+
+
+def make_goals(user_id: str, count: int) -> List[Dict[str, Any]]:
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "type": "strength",
+            "name": f"Bench goal {index}",
+            "target_value": 100,
+            "current_value": index % 100,
+            "unit": "kg",
+            "start_date": (now - timedelta(days=60)).isoformat(),
+            "end_date": None,
+            "status": "active",
+            "exercise_id": str(index % 10),
+            "description": None,
+            "created_at": (now - timedelta(minutes=index)).isoformat(),
+            "updated_at": now.isoformat(),
+        }
+        for index in range(count)
+    ]
+
+
+def make_notifications(user_id: str, count: int) -> List[Dict[str, Any]]:
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "type": "weekly_summary",
+            "message": "Your weekly summary is here!",
+            "details": {"total_workouts": 3, "total_volume": 12345.5, "unique_exercises": 6},
+            "created_at": (now - timedelta(minutes=index)).isoformat(),
+            "is_read": index % 2 == 0,
+        }
+        for index in range(count)
+    ]
+
+
+def cpu_ms_per_call(func: Callable[[], Any], iterations: int) -> float:
+    func()
+    started = time.process_time()
+    for _ in range(iterations):
+        func()
+    return round((time.process_time() - started) / iterations * 1000, 3)
+
+
+def legacy_body(build: Callable[[], Any]) -> bytes:
+    from fastapi.encoders import jsonable_encoder
+
+    body = jsonable_encoder(build())
+    hashlib.sha1(json.dumps(body, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+    return json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def current_body(response_type: Any, data: Any) -> bytes:
+    from ..utils.serialization import dumps, to_jsonable
+
+    body = dumps(to_jsonable(response_type, data))
+    hashlib.sha1(body).hexdigest()
+    return body
+
+
+def run_serializers(rows: int, iterations: int) -> List[Dict[str, Any]]:
+    from ..schemas import GoalResponse, NotificationPage, NotificationResponse
+
+    user_id = str(uuid.uuid4())
+    goals = make_goals(user_id, rows)
+    notifications = make_notifications(user_id, rows)
+    cases = [
+        ("goals", "legacy", lambda: legacy_body(lambda: [GoalResponse(**goal) for goal in goals])),
+        ("goals", "current", lambda: current_body(List[GoalResponse], goals)),
+        ("notifications", "legacy", lambda: legacy_body(lambda: NotificationPage(
+            items=[NotificationResponse(**notification) for notification in notifications], next_cursor=None
+        ))),
+        ("notifications", "current", lambda: current_body(NotificationPage, {"items": notifications, "next_cursor": None})),
+    ]
+    return [
+        {"scenario": f"{name} ({path})", "rows": rows, "cpu_ms_per_request": cpu_ms_per_call(func, iterations)}
+        for name, path, func in cases
+    ]
+
+
+async def run_app(rows: int, iterations: int) -> List[Dict[str, Any]]:
+    import httpx
+    from .. import db
+    from ..main import app
+
+    fake = FakeSupabase(latency=0)
+    fake.install()
+    user_id = str(uuid.uuid4())
+    fake.seed("users", [{"id": user_id, "email": f"{user_id}@bench.local", "user_status_flags": {}}])
+    fake.seed("goals", make_goals(user_id, rows))
+    fake.seed("notifications", make_notifications(user_id, rows))
+    headers = {"Authorization": f"Bearer {make_token(user_id)}"}
+
+    results = []
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+            for name, path in [("GET /goals/", "/goals/"), ("GET /notifications", f"/notifications?limit={min(rows, 200)}")]:
+                (await client.get(path)).raise_for_status()
+                started = time.process_time()
+                for _ in range(iterations):
+                    (await client.get(path)).raise_for_status()
+                cpu_ms = (time.process_time() - started) / iterations * 1000
+                results.append({"scenario": f"{name} (app)", "rows": rows if path == "/goals/" else min(rows, 200),
+                                "cpu_ms_per_request": round(cpu_ms, 3)})
+    finally:
+        await db.close_client()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000, help="Rows per response")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--app", action="store_true", help="Also time requests end to end through the API")
+    parser.add_argument("--output", help="Write the report as JSON to this path")
+    args = parser.parse_args()
+
+    os.environ.update({
+        "SUPABASE_URL": BASE_URL,
+        "SUPABASE_SERVICE_ROLE_KEY": make_token("service-role"),
+        "SUPABASE_JWT_SECRET": JWT_SECRET,
+        "AUTH_VERIFY_MODE": "local",
+        "SCHEDULER_MODE": "off",
+        "LOG_LEVEL": "WARNING",
+        "READ_CACHE_SIZE": "0",
+    })
+
+    results = run_serializers(args.rows, args.iterations)
+    if args.app:
+        results += asyncio.run(run_app(args.rows, args.iterations))
+
+    print_table(results, [
+        ("scenario", "scenario", ""),
+        ("rows", "rows", "d"),
+        ("cpu_ms_per_request", "CPU ms/request", ".3f"),
+    ])
+
+    if args.output:
+        params = {key: value for key, value in vars(args).items() if key != "output"}
+        write_report(build_report("serialization", params, results), args.output)
+
+
+if __name__ == "__main__":
+    main()
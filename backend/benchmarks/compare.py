@@ -0,0 +1,86 @@
+"""
+Compare two benchmark reports written with --output.
+
+Rows are matched on their identifying columns (scenario and concurrency for
+endpoint reports, job and users for job reports) and every shared numeric
+column is shown as baseline -> candidate with the relative change.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.compare baseline.json candidate.json
+"""
+from typing import Any, Dict, List, Tuple
+import argparse
+import json
+
+# Columns that identify a row rather than measure it
+KEY_COLUMNS = ("scenario", "job", "run", "concurrency", "users")
+
+# Measurements to show for each suite, in order
+SUITE_COLUMNS = {
+    "endpoints": ("rps", "p50_ms", "p95_ms", "p99_ms", "errors", "db_calls_per_request"),
+    "jobs": ("seconds", "users_per_second", "db_calls", "errors", "max_rss_mb"),
+    "serialization": ("cpu_ms_per_request",),
+}
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    with open(path) as report:
+        return json.load(report)
+
+
+def row_key(row: Dict[str, Any]) -> Tuple:
+    return tuple(row.get(column) for column in KEY_COLUMNS if column in row)
+
+
+def describe_change(baseline: Any, candidate: Any) -> str:
+    if not isinstance(baseline, (int, float)) or not isinstance(candidate, (int, float)):
+        return f"{baseline} -> {candidate}"
+    if baseline == 0:
+        change = "" if candidate == 0 else " (new)"
+    else:
+        change = f" ({(candidate - baseline) / baseline * 100:+.1f}%)"
+    return f"{baseline:g} -> {candidate:g}{change}"
+
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any]) -> List[Dict[str, str]]:
+    if baseline.get("suite") != candidate.get("suite"):
+        raise ValueError(f"Cannot compare a {baseline.get('suite')} report with a {candidate.get('suite')} report")
+
+    columns = SUITE_COLUMNS.get(baseline.get("suite"), ())
+    candidate_rows = {row_key(row): row for row in candidate["results"]}
+    rows = []
+    for baseline_row in baseline["results"]:
+        candidate_row = candidate_rows.get(row_key(baseline_row))
+        if candidate_row is None:
+            continue
+        row = {column: str(baseline_row[column]) for column in KEY_COLUMNS if column in baseline_row}
+        for column in columns:
+            if column in baseline_row and column in candidate_row:
+                row[column] = describe_change(baseline_row[column], candidate_row[column])
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline", help="Report from the baseline revision")
+    parser.add_argument("candidate", help="Report from the revision being evaluated")
+    args = parser.parse_args()
+
+    baseline, candidate = load_report(args.baseline), load_report(args.candidate)
+    print(f"{baseline['suite']}: {baseline['revision']} -> {candidate['revision']}")
+    rows = compare(baseline, candidate)
+    if not rows:
+        print("No matching rows")
+        return
+
+    columns = list(rows[0])
+    widths = {column: max(len(column), *(len(row.get(column, "")) for row in rows)) + 2 for column in columns}
+    print("".join(column.rjust(widths[column]) for column in columns))
+    for row in rows:
+        print("".join(row.get(column, "").rjust(widths[column]) for column in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,805 @@
+"""
+In-process, in-memory stand-in for the Supabase APIs the backend uses.
+
+Table requests from the async PostgREST client are answered by an
+httpx.MockTransport, so no sockets are involved and every request goes
+through the real query builders, db.execute and the repositories. The
+Supabase Auth client used for remote token verification is replaced by a
+fake with the same get_user() shape. RPCs are re-implemented in Python
+with the semantics of their SQL in supabase/migrations.
+
+Only the PostgREST features the repositories use are supported: column
+selection, eq/neq/gt/gte/lt/lte/in/is filters, or=(...)/and(...) groups,
+order, limit, exact counts (including HEAD requests), return=minimal and
+upserts with on_conflict.
+"""
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import unquote
+import asyncio
+import bisect
+import json
+import re
+import time
+import uuid
+import httpx
+import jwt
+
+BASE_URL = "http://fake-supabase.local"
+
+# Primary key columns of each table; anything not listed is keyed by "id"
+PRIMARY_KEYS: Dict[str, Tuple[str, ...]] = {
+    "exercise_session_stats": ("workout_log_id", "exercise_id"),
+    "scheduled_job_runs": ("job_name", "run_key"),
+    "workout_sets": ("workout_log_id", "exercise_index", "set_index"),
+    "personal_records": ("user_id", "exercise_id"),
+    "user_activity_stats": ("user_id",),
+}
+
+# Column defaults applied on insert, beyond created_at (and id for id-keyed tables)
+COLUMN_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "goals": {"current_value": 0, "status": "active", "end_date": None, "exercise_id": None, "description": None},
+    "notifications": {"is_read": False, "read_at": None},
+}
+TIMESTAMPED_TABLES = {"users", "goals"}
+
+# Days of workout history kept in user_activity_stats.recent_days
+ACTIVITY_WINDOW_DAYS = 63
+ACTIVITY_WINDOW_MASK = (1 << ACTIVITY_WINDOW_DAYS) - 1
+
+_TIMESTAMP = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
+
+def _as_datetime(value: str) -> datetime:
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def _sort_value(value: Any) -> Any:
+    if isinstance(value, str) and _TIMESTAMP.match(value):
+        try:
+            return _as_datetime(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _coerce(row_value: Any, literal: str) -> Tuple[Any, Any]:
+    """
+    Convert a row value and a filter literal to comparable Python values.
+    """
+    if isinstance(row_value, bool):
+        return row_value, literal == "true"
+    if isinstance(row_value, (int, float)):
+        return float(row_value), float(literal)
+    if isinstance(row_value, str) and _TIMESTAMP.match(row_value) and _TIMESTAMP.match(literal):
+        try:
+            return _as_datetime(row_value), _as_datetime(literal)
+        except ValueError:
+            pass
+    return str(row_value), literal
+
+
+def inactivity_next_check_at(row: Dict[str, Any]) -> Optional[str]:
+    """
+    Python version of inactivity_next_check_at(), which trg_users_next_check_at
+    runs when a user's last_workout_date or user_status_flags change.
+    """
+    flags = row.get("user_status_flags") or {}
+    now = datetime.now(timezone.utc)
+    if not row.get("last_workout_date"):
+        return None if flags.get("initial_motivation_sent") else now.isoformat()
+
+    last_day = _as_datetime(row["last_workout_date"]).astimezone(timezone.utc).date()
+    days_since = (now.date() - last_day).days
+    if (flags.get("low_motivation_sent") or flags.get("welcome_back_sent")) and days_since < 3:
+        return now.isoformat()
+    start_of_day = datetime(last_day.year, last_day.month, last_day.day, tzinfo=timezone.utc)
+    if not flags.get("low_motivation_sent") and days_since <= 6:
+        return (start_of_day + timedelta(days=3)).isoformat()
+    if not flags.get("welcome_back_sent"):
+        return (start_of_day + timedelta(days=7)).isoformat()
+    return None
+
+
+# Row triggers: the columns whose change fires each one, and what it does to the row
+TRIGGERS: Dict[str, Tuple[Tuple[str, ...], Callable[[Dict[str, Any]], None]]] = {
+    "users": (
+        ("last_workout_date", "user_status_flags"),
+        lambda row: row.__setitem__("next_check_at", inactivity_next_check_at(row)),
+    ),
+}
+
+
+def _fire_trigger(table_name: str, row: Dict[str, Any], changed: Optional[Iterable[str]] = None) -> None:
+    """
+    Run the table's trigger on an inserted row, or on an updated one when a watched column changed.
+    """
+    trigger = TRIGGERS.get(table_name)
+    if trigger is None:
+        return
+    columns, apply = trigger
+    if changed is None or any(column in columns for column in changed):
+        apply(row)
+
+
+def _unquote(value: str) -> str:
+    return value[1:-1] if len(value) >= 2 and value[0] == value[-1] == '"' else value
+
+
+def _split_top_level(text: str) -> List[str]:
+    """
+    Split a PostgREST logic expression on commas outside quotes and parentheses.
+    """
+    parts, depth, quoted, current = [], 0, False, []
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    if current:
+        parts.append("".join(current))
+    return parts
+
+
+Predicate = Callable[[Dict[str, Any]], bool]
+
+
+def _condition(column: str, expression: str) -> Predicate:
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    operator, _, literal = expression.partition(".")
+
+    if operator == "in":
+        values = {_unquote(value) for value in _split_top_level(literal.strip("()"))}
+
+        def test(row):
+            value = row.get(column)
+            return value is not None and (str(value).lower() if isinstance(value, bool) else str(value)) in values
+    elif operator == "is":
+        expected = {"null": None, "true": True, "false": False}[literal]
+
+        def test(row):
+            return row.get(column) is expected
+    else:
+        literal = _unquote(literal)
+        compare = {
+            "eq": lambda a, b: a == b,
+            "neq": lambda a, b: a != b,
+            "gt": lambda a, b: a > b,
+            "gte": lambda a, b: a >= b,
+            "lt": lambda a, b: a < b,
+            "lte": lambda a, b: a <= b,
+        }[operator]
+
+        def test(row):
+            value = row.get(column)
+            if value is None:
+                return False
+            return compare(*_coerce(value, literal))
+
+    return (lambda row: not test(row)) if negate else test
+
+
+def _logic(operator: str, body: str) -> Predicate:
+    """
+    Build a predicate from the inside of an or=(...) or and(...) group.
+    """
+    predicates = []
+    for part in _split_top_level(body):
+        match = re.match(r"^(and|or)\((.*)\)$", part)
+        if match:
+            predicates.append(_logic(match.group(1), match.group(2)))
+        else:
+            column, _, expression = part.partition(".")
+            predicates.append(_condition(column, expression))
+    if operator == "or":
+        return lambda row: any(predicate(row) for predicate in predicates)
+    return lambda row: all(predicate(row) for predicate in predicates)
+
+
+class FakeTable:
+    def __init__(self, name: str):
+        self.name = name
+        self.key_columns = PRIMARY_KEYS.get(name, ("id",))
+        self.rows: Dict[Any, Dict[str, Any]] = {}
+        self.by_user: Dict[Any, set] = defaultdict(set)
+        self._sorted_keys: Optional[List[Any]] = None
+
+    def key_of(self, row: Dict[str, Any]) -> Any:
+        if len(self.key_columns) == 1:
+            return row.get(self.key_columns[0])
+        return tuple(row.get(column) for column in self.key_columns)
+
+    def put(self, row: Dict[str, Any]) -> None:
+        key = self.key_of(row)
+        if key not in self.rows:
+            self._sorted_keys = None
+        self.rows[key] = row
+        if "user_id" in row:
+            self.by_user[row["user_id"]].add(key)
+
+    def remove(self, key: Any) -> None:
+        row = self.rows.pop(key)
+        self._sorted_keys = None
+        if "user_id" in row:
+            self.by_user[row["user_id"]].discard(key)
+
+    def sorted_keys(self) -> List[Any]:
+        if self._sorted_keys is None:
+            self._sorted_keys = sorted(self.rows)
+        return self._sorted_keys
+
+
+class FakeQuery:
+    """
+    A parsed PostgREST table request.
+    """
+
+    def __init__(self, request: httpx.Request):
+        self.select = "*"
+        # (column, descending, nulls first)
+        self.order: List[Tuple[str, bool, bool]] = []
+        self.limit: Optional[int] = None
+        self.on_conflict: Optional[List[str]] = None
+        self.equal: Dict[str, str] = {}
+        self.ranges: List[Tuple[str, str, str]] = []
+        self.predicates: List[Predicate] = []
+
+        for name, value in request.url.params.multi_items():
+            if name == "select":
+                self.select = value
+            elif name == "order":
+                for part in value.split(","):
+                    column, _, direction = part.partition(".")
+                    descending = direction.startswith("desc")
+                    nulls_first = "nullsfirst" in direction or (descending and "nullslast" not in direction)
+                    self.order.append((column, descending, nulls_first))
+            elif name == "limit":
+                self.limit = int(value)
+            elif name == "on_conflict":
+                self.on_conflict = value.split(",")
+            elif name == "columns":
+                continue
+            elif name in ("or", "and"):
+                self.predicates.append(_logic(name, value[1:-1]))
+            else:
+                operator, _, literal = value.partition(".")
+                if operator == "eq":
+                    self.equal[name] = _unquote(literal)
+                if operator in ("gt", "gte"):
+                    self.ranges.append((name, operator, _unquote(literal)))
+                self.predicates.append(_condition(name, value))
+
+        prefer = request.headers.get("prefer", "")
+        self.minimal = "return=minimal" in prefer
+        self.count = "count=exact" in prefer
+        self.ignore_duplicates = "resolution=ignore-duplicates" in prefer
+        self.merge_duplicates = "resolution=merge-duplicates" in prefer
+
+    def matches(self, row: Dict[str, Any]) -> bool:
+        return all(predicate(row) for predicate in self.predicates)
+
+    def project(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        if self.select.strip() == "*":
+            return dict(row)
+        return {column.strip(): row.get(column.strip()) for column in self.select.split(",")}
+
+
+class FakeSupabase:
+    """
+    In-memory Supabase project: tables, RPCs and the Auth user endpoint.
+
+    `latency` seconds are awaited before answering each request to stand in
+    for the network and database; `calls` counts requests by method and
+    table or RPC name.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.tables: Dict[str, FakeTable] = {}
+        self.calls: Counter = Counter()
+        self.rpcs: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+            "merge_user_status_flags": self._merge_user_status_flags,
+            "weekly_workout_summaries": self._weekly_workout_summaries,
+            "dashboard_week_summary": self._dashboard_week_summary,
+            "claim_job_run": self._claim_job_run,
+            "set_goal_progress": self._set_goal_progress,
+            "apply_workout_to_goals": self._apply_workout_to_goals,
+            "apply_personal_records": self._apply_personal_records,
+            "record_workout_activity": self._record_workout_activity,
+            "save_workout_logs": self._save_workout_logs,
+            "reset_stale_activity_stats": self._reset_stale_activity_stats,
+            "prune_read_notifications": self._prune_read_notifications,
+            "collapse_weekly_summaries": self._collapse_weekly_summaries,
+        }
+        self._summaries_cache: Dict[str, Tuple[List[str], Dict[str, Dict[str, Any]]]] = {}
+
+    # Data access
+
+    def table(self, name: str) -> FakeTable:
+        if name not in self.tables:
+            self.tables[name] = FakeTable(name)
+        return self.tables[name]
+
+    def seed(self, name: str, rows: Iterable[Dict[str, Any]]) -> None:
+        table = self.table(name)
+        for row in rows:
+            row = dict(row)
+            # Seeded rows stand in for migrated data, which the migrations backfill
+            if "next_check_at" not in row:
+                _fire_trigger(name, row)
+            table.put(row)
+        self._summaries_cache.clear()
+
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    # Wiring
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def install(self) -> None:
+        """
+        Route the backend's PostgREST client and Supabase Auth client to this fake.
+
+        Call after SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY are set and
+        before the first request.
+        """
+        from .. import db
+        from ..utils import auth
+
+        db.set_transport(self.transport())
+        auth.supabase_auth = SimpleNamespace(auth=SimpleNamespace(get_user=self.get_user))
+
+    def get_user(self, token: str):
+        """
+        Stand-in for supabase_auth.auth.get_user, called from a worker thread.
+        """
+        self.calls[("GET", "auth/user")] += 1
+        time.sleep(self.latency)
+        claims = jwt.decode(token, options={"verify_signature": False})
+        return SimpleNamespace(user=SimpleNamespace(id=claims["sub"]))
+
+    # HTTP handling
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        path = unquote(request.url.path)
+        if path.startswith("/auth/v1/user"):
+            token = request.headers.get("authorization", "").removeprefix("Bearer ")
+            claims = jwt.decode(token, options={"verify_signature": False})
+            self.calls[("GET", "auth/user")] += 1
+            return httpx.Response(200, json={"id": claims["sub"], "aud": "authenticated", "role": "authenticated"})
+
+        if not path.startswith("/rest/v1/"):
+            return httpx.Response(404, json={"message": "not found"})
+
+        name = path[len("/rest/v1/"):]
+        if name.startswith("rpc/"):
+            function = name[len("rpc/"):]
+            self.calls[("RPC", function)] += 1
+            params = json.loads(request.content or b"{}")
+            try:
+                return httpx.Response(200, json=self.rpcs[function](params))
+            except KeyError:
+                return httpx.Response(404, json={"message": f"function {function} not found"})
+
+        self.calls[(request.method, name)] += 1
+        query = FakeQuery(request)
+        table = self.table(name)
+        handler = {
+            "GET": self._select,
+            "HEAD": self._select,
+            "POST": self._insert,
+            "PATCH": self._update,
+            "DELETE": self._delete,
+        }[request.method]
+        if request.method not in ("GET", "HEAD"):
+            self._summaries_cache.clear()
+        return handler(request, table, query)
+
+    def _candidates(self, table: FakeTable, query: FakeQuery) -> Tuple[Iterable[Dict[str, Any]], bool]:
+        """
+        Rows that may match, using the user_id index or the ordered primary key
+        to avoid scanning the whole table, and whether they already come in
+        the requested order.
+        """
+        if "user_id" in query.equal and table.key_columns != ("user_id",):
+            return [table.rows[key] for key in table.by_user.get(query.equal["user_id"], ())], False
+        if len(table.key_columns) == 1 and query.order == [(table.key_columns[0], False, False)]:
+            keys = table.sorted_keys()
+            start = 0
+            for column, operator, literal in query.ranges:
+                if column == table.key_columns[0]:
+                    start = (bisect.bisect_right if operator == "gt" else bisect.bisect_left)(keys, literal)
+            return (table.rows[key] for key in keys[start:]), True
+        return list(table.rows.values()), False
+
+    def _matching(self, table: FakeTable, query: FakeQuery) -> List[Dict[str, Any]]:
+        candidates, ordered = self._candidates(table, query)
+        rows = []
+        for row in candidates:
+            if query.matches(row):
+                rows.append(row)
+                # Rows already come in key order, so stop once the page is full
+                if ordered and query.limit is not None and len(rows) >= query.limit:
+                    break
+        for column, descending, nulls_first in reversed(query.order):
+            rows.sort(
+                key=lambda row: ((row.get(column) is None) != (nulls_first != descending), _sort_value(row.get(column))),
+                reverse=descending,
+            )
+        return rows
+
+    def _response(self, status_code: int, rows: List[Dict[str, Any]], query: FakeQuery, count: Optional[int] = None, body: bool = True) -> httpx.Response:
+        headers = {}
+        if query.count:
+            total = len(rows) if count is None else count
+            headers["Content-Range"] = f"0-{max(total - 1, 0)}/{total}" if total else "*/0"
+        if not body or query.minimal:
+            return httpx.Response(status_code, headers=headers, content=b"")
+        return httpx.Response(status_code, headers=headers, json=[query.project(row) for row in rows])
+
+    def _select(self, request: httpx.Request, table: FakeTable, query: FakeQuery) -> httpx.Response:
+        rows = self._matching(table, query)
+        total = len(rows)
+        if query.limit is not None:
+            rows = rows[:query.limit]
+        return self._response(200, rows, query, count=total, body=request.method != "HEAD")
+
+    def _insert(self, request: httpx.Request, table: FakeTable, query: FakeQuery) -> httpx.Response:
+        payload = json.loads(request.content or b"[]")
+        payload = payload if isinstance(payload, list) else [payload]
+        conflict_columns = query.on_conflict or list(table.key_columns)
+        existing: Dict[Tuple[Any, ...], Any] = {}
+        if query.on_conflict and tuple(query.on_conflict) != table.key_columns:
+            for key, row in table.rows.items():
+                existing[tuple(row.get(column) for column in conflict_columns)] = key
+
+        inserted = []
+        for row in payload:
+            row = dict(row)
+            if table.key_columns == ("id",):
+                row.setdefault("id", str(uuid.uuid4()))
+            now = datetime.now(timezone.utc).isoformat()
+            row.setdefault("created_at", now)
+            if table.name in TIMESTAMPED_TABLES:
+                row.setdefault("updated_at", now)
+            for column, default in COLUMN_DEFAULTS.get(table.name, {}).items():
+                row.setdefault(column, default)
+            conflict_key = tuple(row.get(column) for column in conflict_columns)
+            if query.on_conflict and tuple(query.on_conflict) != table.key_columns:
+                current_key = existing.get(conflict_key) if None not in conflict_key else None
+            else:
+                current_key = table.key_of(row) if table.key_of(row) in table.rows else None
+            if current_key is not None:
+                if query.ignore_duplicates:
+                    continue
+                if not query.merge_duplicates:
+                    return httpx.Response(409, json={"code": "23505", "message": "duplicate key value violates unique constraint"})
+                row = {**table.rows[current_key], **row}
+            _fire_trigger(table.name, row)
+            table.put(row)
+            if table.name == "workout_logs" and current_key is None and row.get("date"):
+                # trg_workout_logs_activity
+                self._record_workout_activity({"p_user_id": row["user_id"], "p_date": row["date"]})
+            existing[conflict_key] = table.key_of(row)
+            inserted.append(row)
+        return self._response(201, inserted, query)
+
+    def _update(self, request: httpx.Request, table: FakeTable, query: FakeQuery) -> httpx.Response:
+        changes = json.loads(request.content or b"{}")
+        updated = []
+        for row in self._matching(table, query):
+            row.update(changes)
+            _fire_trigger(table.name, row, changes)
+            if "updated_at" in row:
+                row["updated_at"] = datetime.now(timezone.utc).isoformat()
+            updated.append(row)
+        return self._response(200, updated, query)
+
+    def _delete(self, request: httpx.Request, table: FakeTable, query: FakeQuery) -> httpx.Response:
+        deleted = self._matching(table, query)
+        for row in deleted:
+            table.remove(table.key_of(row))
+        return self._response(200, deleted, query)
+
+    # RPCs
+
+    def _merge_user_status_flags(self, params: Dict[str, Any]) -> int:
+        users = self.table("users")
+        updated = 0
+        for update in params["p_updates"]:
+            row = users.rows.get(update["id"])
+            if row is not None:
+                row["user_status_flags"] = {**(row.get("user_status_flags") or {}), **update["flags"]}
+                _fire_trigger("users", row, ["user_status_flags"])
+                updated += 1
+        return updated
+
+    def _weekly_workout_summaries(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        since = params["p_since"]
+        cached = self._summaries_cache.get(since)
+        if cached is None:
+            cutoff = _as_datetime(since)
+            summaries: Dict[str, Dict[str, Any]] = {}
+            for log in self.table("workout_logs").rows.values():
+                if _as_datetime(log["date"]) < cutoff:
+                    continue
+                summary = summaries.setdefault(log["user_id"], {
+                    "user_id": log["user_id"], "total_workouts": 0, "total_volume": 0.0, "exercise_volumes": {},
+                })
+                summary["total_workouts"] += 1
+                for exercise in log.get("exercises") or []:
+                    exercise_id = str(exercise.get("exerciseId"))
+                    volume = sum(
+                        float(workout_set.get("weight") or 0) * float(workout_set.get("reps") or 0)
+                        for workout_set in exercise.get("sets") or []
+                    )
+                    summary["exercise_volumes"][exercise_id] = summary["exercise_volumes"].get(exercise_id, 0.0) + volume
+                    summary["total_volume"] += volume
+            for summary in summaries.values():
+                summary["unique_exercises"] = len(summary["exercise_volumes"])
+            cached = (sorted(summaries), summaries)
+            self._summaries_cache[since] = cached
+
+        user_ids, summaries = cached
+        start = bisect.bisect_right(user_ids, params["p_after"]) if params.get("p_after") else 0
+        return [summaries[user_id] for user_id in user_ids[start:start + params["p_limit"]]]
+
+    def _dashboard_week_summary(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        user_id, cutoff = params["p_user_id"], _as_datetime(params["p_since"])
+        logs = self.table("workout_logs")
+        dates = [
+            _as_datetime(logs.rows[key]["date"]) for key in logs.by_user.get(user_id, ())
+            if logs.rows[key].get("date") and _as_datetime(logs.rows[key]["date"]) >= cutoff
+        ]
+        sets_table = self.table("workout_sets")
+        sets = [
+            sets_table.rows[key] for key in sets_table.by_user.get(user_id, ())
+            if _as_datetime(sets_table.rows[key]["date"]) >= cutoff
+        ]
+        return [{
+            "total_workouts": len(dates),
+            "workout_days": len({moment.astimezone(timezone.utc).date() for moment in dates}),
+            "total_volume": sum(float(row.get("weight") or 0) * float(row.get("reps") or 0) for row in sets),
+            "unique_exercises": len({row["exercise_id"] for row in sets}),
+        }]
+
+    def _claim_job_run(self, params: Dict[str, Any]) -> bool:
+        runs = self.table("scheduled_job_runs")
+        key = (params["p_job_name"], params["p_run_key"])
+        now = datetime.now(timezone.utc)
+        run = runs.rows.get(key)
+        if run and (run.get("finished_at") or _as_datetime(run["lease_expires_at"]) > now):
+            return False
+        runs.put({
+            **(run or {}),
+            "job_name": params["p_job_name"],
+            "run_key": params["p_run_key"],
+            "holder": params["p_holder"],
+            "claimed_at": now.isoformat(),
+            "lease_expires_at": (now + timedelta(seconds=params["p_lease_seconds"])).isoformat(),
+            "finished_at": None,
+        })
+        return True
+
+    def _set_goal_progress(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        goal = self.table("goals").rows.get(params["p_goal_id"])
+        if goal is None or goal["user_id"] != params["p_user_id"]:
+            return []
+        goal["current_value"] = params["p_value"]
+        if params["p_value"] >= goal["target_value"]:
+            goal["status"] = "completed"
+        return [{"id": goal["id"], "status": goal["status"], "target_value": goal["target_value"]}]
+
+    def _apply_workout_to_goals(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        goals = self.table("goals")
+        metrics = {metric["exercise_id"]: metric for metric in params.get("p_exercises") or []}
+        changed = []
+        for key in list(goals.by_user.get(params["p_user_id"], ())):
+            goal = goals.rows[key]
+            if goal.get("status") != "active":
+                continue
+            current = float(goal.get("current_value") or 0)
+            if goal["type"] == "consistency":
+                value = current + 1
+            elif goal["type"] in ("strength", "endurance") and goal.get("exercise_id") in metrics:
+                metric = metrics[goal["exercise_id"]]
+                value = metric["max_reps"] if goal["unit"] == "reps" else metric["max_weight"]
+                if value <= current:
+                    continue
+            else:
+                continue
+            goal["current_value"] = value
+            if value >= goal["target_value"]:
+                goal["status"] = "completed"
+            changed.append({column: goal.get(column) for column in ("id", "name", "type", "current_value", "target_value", "status")})
+        return changed
+
+    def _apply_personal_records(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        records = self.table("personal_records")
+        beaten = []
+        for candidate in sorted(params.get("p_records") or [], key=lambda candidate: candidate["exercise_id"]):
+            key = (params["p_user_id"], candidate["exercise_id"])
+            current = records.rows.get(key)
+            weights = {f"{lift['weight']:g}": lift["reps"] for lift in candidate.get("weights") or []}
+            if current is None:
+                records.put({
+                    "user_id": params["p_user_id"], "exercise_id": candidate["exercise_id"],
+                    "best_weight": candidate["max_weight"], "best_weight_reps": candidate["reps_at_max_weight"],
+                    "best_volume": candidate["volume"], "best_e1rm": candidate["estimated_1rm"],
+                    "reps_by_weight": weights, "last_workout_log_id": params["p_log_id"],
+                })
+                continue
+
+            def beat(record_type, value, previous, weight=None):
+                beaten.append({"exercise_id": candidate["exercise_id"], "record_type": record_type,
+                               "value": value, "previous_value": previous, "weight": weight})
+
+            if candidate["max_weight"] > current["best_weight"]:
+                beat("weight", candidate["max_weight"], current["best_weight"], candidate["max_weight"])
+                current["best_weight"], current["best_weight_reps"] = candidate["max_weight"], candidate["reps_at_max_weight"]
+            for weight, reps in weights.items():
+                previous = current["reps_by_weight"].get(weight)
+                if previous is not None and reps > previous:
+                    beat("reps", reps, previous, float(weight))
+                current["reps_by_weight"][weight] = max(reps, previous or 0)
+            if candidate["volume"] > current["best_volume"]:
+                beat("volume", candidate["volume"], current["best_volume"])
+                current["best_volume"] = candidate["volume"]
+            if candidate["estimated_1rm"] > current["best_e1rm"]:
+                beat("estimated_1rm", candidate["estimated_1rm"], current["best_e1rm"])
+                current["best_e1rm"] = candidate["estimated_1rm"]
+            current["last_workout_log_id"] = params["p_log_id"]
+        return beaten
+
+    def _record_workout_activity(self, params: Dict[str, Any]) -> None:
+        # Mirrors record_workout_activity: the row alone, with a 63-day bitmask of workout days
+        user_id = params["p_user_id"]
+        stats_table = self.table("user_activity_stats")
+        stats = stats_table.rows.get(user_id) or {
+            "user_id": user_id, "last_workout_day": None, "recent_days": 0, "streak_start": None,
+            "current_streak": 0, "week_start": None, "week_workout_days": 0,
+        }
+        day = _as_datetime(params["p_date"]).astimezone(timezone.utc).date()
+        last = date.fromisoformat(stats["last_workout_day"]) if stats["last_workout_day"] else None
+        start = date.fromisoformat(stats["streak_start"]) if stats["streak_start"] else None
+        mask = stats["recent_days"]
+        if last is None:
+            last, start, mask = day, day, 1
+        elif day > last:
+            offset = (day - last).days
+            mask = ((mask << offset) | 1) & ACTIVITY_WINDOW_MASK if offset < ACTIVITY_WINDOW_DAYS else 1
+            if offset > 1:
+                start = day
+            last = day
+        else:
+            offset = (last - day).days
+            if offset < ACTIVITY_WINDOW_DAYS:
+                mask |= 1 << offset
+            if day == start - timedelta(days=1):
+                start, offset = day, offset + 1
+                while offset < ACTIVITY_WINDOW_DAYS and (mask >> offset) & 1:
+                    start, offset = start - timedelta(days=1), offset + 1
+        today = datetime.now(timezone.utc).date()
+        week_start = last - timedelta(days=last.weekday())
+        stats.update({
+            "last_workout_day": last.isoformat(),
+            "recent_days": mask,
+            "streak_start": start.isoformat(),
+            "current_streak": (last - start).days + 1 if last >= today - timedelta(days=1) else 0,
+            "week_start": week_start.isoformat(),
+            "week_workout_days": bin(mask & ((1 << ((last - week_start).days + 1)) - 1)).count("1"),
+        })
+        stats_table.put(stats)
+
+    def _reset_stale_activity_stats(self, params: Dict[str, Any]) -> int:
+        today = date.fromisoformat(params["p_today"])
+        week = (today - timedelta(days=today.weekday())).isoformat()
+        yesterday = (today - timedelta(days=1)).isoformat()
+        reset = 0
+        for stats in self.table("user_activity_stats").rows.values():
+            broken = stats["current_streak"] > 0 and stats["last_workout_day"] < yesterday
+            past_week = stats["week_workout_days"] > 0 and stats["week_start"] < week
+            if not (broken or past_week):
+                continue
+            if reset >= params["p_batch_size"]:
+                break
+            if broken:
+                stats["current_streak"] = 0
+            if past_week:
+                stats["week_start"], stats["week_workout_days"] = week, 0
+            reset += 1
+        return reset
+
+    def _save_workout_logs(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        user_id = params["p_user_id"]
+        logs = self.table("workout_logs")
+        used_keys = {logs.rows[key].get("idempotency_key") for key in logs.by_user.get(user_id, ())}
+        now = datetime.now(timezone.utc).isoformat()
+        inserted = []
+        for log in params.get("p_logs") or []:
+            key = log.get("idempotency_key")
+            if key is not None and key in used_keys:
+                continue
+            used_keys.add(key)
+            row = {column: log.get(column) for column in ("id", "workout_id", "exercises", "idempotency_key")}
+            logs.put({**row, "user_id": user_id, "date": log.get("date") or now, "created_at": now})
+            self._record_workout_activity({"p_user_id": user_id, "p_date": log.get("date") or now})
+            inserted.append(log)
+        self._summaries_cache.clear()
+        result = {
+            "inserted": [{"id": log["id"], "idempotency_key": log.get("idempotency_key")} for log in inserted],
+            "goals": [],
+            "records": [],
+        }
+        if not inserted:
+            return result
+
+        latest = max((log.get("date") or now for log in inserted), key=_as_datetime)
+        user = self.table("users").rows.get(user_id)
+        if user is not None and (not user.get("last_workout_date") or _as_datetime(user["last_workout_date"]) < _as_datetime(latest)):
+            user["last_workout_date"] = latest
+            if (datetime.now(timezone.utc).date() - _as_datetime(latest).astimezone(timezone.utc).date()).days < 3:
+                user["user_status_flags"] = {
+                    **(user.get("user_status_flags") or {}),
+                    "low_motivation_sent": False, "welcome_back_sent": False, "initial_motivation_sent": False,
+                }
+            _fire_trigger("users", user, ["last_workout_date", "user_status_flags"])
+
+        for log in sorted(inserted, key=lambda log: (_as_datetime(log.get("date") or now), log["id"])):
+            date = log.get("date") or now
+            for row in log.get("sets") or []:
+                self.table("workout_sets").put({**row, "workout_log_id": log["id"], "user_id": user_id, "date": date})
+            for row in log.get("session_stats") or []:
+                self.table("exercise_session_stats").put({**row, "workout_log_id": log["id"], "user_id": user_id, "date": date})
+            result["goals"].extend(self._apply_workout_to_goals({
+                "p_user_id": user_id, "p_log_id": log["id"], "p_date": date, "p_exercises": log.get("goal_metrics"),
+            }))
+            result["records"].extend(
+                {**record, "workout_log_id": log["id"]}
+                for record in self._apply_personal_records({"p_user_id": user_id, "p_log_id": log["id"], "p_records": log.get("records")})
+            )
+        return result
+
+    def _prune_read_notifications(self, params: Dict[str, Any]) -> int:
+        notifications = self.table("notifications")
+        cutoff = _as_datetime(params["p_before"])
+        expired = sorted(
+            (row for row in notifications.rows.values() if row.get("is_read") and _as_datetime(row["created_at"]) < cutoff),
+            key=lambda row: row["created_at"],
+        )[:params["p_batch_size"]]
+        for row in expired:
+            notifications.remove(row["id"])
+        return len(expired)
+
+    def _collapse_weekly_summaries(self, params: Dict[str, Any]) -> int:
+        notifications = self.table("notifications")
+        removed = 0
+        for keys in list(notifications.by_user.values()):
+            summaries = sorted(
+                (notifications.rows[key] for key in keys if notifications.rows[key].get("type") == "weekly_summary"),
+                key=lambda row: (row["created_at"], row["id"]),
+                reverse=True,
+            )
+            for row in summaries[params["p_keep"]:]:
+                if removed >= params["p_batch_size"]:
+                    return removed
+                notifications.remove(row["id"])
+                removed += 1
+        return removed
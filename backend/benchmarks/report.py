@@ -0,0 +1,70 @@
+"""
+Benchmark reports that can be saved as JSON and compared across commits.
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Sequence, Tuple
+import json
+import platform
+import statistics
+import subprocess
+
+
+def git_revision() -> str:
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout
+        return f"{revision}-dirty" if dirty.strip() else revision
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    """
+    Percentiles of a list of latencies in seconds, reported in milliseconds.
+    """
+    if not latencies:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+    ordered = sorted(latencies)
+
+    def percentile(fraction: float) -> float:
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))] * 1000
+
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p95_ms": round(percentile(0.95), 3),
+        "p99_ms": round(percentile(0.99), 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+def build_report(suite: str, params: Dict[str, Any], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "suite": suite,
+        "revision": git_revision(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": params,
+        "results": results,
+    }
+
+
+def write_report(report: Dict[str, Any], path: str) -> None:
+    with open(path, "w") as output:
+        json.dump(report, output, indent=2)
+    print(f"Report written to {path}")
+
+
+def print_table(rows: List[Dict[str, Any]], columns: Sequence[Tuple[str, str, str]]) -> None:
+    """
+    Print rows as an aligned table; columns are (key, heading, format spec).
+    """
+    widths = [
+        max(len(heading), *(len(format(row.get(key, ""), spec)) for row in rows)) + 2
+        for key, heading, spec in columns
+    ]
+    print("".join(heading.rjust(width) for (_, heading, _), width in zip(columns, widths)))
+    for row in rows:
+        print("".join(format(row.get(key, ""), spec).rjust(width) for (key, _, spec), width in zip(columns, widths)))
@@ -0,0 +1,84 @@
+"""
+Local stand-in for the Supabase HTTP APIs used by the benchmarks.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+import json
+import threading
+import time
+import jwt
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = "SupabaseStub/1.0"
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status_code: int, payload) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+
+        if self.path.startswith("/auth/v1/user"):
+            token = self.headers.get("Authorization", "").removeprefix("Bearer ")
+            try:
+                claims = jwt.decode(token, options={"verify_signature": False})
+            except jwt.InvalidTokenError:
+                return self._send_json(401, {"msg": "invalid JWT"})
+            return self._send_json(200, {
+                "id": claims["sub"],
+                "aud": claims.get("aud", "authenticated"),
+                "role": "authenticated",
+                "app_metadata": {},
+                "user_metadata": {},
+                "created_at": "2025-01-01T00:00:00Z",
+            })
+
+        if self.path.startswith("/rest/v1/"):
+            table = self.path[len("/rest/v1/"):].split("?", 1)[0]
+            return self._send_json(200, self.server.rows.get(table, []))
+
+        self._send_json(404, {"message": "not found"})
+
+    def do_HEAD(self):
+        time.sleep(self.server.latency)
+        table = self.path[len("/rest/v1/"):].split("?", 1)[0]
+        self.send_response(200)
+        self.send_header("Content-Range", f"*/{len(self.server.rows.get(table, []))}")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _echo_body(self):
+        time.sleep(self.server.latency)
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"[]")
+        self._send_json(200 if self.command != "POST" else 201, payload if isinstance(payload, list) else [payload])
+
+    do_POST = _echo_body
+    do_PATCH = _echo_body
+    do_DELETE = _echo_body
+
+
+def start_stub_server(latency: float = 0.02, rows: Optional[Dict[str, List[dict]]] = None) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Start the stub on a free local port and return the server and its base URL.
+
+    `rows` maps table names to the rows returned for any select on that table.
+    """
+    ThreadingHTTPServer.request_queue_size = 256
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.rows = rows or {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}"
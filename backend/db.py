@@ -0,0 +1,95 @@
+from postgrest import AsyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
+from typing import Optional
+import os
+import time
+import httpx
+from dotenv import load_dotenv
+from .utils.log import get_logger
+from .utils.metrics import DB_CALLS, DB_CALL_DURATION
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
+    raise ValueError("Supabase URL and Service Role Key must be set in .env file")
+
+# Connection pool settings for the PostgREST HTTP client
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_TIMEOUT = float(os.getenv("DB_TIMEOUT", "10"))
+
+_client: Optional[AsyncPostgrestClient] = None
+_transport: Optional[httpx.AsyncBaseTransport] = None
+
+
+def set_transport(transport: Optional[httpx.AsyncBaseTransport]) -> None:
+    """
+    Send PostgREST requests through `transport` (e.g. an in-process fake)
+    from the next time the client is created.
+    """
+    global _transport
+    _transport = transport
+
+
+def get_client() -> AsyncPostgrestClient:
+    """
+    Return the shared async PostgREST client, creating its connection pool on first use.
+    """
+    global _client
+    if _client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=DB_POOL_SIZE, max_keepalive_connections=DB_POOL_SIZE),
+            timeout=DB_TIMEOUT,
+            follow_redirects=True,
+            transport=_transport,
+        )
+        _client = AsyncPostgrestClient(
+            f"{SUPABASE_URL}/rest/v1",
+            headers={
+                **DEFAULT_POSTGREST_CLIENT_HEADERS,
+                "apikey": SUPABASE_SERVICE_ROLE_KEY,
+                "Authorization": f"Bearer {SUPABASE_SERVICE_ROLE_KEY}",
+            },
+            http_client=http_client,
+        )
+    return _client
+
+
+async def close_client() -> None:
+    """
+    Close the shared client and release its pooled connections.
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def table(name: str):
+    return get_client().table(name)
+
+
+def rpc(function: str, params: dict):
+    return get_client().rpc(function, params)
+
+
+async def execute(query, table: str, operation: str):
+    """
+    Run a PostgREST query without blocking the event loop and return the response.
+    """
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        response = await query.execute()
+        outcome = "ok"
+        return response
+    except Exception as e:
+        logger.error(f"Database error during {operation} on {table}: {e}")
+        raise
+    finally:
+        DB_CALL_DURATION.labels(table, operation).observe(time.perf_counter() - started)
+        DB_CALLS.labels(table, operation, outcome).inc()
@@ -0,0 +1,69 @@
+"""
+Rebuild the personal record index from the normalized workout sets.
+
+Walks users in id order and recomputes each page of users in one database
+call, so it can be rerun at any time (for example after fixing imported
+logs) without locking the whole table:
+
+    python -m backend.rebuild_personal_records
+    python -m backend.rebuild_personal_records --user-id <uuid> --user-id <uuid>
+"""
+from typing import List, Optional
+import argparse
+import asyncio
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from .db import close_client
+from .repositories import personal_records as personal_records_repo, users as users_repo
+from .utils.log import get_logger
+
+logger = get_logger("backend.rebuild_personal_records")
+
+
+async def rebuild_personal_records(user_ids: Optional[List[str]] = None, page_size: int = 500) -> int:
+    """
+    Rebuild the index for the given users, or for every user; returns the rows written.
+    """
+    started = time.perf_counter()
+    written = 0
+    users = 0
+
+    if user_ids:
+        for start in range(0, len(user_ids), page_size):
+            page = user_ids[start:start + page_size]
+            written += await personal_records_repo.rebuild(page)
+            users += len(page)
+    else:
+        after_id = None
+        while True:
+            page = [user["id"] for user in await users_repo.list_users_page("id", after_id, page_size)]
+            if not page:
+                break
+            written += await personal_records_repo.rebuild(page)
+            users += len(page)
+            after_id = page[-1]
+            logger.info(f"Rebuilt personal records for {users} users so far")
+
+    logger.info(
+        "Personal record rebuild finished",
+        extra={"stats": {"users_processed": users, "records_written": written, "seconds": round(time.perf_counter() - started, 2)}},
+    )
+    return written
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", action="append", help="Only rebuild these users")
+    parser.add_argument("--page-size", type=int, default=500, help="Users rebuilt per database call")
+    args = parser.parse_args()
+    try:
+        await rebuild_personal_records(args.user_id, args.page_size)
+    finally:
+        await close_client()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
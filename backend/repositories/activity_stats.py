@@ -0,0 +1,29 @@
+from typing import Any, Dict, List, Optional
+from ..db import table, rpc, execute
+
+TABLE = "user_activity_stats"
+
+
+async def get_activity_stats(user_id: str, columns: str = "*") -> Optional[Dict[str, Any]]:
+    query = table(TABLE).select(columns).eq("user_id", user_id).limit(1)
+    response = await execute(query, TABLE, "select")
+    return response.data[0] if response.data else None
+
+
+async def reset_stale(today: str, batch_size: int) -> int:
+    """
+    Zero up to `batch_size` streaks broken before `today` (a UTC date) and
+    weekly counts of past weeks; returns the rows updated.
+    """
+    response = await execute(
+        rpc("reset_stale_activity_stats", {"p_today": today, "p_batch_size": batch_size}), TABLE, "rpc"
+    )
+    return response.data or 0
+
+
+async def rebuild(user_ids: List[str]) -> int:
+    """
+    Recompute the counters for the given users from their workout logs.
+    """
+    response = await execute(rpc("rebuild_activity_stats", {"p_user_ids": user_ids}), TABLE, "rpc")
+    return response.data or 0
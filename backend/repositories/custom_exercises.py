@@ -0,0 +1,23 @@
+from typing import Any, Dict, List
+from ..db import table, execute
+
+TABLE = "custom_exercises"
+
+COLUMNS = "id, name, muscle_group, equipment, difficulty"
+
+
+async def list_custom_exercises(user_id: str) -> List[Dict[str, Any]]:
+    query = table(TABLE).select(COLUMNS).eq("user_id", user_id)
+    response = await execute(query, TABLE, "select")
+    return response.data
+
+
+async def get_custom_exercises(exercise_ids: List[str]) -> List[Dict[str, Any]]:
+    """
+    Fetch custom exercises by id across users, e.g. to label a page of weekly summaries.
+    """
+    if not exercise_ids:
+        return []
+    query = table(TABLE).select(COLUMNS).in_("id", exercise_ids)
+    response = await execute(query, TABLE, "select")
+    return response.data
@@ -0,0 +1,24 @@
+from typing import Any, Dict, List, Optional
+from ..db import table, execute
+
+TABLE = "exercise_session_stats"
+
+# Upper bound on rows returned for one progression query
+MAX_PROGRESSION_ROWS = 5000
+
+
+async def list_session_stats(user_id: str, exercise_ids: List[str], since: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Per-session stats for the given exercises, oldest first.
+    """
+    query = (
+        table(TABLE)
+        .select("exercise_id, date, max_weight, total_reps, volume, estimated_1rm")
+        .eq("user_id", user_id)
+        .in_("exercise_id", exercise_ids)
+    )
+    if since:
+        query = query.gte("date", since)
+    query = query.order("date").limit(MAX_PROGRESSION_ROWS)
+    response = await execute(query, TABLE, "select")
+    return response.data
@@ -0,0 +1,52 @@
+from typing import Any, Dict, List, Optional
+from ..db import table, rpc, execute
+
+TABLE = "goals"
+
+
+async def list_goals(user_id: str) -> List[Dict[str, Any]]:
+    query = table(TABLE).select("*").eq("user_id", user_id).order("created_at", desc=True)
+    response = await execute(query, TABLE, "select")
+    return response.data
+
+
+async def list_active_goals(user_id: str, columns: str = "*") -> List[Dict[str, Any]]:
+    query = table(TABLE).select(columns).eq("user_id", user_id).eq("status", "active").order("created_at", desc=True)
+    response = await execute(query, TABLE, "select")
+    return response.data
+
+
+async def get_goal(goal_id: str, user_id: str, columns: str = "*") -> Optional[Dict[str, Any]]:
+    query = table(TABLE).select(columns).eq("id", goal_id).eq("user_id", user_id).limit(1)
+    response = await execute(query, TABLE, "select")
+    return response.data[0] if response.data else None
+
+
+async def insert_goal(goal_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    response = await execute(table(TABLE).insert(goal_data), TABLE, "insert")
+    return response.data
+
+
+async def update_goal(goal_id: str, user_id: str, update_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    query = table(TABLE).update(update_data).eq("id", goal_id).eq("user_id", user_id)
+    response = await execute(query, TABLE, "update")
+    return response.data
+
+
+async def delete_goal(goal_id: str, user_id: str) -> List[Dict[str, Any]]:
+    query = table(TABLE).delete().eq("id", goal_id).eq("user_id", user_id)
+    response = await execute(query, TABLE, "delete")
+    return response.data
+
+
+async def set_progress(goal_id: str, user_id: str, value: float) -> Optional[Dict[str, Any]]:
+    """
+    Set a goal's progress, completing it once the target is reached, in one update.
+
+    Returns the goal's id, new status and target_value, or None if the user
+    has no such goal.
+    """
+    query = rpc("set_goal_progress", {"p_goal_id": goal_id, "p_user_id": user_id, "p_value": value})
+    response = await execute(query, TABLE, "update")
+    return response.data[0] if response.data else None
+
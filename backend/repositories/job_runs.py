@@ -0,0 +1,57 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from ..db import table, rpc, execute
+
+TABLE = "scheduled_job_runs"
+
+
+async def claim_run(job_name: str, run_key: str, holder: str, lease_seconds: int) -> bool:
+    """
+    Try to claim one run of a job; returns True only for the worker that should execute it.
+    """
+    query = rpc("claim_job_run", {
+        "p_job_name": job_name,
+        "p_run_key": run_key,
+        "p_holder": holder,
+        "p_lease_seconds": lease_seconds,
+    })
+    response = await execute(query, TABLE, "rpc")
+    return bool(response.data)
+
+
+async def finish_run(job_name: str, run_key: str, holder: str, stats: Optional[Dict[str, Any]]) -> None:
+    query = (
+        table(TABLE)
+        .update({"finished_at": datetime.utcnow().isoformat(), "stats": stats or {}})
+        .eq("job_name", job_name)
+        .eq("run_key", run_key)
+        .eq("holder", holder)
+    )
+    await execute(query, TABLE, "update")
+
+
+async def get_checkpoint(job_name: str, run_key: str) -> Optional[str]:
+    query = table(TABLE).select("checkpoint").eq("job_name", job_name).eq("run_key", run_key).limit(1)
+    response = await execute(query, TABLE, "select")
+    return response.data[0]["checkpoint"] if response.data else None
+
+
+async def save_checkpoint(job_name: str, run_key: str, checkpoint: str) -> None:
+    query = table(TABLE).update({"checkpoint": checkpoint}).eq("job_name", job_name).eq("run_key", run_key)
+    await execute(query, TABLE, "update")
+
+
+async def list_stale_runs(claimed_after: str) -> List[Dict[str, Any]]:
+    """
+    Unfinished runs claimed after `claimed_after` whose lease has expired.
+    """
+    query = (
+        table(TABLE)
+        .select("job_name, run_key, holder, checkpoint")
+        .is_("finished_at", "null")
+        .lt("lease_expires_at", datetime.utcnow().isoformat())
+        .gte("claimed_at", claimed_after)
+        .order("claimed_at")
+    )
+    response = await execute(query, TABLE, "select")
+    return response.data
@@ -0,0 +1,113 @@
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+from postgrest.types import CountMethod, ReturnMethod
+from ..db import table, rpc, execute
+
+TABLE = "notifications"
+
+
+async def list_notifications_page(
+    user_id: str,
+    limit: int,
+    before: Optional[Tuple[str, str]] = None,
+    unread_only: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Fetch up to `limit` notifications, newest first, strictly after the
+    (created_at, id) keyset position `before`.
+    """
+    query = table(TABLE).select("*").eq("user_id", user_id)
+    if unread_only:
+        query = query.eq("is_read", False)
+    if before:
+        created_at, notification_id = before
+        query = query.or_(
+            f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{notification_id})'
+        )
+    query = query.order("created_at", desc=True).order("id", desc=True).limit(limit)
+    response = await execute(query, TABLE, "select")
+    return response.data
+
+
+async def count_unread(user_id: str) -> int:
+    query = table(TABLE).select("id", count=CountMethod.exact, head=True).eq("user_id", user_id).eq("is_read", False)
+    response = await execute(query, TABLE, "count")
+    return response.count or 0
+
+
+async def insert_notifications(rows: List[Dict[str, Any]], ignore_duplicates: bool = False) -> List[Dict[str, Any]]:
+    """
+    Insert notifications in one statement.
+
+    With ignore_duplicates, rows whose id already exists are skipped, which
+    makes replaying a batch with stable ids safe.
+    """
+    if ignore_duplicates:
+        query = table(TABLE).upsert(rows, on_conflict="id", ignore_duplicates=True, returning=ReturnMethod.minimal)
+    else:
+        query = table(TABLE).insert(rows)
+    response = await execute(query, TABLE, "insert")
+    return response.data
+
+
+async def mark_as_read(notification_id: str, user_id: str) -> List[Dict[str, Any]]:
+    query = table(TABLE).update({"is_read": True, "read_at": datetime.utcnow().isoformat()}).eq("id", notification_id).eq("user_id", user_id)
+    response = await execute(query, TABLE, "update")
+    return response.data
+
+
+async def mark_many_as_read(
+    user_id: str,
+    notification_ids: Optional[List[str]] = None,
+    created_before: Optional[str] = None,
+) -> int:
+    """
+    Mark the user's unread notifications matching the ids or created at or
+    before `created_before` as read in one statement and return how many changed.
+    """
+    query = (
+        table(TABLE)
+        .update({"is_read": True, "read_at": datetime.utcnow().isoformat()}, count=CountMethod.exact, returning=ReturnMethod.minimal)
+        .eq("user_id", user_id)
+        .eq("is_read", False)
+    )
+    if notification_ids is not None:
+        query = query.in_("id", notification_ids)
+    if created_before is not None:
+        query = query.lte("created_at", created_before)
+    response = await execute(query, TABLE, "update")
+    return response.count or 0
+
+
+async def delete_before(user_id: str, created_before: str, read_only: bool = True) -> int:
+    """
+    Delete the user's notifications created before `created_before` and return how many were removed.
+    """
+    query = (
+        table(TABLE)
+        .delete(count=CountMethod.exact, returning=ReturnMethod.minimal)
+        .eq("user_id", user_id)
+        .lt("created_at", created_before)
+    )
+    if read_only:
+        query = query.eq("is_read", True)
+    response = await execute(query, TABLE, "delete")
+    return response.count or 0
+
+
+async def prune_read(created_before: str, batch_size: int) -> int:
+    """
+    Delete one batch of read notifications created before `created_before`, across all users.
+    """
+    query = rpc("prune_read_notifications", {"p_before": created_before, "p_batch_size": batch_size})
+    response = await execute(query, TABLE, "rpc")
+    return response.data or 0
+
+
+async def collapse_weekly_summaries(keep: int, batch_size: int) -> int:
+    """
+    Delete one batch of weekly summaries older than each user's `keep` most recent ones.
+    """
+    query = rpc("collapse_weekly_summaries", {"p_keep": keep, "p_batch_size": batch_size})
+    response = await execute(query, TABLE, "rpc")
+    return response.data or 0
@@ -0,0 +1,12 @@
+from typing import List
+from ..db import rpc, execute
+
+TABLE = "personal_records"
+
+
+async def rebuild(user_ids: List[str]) -> int:
+    """
+    Recompute the index for the given users from their workout sets.
+    """
+    response = await execute(rpc("rebuild_personal_records", {"p_user_ids": user_ids}), TABLE, "rpc")
+    return response.data or 0
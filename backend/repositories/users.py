@@ -0,0 +1,62 @@
+from typing import Any, Dict, List, Optional, Tuple
+from ..db import table, rpc, execute
+
+TABLE = "users"
+
+
+async def update_user(user_id: str, update_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    query = table(TABLE).update(update_data).eq("id", user_id)
+    response = await execute(query, TABLE, "update")
+    return response.data
+
+
+async def get_user(user_id: str, columns: str = "*") -> Optional[Dict[str, Any]]:
+    query = table(TABLE).select(columns).eq("id", user_id).limit(1)
+    response = await execute(query, TABLE, "select")
+    return response.data[0] if response.data else None
+
+
+async def list_users_page(columns: str, after_id: Optional[str], limit: int) -> List[Dict[str, Any]]:
+    """
+    Fetch the next page of users ordered by id, starting after `after_id`.
+    """
+    query = table(TABLE).select(columns).order("id").limit(limit)
+    if after_id:
+        query = query.gt("id", after_id)
+    response = await execute(query, TABLE, "select")
+    return response.data
+
+
+async def list_due_users(
+    columns: str,
+    due_before: str,
+    after: Optional[Tuple[str, str]],
+    limit: int,
+) -> List[Dict[str, Any]]:
+    """
+    Fetch the next page of users whose next_check_at has passed, ordered by
+    (next_check_at, id) and strictly after the keyset position `after`.
+
+    next_check_at is maintained by a trigger on users, and the ordering
+    matches idx_users_next_check_at, so each page is one range scan of the
+    due queue instead of every user.
+    """
+    query = table(TABLE).select(columns).lte("next_check_at", due_before)
+    if after:
+        next_check_at, user_id = after
+        query = query.or_(
+            f'next_check_at.gt."{next_check_at}",and(next_check_at.eq."{next_check_at}",id.gt.{user_id})'
+        )
+    query = query.order("next_check_at").order("id").limit(limit)
+    response = await execute(query, TABLE, "select")
+    return response.data
+
+
+async def merge_status_flags(updates: List[Dict[str, Any]]) -> int:
+    """
+    Merge per-user flag patches into user_status_flags in a single statement.
+
+    Each update is a {"id": ..., "flags": {...}} mapping.
+    """
+    response = await execute(rpc("merge_user_status_flags", {"p_updates": updates}), TABLE, "rpc")
+    return response.data or 0
@@ -0,0 +1,75 @@
+from typing import Any, Dict, List, Optional, Tuple
+from ..db import table, rpc, execute
+
+TABLE = "workout_logs"
+
+
+async def save_workout_logs(user_id: str, logs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Save many logs and their follow-up writes in one transactional call,
+    skipping any whose idempotency key the user has already used.
+
+    Returns the id and idempotency_key of the logs actually inserted under
+    "inserted", with the goals they changed and the personal records they beat.
+    """
+    response = await execute(rpc("save_workout_logs", {"p_user_id": user_id, "p_logs": logs}), TABLE, "insert")
+    return response.data
+
+
+async def find_by_idempotency_keys(user_id: str, keys: List[str]) -> List[Dict[str, Any]]:
+    query = table(TABLE).select("id, idempotency_key").eq("user_id", user_id).in_("idempotency_key", keys)
+    response = await execute(query, TABLE, "select")
+    return response.data
+
+
+async def list_recent_logs(user_id: str, columns: str, limit: int, since: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Fetch the user's latest logs, newest first, optionally only those dated at or after `since`.
+    """
+    query = table(TABLE).select(columns).eq("user_id", user_id)
+    if since:
+        query = query.gte("date", since)
+    query = query.order("date", desc=True, nullsfirst=False).limit(limit)
+    response = await execute(query, TABLE, "select")
+    return response.data
+
+
+async def list_logs_page(
+    user_id: str,
+    limit: int,
+    after: Optional[Tuple[Optional[str], str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Fetch up to `limit` logs, oldest first, strictly after the (date, id)
+    keyset position `after`.
+
+    Logs without a date sort after every dated log, ordered by id.
+    """
+    query = table(TABLE).select("id, workout_id, date, exercises").eq("user_id", user_id)
+    if after:
+        date, log_id = after
+        if date is None:
+            query = query.is_("date", "null").gt("id", log_id)
+        else:
+            query = query.or_(f'date.gt."{date}",and(date.eq."{date}",id.gt.{log_id}),date.is.null')
+    query = query.order("date").order("id").limit(limit)
+    response = await execute(query, TABLE, "select")
+    return response.data
+
+
+async def weekly_summaries(since: str, after_id: Optional[str], limit: int) -> List[Dict[str, Any]]:
+    """
+    Aggregate workouts since `since` for the next page of users ordered by id.
+    """
+    query = rpc("weekly_workout_summaries", {"p_since": since, "p_after": after_id, "p_limit": limit})
+    response = await execute(query, TABLE, "rpc")
+    return response.data
+
+
+async def week_summary(user_id: str, since: str) -> Dict[str, Any]:
+    """
+    Aggregate the user's workouts dated at or after `since` in one row:
+    total_workouts, workout_days (distinct UTC days), total_volume and unique_exercises.
+    """
+    response = await execute(rpc("dashboard_week_summary", {"p_user_id": user_id, "p_since": since}), TABLE, "rpc")
+    return response.data[0] if response.data else {}
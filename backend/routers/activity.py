@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from typing import Any, Dict, Optional
+from datetime import date, datetime, timedelta, timezone
+from ..utils.auth import get_current_user_id
+from ..utils.read_cache import ACTIVITY, cached_json_response
+from ..utils.serialization import to_jsonable
+from ..schemas import ActivityStatsResponse
+from ..repositories import activity_stats as activity_stats_repo
+from ..utils.log import get_logger
+
+logger = get_logger(__name__)
+
+router = APIRouter(prefix="/activity", tags=["Activity"])
+
+STATS_COLUMNS = "current_streak, streak_start, last_workout_day, week_start, week_workout_days"
+
+def parse_day(value: Any) -> Optional[date]:
+    return date.fromisoformat(str(value)[:10]) if value else None
+
+def current_activity(stats: Optional[Dict[str, Any]], today: date) -> Dict[str, Any]:
+    """
+    The stored counters as of `today` (UTC). The nightly reset may not have
+    run yet, so a streak whose last day is before yesterday counts as broken
+    and a count from an earlier week as zero.
+    """
+    stats = stats or {}
+    week_start = today - timedelta(days=today.weekday())
+    streak_start = parse_day(stats.get("streak_start"))
+    last_workout_day = parse_day(stats.get("last_workout_day"))
+    streak_alive = last_workout_day is not None and streak_start is not None and last_workout_day >= today - timedelta(days=1)
+    this_week = parse_day(stats.get("week_start")) == week_start
+    return {
+        "current_streak": (last_workout_day - streak_start).days + 1 if streak_alive else 0,
+        "streak_start": streak_start,
+        "last_workout_day": last_workout_day,
+        "week_start": week_start,
+        "week_workout_days": (stats.get("week_workout_days") or 0) if this_week else 0,
+    }
+
+@router.get("", response_model=ActivityStatsResponse)
+async def get_activity(request: Request, user_id: str = Depends(get_current_user_id)) -> Response:
+    """
+    The user's current workout streak (consecutive UTC days with a workout,
+    through today or yesterday) and the number of days this ISO week with a
+    workout; several workouts on one day count once.
+
+    Reads one row kept up to date as logs are saved, so the cost does not
+    grow with the user's history. Cached per user and day, and dropped when
+    the user saves a workout.
+    """
+    today = datetime.now(timezone.utc).date()
+
+    async def load_activity() -> Dict[str, Any]:
+        stats = await activity_stats_repo.get_activity_stats(user_id, STATS_COLUMNS)
+        return to_jsonable(ActivityStatsResponse, current_activity(stats, today))
+
+    try:
+        return await cached_json_response(request, user_id, ACTIVITY, today.isoformat(), load_activity)
+    except Exception as e:
+        logger.error(f"Error loading activity stats: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred: {str(e)}"
+        )
@@ -0,0 +1,82 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+from ..utils.auth import get_current_user_id
+from ..schemas import ExerciseProgression, ProgressionPeriod
+from ..repositories import exercise_stats as exercise_stats_repo
+from ..utils.log import get_logger
+
+logger = get_logger(__name__)
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+# Most exercises a single progression request may ask for
+MAX_EXERCISES_PER_REQUEST = 20
+
+def week_start(moment: datetime) -> datetime:
+    """
+    Midnight on the Monday of the week containing `moment`.
+    """
+    day = moment - timedelta(days=moment.weekday())
+    return day.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def build_points(rows: List[Dict[str, Any]], period: ProgressionPeriod) -> List[Dict[str, Any]]:
+    """
+    Turn per-session stat rows (oldest first) into progression points,
+    rolling them up by ISO week when requested.
+    """
+    points: Dict[datetime, Dict[str, Any]] = {}
+    for row in rows:
+        session_date = datetime.fromisoformat(row["date"])
+        key = week_start(session_date) if period == ProgressionPeriod.week else session_date
+        point = points.get(key)
+        if point is None:
+            points[key] = point = {
+                "date": key,
+                "sessions": 0,
+                "max_weight": 0.0,
+                "total_reps": 0.0,
+                "volume": 0.0,
+                "estimated_1rm": 0.0,
+            }
+        point["sessions"] += 1
+        point["max_weight"] = max(point["max_weight"], float(row["max_weight"]))
+        point["total_reps"] = round(point["total_reps"] + float(row["total_reps"]), 2)
+        point["volume"] = round(point["volume"] + float(row["volume"]), 2)
+        point["estimated_1rm"] = max(point["estimated_1rm"], float(row["estimated_1rm"]))
+    return list(points.values())
+
+@router.get("/exercises/progression", response_model=List[ExerciseProgression])
+async def get_exercise_progression(
+    exercise_ids: List[str] = Query(..., min_length=1, max_length=MAX_EXERCISES_PER_REQUEST),
+    period: ProgressionPeriod = ProgressionPeriod.session,
+    since: Optional[datetime] = None,
+    user_id: str = Depends(get_current_user_id)
+) -> List[Dict[str, Any]]:
+    """
+    Return max weight, total reps, volume and estimated 1RM over time for
+    each requested exercise, per session or per week.
+
+    Reads the compact exercise_session_stats rows maintained when workout
+    logs are saved rather than the raw exercises JSONB.
+    """
+    try:
+        rows = await exercise_stats_repo.list_session_stats(
+            user_id, exercise_ids, since=since.isoformat() if since else None
+        )
+
+        rows_by_exercise: Dict[str, List[Dict[str, Any]]] = {exercise_id: [] for exercise_id in exercise_ids}
+        for row in rows:
+            rows_by_exercise.setdefault(row["exercise_id"], []).append(row)
+
+        # Plain dicts: response_model validates and serializes them once
+        return [
+            {"exercise_id": exercise_id, "period": period, "points": build_points(exercise_rows, period)}
+            for exercise_id, exercise_rows in rows_by_exercise.items()
+        ]
+    except Exception as e:
+        logger.error(f"Error fetching exercise progression: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred: {str(e)}"
+        )
@@ -0,0 +1,121 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from typing import Any, Dict, List
+from datetime import datetime, timedelta, timezone
+import asyncio
+from ..utils.auth import get_current_user_id
+from ..utils.read_cache import DASHBOARD, DASHBOARD_CACHE_TTL, cached_json_response
+from ..utils.serialization import to_jsonable
+from ..utils.workout_metrics import summarize_exercises
+from ..schemas import DashboardResponse
+from ..repositories import goals as goals_repo, notifications as notifications_repo, users as users_repo, workout_logs as workout_logs_repo
+from ..utils.log import get_logger
+
+logger = get_logger(__name__)
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+
+# Only the columns the home screen shows
+PROFILE_COLUMNS = (
+    "id, name, email, height, sex, weight_unit, weekly_workout_goal, notifications, "
+    "referral_code, completed_referrals_count, last_workout_date"
+)
+GOAL_COLUMNS = "id, type, name, target_value, current_value, unit, end_date, exercise_id"
+LOG_COLUMNS = "id, workout_id, date, exercises"
+
+# Bounds for the number of recent logs returned
+DEFAULT_RECENT_LOGS = 5
+MAX_RECENT_LOGS = 20
+
+# Used when the user has no profile yet or never set a goal, as the app does
+DEFAULT_WEEKLY_WORKOUT_GOAL = 3
+
+def summarize_log(log: Dict[str, Any]) -> Dict[str, Any]:
+    summaries = summarize_exercises(log.get("exercises") or [])
+    return {
+        "id": log["id"],
+        "workout_id": log.get("workout_id"),
+        "date": log.get("date"),
+        "exercise_count": len(summaries),
+        "set_count": sum(summary["set_count"] for summary in summaries),
+        "total_volume": round(sum(summary["volume"] for summary in summaries), 2),
+    }
+
+def week_start(moment: datetime) -> datetime:
+    """
+    Midnight on the Monday of the week containing `moment`.
+    """
+    day = moment - timedelta(days=moment.weekday())
+    return day.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def weekly_progress(summary: Dict[str, Any], weekly_goal: int, start: datetime, end: datetime) -> Dict[str, Any]:
+    """
+    Workouts, workout days, volume and distinct exercises so far this ISO
+    week, and the share of the weekly workout goal reached, capped at 100%.
+
+    The goal counts days with a workout, as GET /activity does, so several
+    workouts on one day count once.
+    """
+    workout_days = int(summary.get("workout_days") or 0)
+    return {
+        "start_date": start,
+        "end_date": end,
+        "total_workouts": int(summary.get("total_workouts") or 0),
+        "workout_days": workout_days,
+        "total_volume": round(float(summary.get("total_volume") or 0), 2),
+        "unique_exercises": int(summary.get("unique_exercises") or 0),
+        "weekly_workout_goal": weekly_goal,
+        "consistency_percentage": min(100, round(workout_days / weekly_goal * 100)) if weekly_goal > 0 else 0,
+    }
+
+@router.get("", response_model=DashboardResponse)
+async def get_dashboard(
+    request: Request,
+    recent_logs: int = Query(DEFAULT_RECENT_LOGS, ge=0, le=MAX_RECENT_LOGS),
+    user_id: str = Depends(get_current_user_id)
+) -> Response:
+    """
+    Everything the home screen shows, in one request: the profile, active
+    goals, the latest workout logs summarized, the unread notification count
+    and progress this ISO week (from Monday 00:00 UTC) against
+    weekly_workout_goal.
+
+    The reads run concurrently and select only the columns shown; the week
+    is aggregated in the database rather than from its logs. The result
+    is cached per user and week for DASHBOARD_CACHE_TTL seconds, and dropped sooner
+    when the user's goals, notifications or workout logs change.
+    """
+    now = datetime.now(timezone.utc)
+    start = week_start(now)
+
+    async def load_dashboard() -> Dict[str, Any]:
+
+        async def latest_logs() -> List[Dict[str, Any]]:
+            return await workout_logs_repo.list_recent_logs(user_id, LOG_COLUMNS, recent_logs) if recent_logs else []
+
+        profile, goals, logs, unread, week = await asyncio.gather(
+            users_repo.get_user(user_id, PROFILE_COLUMNS),
+            goals_repo.list_active_goals(user_id, GOAL_COLUMNS),
+            latest_logs(),
+            notifications_repo.count_unread(user_id),
+            workout_logs_repo.week_summary(user_id, start.isoformat()),
+        )
+
+        weekly_goal = (profile or {}).get("weekly_workout_goal") or DEFAULT_WEEKLY_WORKOUT_GOAL
+        return to_jsonable(DashboardResponse, {
+            "profile": profile,
+            "active_goals": goals,
+            "recent_logs": [summarize_log(log) for log in logs],
+            "unread_notifications": unread,
+            "weekly_progress": weekly_progress(week, weekly_goal, start, now),
+        })
+
+    try:
+        return await cached_json_response(
+            request, user_id, DASHBOARD, f"logs:{recent_logs}:{start.date().isoformat()}", load_dashboard, ttl=DASHBOARD_CACHE_TTL
+        )
+    except Exception as e:
+        logger.error(f"Error loading dashboard: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred: {str(e)}"
+        )
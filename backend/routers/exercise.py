@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Any, Dict, List, Optional
+from ..utils.auth import get_current_user_id
+from ..utils.exercise_catalog import search_exercises
+from ..schemas import ExerciseResponse
+from ..utils.log import get_logger
+
+logger = get_logger(__name__)
+
+router = APIRouter(prefix="/exercises", tags=["Exercises"])
+
+# Result size bounds for GET /exercises
+DEFAULT_RESULT_LIMIT = 50
+MAX_RESULT_LIMIT = 200
+
+@router.get("", response_model=List[ExerciseResponse])
+async def get_exercises(
+    q: Optional[str] = Query(None, max_length=100),
+    muscle_group: Optional[str] = None,
+    equipment: Optional[str] = None,
+    difficulty: Optional[str] = None,
+    limit: int = Query(DEFAULT_RESULT_LIMIT, ge=1, le=MAX_RESULT_LIMIT),
+    user_id: str = Depends(get_current_user_id)
+) -> List[Dict[str, Any]]:
+    """
+    Search the built-in exercise catalog and the current user's custom
+    exercises by name, muscle group, equipment and difficulty.
+
+    `q` matches anywhere in the name (or the start of a word, for one- and
+    two-letter queries); the other filters are case-insensitive exact matches.
+    """
+    try:
+        return await search_exercises(
+            user_id, q, limit=limit, muscle_group=muscle_group, equipment=equipment, difficulty=difficulty
+        )
+    except Exception as e:
+        logger.error(f"Error searching exercises: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred: {str(e)}"
+        )
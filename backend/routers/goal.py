@@ -1,31 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from typing import List, Dict
 from datetime import datetime
 import uuid
 from ..utils.auth import get_current_user_id
+from ..utils.read_cache import GOALS, cached_json_response, invalidate
+from ..utils.serialization import to_jsonable
 from ..schemas import GoalRequest, GoalUpdateRequest, GoalResponse
+from ..repositories import goals as goals_repo
+from ..utils.log import get_logger
 
-router = APIRouter(prefix="/goals", tags=["Goals"])
+logger = get_logger(__name__)
 
-# Import supabase from main
-from ..main import supabase
+router = APIRouter(prefix="/goals", tags=["Goals"])
 
 @router.get("/", response_model=List[GoalResponse])
 async def get_goals(
+    request: Request,
     user_id: str = Depends(get_current_user_id)
-) -> List[GoalResponse]:
+) -> Response:
     """
     Fetch all goals for the current user.
+
+    Served from the per-user read cache; send the returned ETag back in
+    If-None-Match to get a 304 when nothing changed.
     """
+    async def load_goals() -> List[Dict]:
+        goals = await goals_repo.list_goals(user_id)
+        return to_jsonable(List[GoalResponse], goals)
+
     try:
-        response = supabase.table("goals").select("*").eq("user_id", user_id).order("created_at", desc=True).execute()
-        
-        if response.data:
-            return [GoalResponse(**goal) for goal in response.data]
-        else:
-            return []
+        return await cached_json_response(request, user_id, GOALS, "", load_goals)
     except Exception as e:
-        print(f"Error fetching goals: {e}")
+        logger.error(f"Error fetching goals: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred: {str(e)}"
@@ -35,7 +41,7 @@ async def get_goals(
 async def create_goal(
     request_data: GoalRequest,
     user_id: str = Depends(get_current_user_id)
-) -> GoalResponse:
+) -> Dict:
     """
     Create a new goal for the current user.
     """
@@ -58,17 +64,19 @@ async def create_goal(
             "description": request_data.description,
         }
         
-        response = supabase.table("goals").insert(goal_data).execute()
+        created = await goals_repo.insert_goal(goal_data)
         
-        if response.data:
-            return GoalResponse(**response.data[0])
+        if created:
+            await invalidate(user_id, GOALS)
+            # Validated once, by response_model
+            return created[0]
         else:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to create goal"
             )
     except Exception as e:
-        print(f"Error creating goal: {e}")
+        logger.error(f"Error creating goal: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred: {str(e)}"
@@ -79,7 +87,7 @@ async def update_goal(
     goal_id: str,
     request_data: GoalUpdateRequest,
     user_id: str = Depends(get_current_user_id)
-) -> GoalResponse:
+) -> Dict:
     """
     Update an existing goal for the current user.
     """
@@ -96,17 +104,18 @@ async def update_goal(
                 detail="No fields to update"
             )
         
-        response = supabase.table("goals").update(update_data).eq("id", goal_id).eq("user_id", user_id).execute()
+        updated = await goals_repo.update_goal(goal_id, user_id, update_data)
         
-        if response.data:
-            return GoalResponse(**response.data[0])
+        if updated:
+            await invalidate(user_id, GOALS)
+            return updated[0]
         else:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Goal not found or not authorized to update"
             )
     except Exception as e:
-        print(f"Error updating goal: {e}")
+        logger.error(f"Error updating goal: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred: {str(e)}"
@@ -121,9 +130,10 @@ async def delete_goal(
     Delete a goal for the current user.
     """
     try:
-        response = supabase.table("goals").delete().eq("id", goal_id).eq("user_id", user_id).execute()
+        deleted = await goals_repo.delete_goal(goal_id, user_id)
         
-        if response.data:
+        if deleted:
+            await invalidate(user_id, GOALS)
             return {"status": "success", "message": "Goal deleted successfully"}
         else:
             raise HTTPException(
@@ -131,7 +141,7 @@ async def delete_goal(
                 detail="Goal not found or not authorized to delete"
             )
     except Exception as e:
-        print(f"Error deleting goal: {e}")
+        logger.error(f"Error deleting goal: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred: {str(e)}"
@@ -154,42 +164,26 @@ async def update_goal_progress(
                 detail="current_value is required"
             )
         
-        # Fetch the goal to check target value
-        goal_response = supabase.table("goals").select("target_value, status").eq("id", goal_id).eq("user_id", user_id).single().execute()
+        # Set the value and complete the goal in one conditional update
+        updated = await goals_repo.set_progress(goal_id, user_id, new_value)
         
-        if not goal_response.data:
+        if not updated:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Goal not found"
             )
         
-        goal = goal_response.data
-        target_value = goal["target_value"]
-        current_status = goal["status"]
-        
-        # Determine if goal is completed
-        is_completed = new_value >= target_value
-        new_status = "completed" if is_completed else current_status
+        await invalidate(user_id, GOALS)
+        # Completed by this value, not merely already completed before it
+        is_completed = new_value >= float(updated["target_value"])
         
-        # Update the goal
-        response = supabase.table("goals").update({
-            "current_value": new_value,
-            "status": new_status
-        }).eq("id", goal_id).eq("user_id", user_id).execute()
-        
-        if response.data:
-            return {
-                "status": "success", 
-                "message": "Goal progress updated successfully",
-                "goal_completed": str(is_completed).lower()
-            }
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to update goal progress"
-            )
+        return {
+            "status": "success", 
+            "message": "Goal progress updated successfully",
+            "goal_completed": str(is_completed).lower()
+        }
     except Exception as e:
-        print(f"Error updating goal progress: {e}")
+        logger.error(f"Error updating goal progress: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred: {str(e)}"
@@ -1,29 +1,140 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Dict
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from typing import Any, Dict, Optional, Tuple
+from datetime import datetime
+import uuid
 from ..utils.auth import get_current_user_id
-from ..schemas import NotificationResponse
+from ..utils.read_cache import NOTIFICATIONS, cached_json_response, invalidate
+from ..utils.serialization import to_jsonable
+from ..utils.pagination import InvalidCursor, decode_cursor, encode_cursor
+from ..schemas import NotificationBulkReadRequest, NotificationPage, UnreadCountResponse
+from ..repositories import notifications as notifications_repo
+from ..utils.log import get_logger
+
+logger = get_logger(__name__)
 
 router = APIRouter(prefix="/notifications", tags=["Notifications"])
 
-# Import supabase from main
-from ..main import supabase
+# Page size bounds for GET /notifications
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def parse_notification_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Decode and validate a (created_at, id) notification cursor.
+    """
+    try:
+        created_at, notification_id = decode_cursor(cursor, 2)
+        return datetime.fromisoformat(created_at).isoformat(), str(uuid.UUID(notification_id))
+    except (InvalidCursor, TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
 
-@router.get("/", response_model=List[NotificationResponse])
+@router.get("/", response_model=NotificationPage)
 async def get_notifications(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    unread_only: bool = False,
     user_id: str = Depends(get_current_user_id)
-) -> List[NotificationResponse]:
+) -> Response:
     """
-    Fetch all notifications for the current user.
+    Fetch a page of notifications for the current user, newest first.
+
+    Pass the returned next_cursor back as `cursor` to fetch the following page.
+    Pages are served from the per-user read cache with an ETag, so polling
+    with If-None-Match returns 304 until a notification changes.
     """
+    before = parse_notification_cursor(cursor) if cursor else None
+
+    async def load_page() -> Dict[str, Any]:
+        # Fetch one extra row to learn whether another page exists
+        notifications = await notifications_repo.list_notifications_page(
+            user_id, limit + 1, before=before, unread_only=unread_only
+        )
+
+        next_cursor = None
+        if len(notifications) > limit:
+            notifications = notifications[:limit]
+            last = notifications[-1]
+            next_cursor = encode_cursor(last["created_at"], last["id"])
+
+        return to_jsonable(NotificationPage, {"items": notifications, "next_cursor": next_cursor})
+
     try:
-        response = supabase.table("notifications").select("*").eq("user_id", user_id).order("created_at", desc=True).execute()
-        
-        if response.data:
-            return [NotificationResponse(**notification) for notification in response.data]
-        else:
-            return []
+        variant = f"page:{limit}:{cursor or ''}:{int(unread_only)}"
+        return await cached_json_response(request, user_id, NOTIFICATIONS, variant, load_page)
+    except Exception as e:
+        logger.error(f"Error fetching notifications: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred: {str(e)}"
+        )
+
+@router.get("/unread-count", response_model=UnreadCountResponse)
+async def get_unread_count(
+    request: Request,
+    user_id: str = Depends(get_current_user_id)
+) -> Response:
+    """
+    Count the current user's unread notifications without fetching any rows.
+    """
+    async def load_count() -> Dict[str, Any]:
+        return to_jsonable(UnreadCountResponse, {"unread_count": await notifications_repo.count_unread(user_id)})
+
+    try:
+        return await cached_json_response(request, user_id, NOTIFICATIONS, "unread-count", load_count)
+    except Exception as e:
+        logger.error(f"Error counting unread notifications: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred: {str(e)}"
+        )
+
+@router.post("/read")
+async def mark_notifications_as_read(
+    request_data: NotificationBulkReadRequest,
+    user_id: str = Depends(get_current_user_id)
+) -> Dict[str, Any]:
+    """
+    Mark a list of notifications, or every notification created at or before
+    all_before, as read for the current user in a single update.
+    """
+    try:
+        updated = await notifications_repo.mark_many_as_read(
+            user_id,
+            notification_ids=[str(notification_id) for notification_id in request_data.ids] if request_data.ids else None,
+            created_before=request_data.all_before.isoformat() if request_data.all_before else None
+        )
+        if updated:
+            await invalidate(user_id, NOTIFICATIONS)
+        return {"status": "success", "message": f"{updated} notifications marked as read", "updated": updated}
+    except Exception as e:
+        logger.error(f"Error marking notifications as read: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred: {str(e)}"
+        )
+
+@router.delete("/")
+async def delete_old_notifications(
+    before: datetime,
+    read_only: bool = True,
+    user_id: str = Depends(get_current_user_id)
+) -> Dict[str, Any]:
+    """
+    Delete the current user's notifications created before a timestamp.
+
+    Only read notifications are removed unless read_only is false.
+    """
+    try:
+        deleted = await notifications_repo.delete_before(user_id, before.isoformat(), read_only=read_only)
+        if deleted:
+            await invalidate(user_id, NOTIFICATIONS)
+        return {"status": "success", "message": f"{deleted} notifications deleted", "deleted": deleted}
     except Exception as e:
-        print(f"Error fetching notifications: {e}")
+        logger.error(f"Error deleting notifications: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred: {str(e)}"
@@ -38,9 +149,10 @@ async def mark_notification_as_read(
     Mark a specific notification as read for the current user.
     """
     try:
-        response = supabase.table("notifications").update({"is_read": True}).eq("id", notification_id).eq("user_id", user_id).execute()
+        updated = await notifications_repo.mark_as_read(notification_id, user_id)
         
-        if response.data:
+        if updated:
+            await invalidate(user_id, NOTIFICATIONS)
             return {"status": "success", "message": "Notification marked as read"}
         else:
             raise HTTPException(
@@ -48,7 +160,7 @@ async def mark_notification_as_read(
                 detail="Notification not found or not authorized to update"
             )
     except Exception as e:
-        print(f"Error marking notification as read: {e}")
+        logger.error(f"Error marking notification as read: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred: {str(e)}"
@@ -2,11 +2,12 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from typing import Dict
 from ..utils.auth import get_current_user_id
 from ..schemas import UserStatusRequest
+from ..repositories import users as users_repo
+from ..utils.log import get_logger
 
-router = APIRouter(prefix="/user-status", tags=["User Status"])
+logger = get_logger(__name__)
 
-# Import supabase from main
-from ..main import supabase
+router = APIRouter(prefix="/user-status", tags=["User Status"])
 
 @router.post("/")
 async def update_user_status(
@@ -18,11 +19,11 @@ async def update_user_status(
     """
     try:
         # Update the user_status_flags column for the current user
-        response = supabase.table("users").update({
+        updated = await users_repo.update_user(user_id, {
             "user_status_flags": request_data.status
-        }).eq("id", user_id).execute()
+        })
 
-        if response.data:
+        if updated:
             return {"status": "success", "message": "User status updated successfully"}
         else:
             raise HTTPException(
@@ -30,7 +31,7 @@ async def update_user_status(
                 detail="Failed to update user status"
             )
     except Exception as e:
-        print(f"Error updating user status: {e}")
+        logger.error(f"Error updating user status: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred: {str(e)}"
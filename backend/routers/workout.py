@@ -1,14 +1,131 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import Dict
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Dict, List
+from datetime import datetime, timezone
+import os
 import uuid
 from ..utils.auth import get_current_user_id
-from ..schemas import WorkoutLogRequest
+from ..utils.exercise_catalog import exercise_names
+from ..utils.read_cache import ACTIVITY, DASHBOARD, GOALS, NOTIFICATIONS, invalidate
+from ..utils.workout_metrics import flatten_log, goal_metrics, record_candidates, set_rows, summarize_exercises
+from ..utils.export import encode_export
+from ..schemas import ExportFormat, WorkoutLogRequest, WorkoutLogBatchRequest, WorkoutLogBatchResponse, WorkoutLogBatchItemResult
+from ..repositories import workout_logs as workout_logs_repo, notifications as notifications_repo
+from ..utils.log import get_logger
+
+logger = get_logger(__name__)
 
 router = APIRouter(prefix="/workout-logs", tags=["Workout Logs"])
 
-# Import supabase from main
-from ..main import supabase
+# Logs fetched per round trip while streaming an export
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "500"))
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+def build_log_row(request_data: WorkoutLogRequest, user_id: str) -> Dict[str, Any]:
+    """
+    Turn a validated request into a workout_logs row with a fresh id.
+    """
+    return {
+        "id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "workout_id": request_data.workout_id,
+        # Sets are already validated; store them as sent, without defaults for fields left out
+        "exercises": [ex.model_dump(exclude_unset=True) for ex in request_data.exercises],
+        # Use provided date or current timestamp
+        "date": request_data.date or datetime.utcnow().isoformat(),
+        "idempotency_key": request_data.idempotency_key,
+    }
+
+def workout_timestamp(value: str) -> datetime:
+    """
+    Parse a log date for comparison, treating dates without an offset as UTC.
+    """
+    moment = datetime.fromisoformat(value)
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+def save_payload(log: Dict[str, Any], user_id: str) -> Dict[str, Any]:
+    """
+    A log as passed to save_workout_logs, with the rows and metrics derived
+    from its sets for the follow-up writes the database makes in the same call.
+    """
+    return {
+        **log,
+        "sets": set_rows(log["id"], user_id, log["date"], log["exercises"]),
+        "session_stats": summarize_exercises(log["exercises"]),
+        "goal_metrics": goal_metrics(log["exercises"]),
+        "records": record_candidates(log["exercises"]),
+    }
+
+def personal_record_notification(user_id: str, log: Dict[str, Any], records: List[Dict[str, Any]], names: Dict[str, str]) -> Dict[str, Any]:
+    """
+    One notification listing every record a log beat. Its id is derived from
+    the log so a retried save cannot notify twice.
+    """
+    exercises = sorted({names.get(record["exercise_id"], "an exercise") for record in records})
+    return {
+        "id": str(uuid.uuid5(uuid.NAMESPACE_URL, f"fitrek:personal_record:{log['id']}")),
+        "user_id": user_id,
+        "type": "personal_record",
+        "message": f"🏆 New personal record in {', '.join(exercises)}!",
+        "details": {
+            "workout_log_id": log["id"],
+            "records": [
+                {**record, "exercise_name": names.get(record["exercise_id"])}
+                for record in records
+            ],
+        },
+        "is_read": False,
+    }
+
+async def notify_personal_records(user_id: str, logs: List[Dict[str, Any]], records: List[Dict[str, Any]]) -> None:
+    """
+    Notify the user of the personal records the logs beat, one notification
+    per log, oldest log first.
+
+    The logs are already saved, so a failure here is logged rather than
+    failing the save.
+    """
+    try:
+        by_log: Dict[str, List[Dict[str, Any]]] = {}
+        for record in records:
+            record = dict(record)
+            by_log.setdefault(str(record.pop("workout_log_id")), []).append(record)
+        names = await exercise_names(user_id, sorted({record["exercise_id"] for record in records}))
+        notifications = [
+            personal_record_notification(user_id, log, by_log[log["id"]], names)
+            for log in sorted(logs, key=lambda log: workout_timestamp(log["date"]))
+            if log["id"] in by_log
+        ]
+        if notifications:
+            await notifications_repo.insert_notifications(notifications, ignore_duplicates=True)
+            await invalidate(user_id, NOTIFICATIONS)
+    except Exception as e:
+        logger.error(f"Error notifying personal records for user {user_id}: {e}")
+
+async def save_logs(user_id: str, logs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Save logs in one database call and one transaction: it inserts them,
+    moves last_workout_date forward, resets the inactivity flags and writes
+    the sets, progression stats, goal progress, personal records and streak
+    counters of the logs actually inserted. If any of those writes fails
+    nothing is saved and the error is raised here.
+
+    Returns the id and idempotency_key of those logs; logs whose idempotency
+    key was already used are skipped.
+    """
+    result = await workout_logs_repo.save_workout_logs(user_id, [save_payload(log, user_id) for log in logs])
+    if result.get("inserted"):
+        await invalidate(user_id, DASHBOARD)
+        await invalidate(user_id, ACTIVITY)
+    if result.get("goals"):
+        await invalidate(user_id, GOALS)
+    if result.get("records"):
+        await notify_personal_records(user_id, logs, result["records"])
+    return result.get("inserted") or []
 
 @router.post("/")
 async def save_workout_log(
@@ -19,33 +136,128 @@ async def save_workout_log(
     Save a workout log to the database.
     """
     try:
-        # Use provided date or current timestamp
-        workout_date = request_data.date or datetime.utcnow().isoformat()
-        
-        # Insert the workout log
-        response = supabase.table("workout_logs").insert({
-            "id": str(uuid.uuid4()),
-            "user_id": user_id,
-            "workout_id": request_data.workout_id,
-            "exercises": [ex.dict() for ex in request_data.exercises],
-            "date": workout_date
-        }).execute()
-
-        if response.data:
-            # Update user's last_workout_date
-            supabase.table("users").update({
-                "last_workout_date": workout_date
-            }).eq("id", user_id).execute()
-            
+        log = build_log_row(request_data, user_id)
+
+        # Save the workout log, skipping it if its idempotency key was already used
+        created = await save_logs(user_id, [log])
+
+        if created:
             return {"status": "success", "message": "Workout log saved successfully"}
+        elif request_data.idempotency_key:
+            return {"status": "success", "message": "Workout log already saved"}
         else:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Failed to save workout log"
             )
     except Exception as e:
-        print(f"Error saving workout log: {e}")
+        logger.error(f"Error saving workout log: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"An error occurred: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.post("/batch", response_model=WorkoutLogBatchResponse)
+async def save_workout_logs(
+    request_data: WorkoutLogBatchRequest,
+    user_id: str = Depends(get_current_user_id)
+) -> WorkoutLogBatchResponse:
+    """
+    Save a batch of workout logs, e.g. ones queued by a client while offline.
+
+    All new logs are saved in one database call. Logs whose idempotency key was
+    already used, earlier in the batch or by a previous request, are reported
+    as duplicates with the id of the stored log instead of being inserted again.
+    """
+    try:
+        results: List[WorkoutLogBatchItemResult] = []
+        rows: List[Dict[str, Any]] = []
+        # idempotency key -> index of the first result in this batch that uses it
+        first_with_key: Dict[str, int] = {}
+
+        for index, log_request in enumerate(request_data.logs):
+            key = log_request.idempotency_key
+            result = WorkoutLogBatchItemResult(index=index, idempotency_key=key, status="created")
+            results.append(result)
+            if key is not None and key in first_with_key:
+                result.status = "duplicate"
+                continue
+            if key is not None:
+                first_with_key[key] = index
+            row = build_log_row(log_request, user_id)
+            result.id = row["id"]
+            rows.append(row)
+
+        created = await save_logs(user_id, rows) if rows else []
+        created_ids = {row["id"] for row in created}
+        new_logs = [row for row in rows if row["id"] in created_ids]
+
+        # Resolve duplicates to the logs already stored under their keys
+        duplicate_keys = {
+            result.idempotency_key for result in results
+            if result.id not in created_ids and result.idempotency_key is not None
+        }
+        stored_ids: Dict[str, str] = {}
+        if duplicate_keys:
+            existing = await workout_logs_repo.find_by_idempotency_keys(user_id, list(duplicate_keys))
+            stored_ids = {row["idempotency_key"]: row["id"] for row in existing}
+        for result in results:
+            if result.id not in created_ids:
+                result.status = "duplicate"
+                result.id = stored_ids.get(result.idempotency_key)
+
+        return WorkoutLogBatchResponse(
+            created=len(new_logs),
+            duplicates=len(results) - len(new_logs),
+            results=results,
+        )
+    except Exception as e:
+        logger.error(f"Error saving workout logs: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred: {str(e)}"
+        )
+
+@router.get("/export")
+async def export_workout_logs(
+    export_format: ExportFormat = Query(ExportFormat.ndjson, alias="format"),
+    user_id: str = Depends(get_current_user_id)
+) -> StreamingResponse:
+    """
+    Stream the current user's full workout history, one row per set, as
+    NDJSON or CSV.
+
+    Logs are read oldest first in pages of EXPORT_PAGE_SIZE using the
+    (date, id) keyset and each page is flattened and encoded before the next
+    is fetched, so memory use does not grow with the history and the first
+    rows are sent as soon as the first page is read.
+    """
+    try:
+        # Read the first page up front so a database error still gets a proper status
+        first_page = await workout_logs_repo.list_logs_page(user_id, EXPORT_PAGE_SIZE)
+    except Exception as e:
+        logger.error(f"Error exporting workout logs: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred: {str(e)}"
+        )
+
+    async def pages(page: List[Dict[str, Any]]) -> AsyncIterator[List[Dict[str, Any]]]:
+        try:
+            while page:
+                yield [row for log in page for row in flatten_log(log)]
+                if len(page) < EXPORT_PAGE_SIZE:
+                    return
+                last = page[-1]
+                page = await workout_logs_repo.list_logs_page(user_id, EXPORT_PAGE_SIZE, after=(last["date"], last["id"]))
+        except Exception as e:
+            # The status line is already sent; abort the stream so the client sees a truncated body
+            logger.error(f"Error exporting workout logs for user {user_id}: {e}")
+            raise
+
+    filename = f"workout-logs.{export_format.value}"
+    return StreamingResponse(
+        encode_export(pages(first_page), export_format.value),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
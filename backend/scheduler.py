@@ -0,0 +1,499 @@
+"""
+Scheduled jobs and the scheduler that runs them.
+
+The scheduler starts inside the API workers by default (see SCHEDULER_MODE in
+main.py) or as its own process:
+
+    python -m backend.scheduler
+"""
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from prometheus_client import start_http_server
+from datetime import datetime, timedelta, date
+from typing import Optional, Dict, Any, Tuple, Callable, Awaitable
+import asyncio
+import functools
+import os
+import socket
+import time
+import uuid
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from .db import close_client
+from .utils.exercise_catalog import load_custom_exercises, muscle_group_volumes
+from .utils.job_executor import run_chunked
+from .utils.metrics import record_job_run
+from .utils.pagination import InvalidCursor, decode_cursor, encode_cursor
+from .utils.read_cache import NOTIFICATIONS, invalidate, invalidate_many
+from .repositories import activity_stats as activity_stats_repo, job_runs as job_runs_repo, notifications as notifications_repo, users as users_repo, workout_logs as workout_logs_repo
+from .utils.log import get_logger
+
+logger = get_logger("backend.scheduler")
+
+# Initialize scheduler
+scheduler = AsyncIOScheduler()
+
+# Claim-wrapped jobs by name, used to resume runs abandoned by crashed workers
+JOB_REGISTRY: Dict[str, Callable[..., Awaitable[Any]]] = {}
+
+# Identifies this process when claiming job runs
+WORKER_ID = os.getenv("WORKER_ID", f"{socket.gethostname()}:{os.getpid()}")
+
+# A claimed run whose holder has not finished within the lease may be taken over
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "3600"))
+
+# Users fetched per page by the scheduled jobs, and how those pages are processed
+JOB_PAGE_SIZE = int(os.getenv("JOB_PAGE_SIZE", "1000"))
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", "4"))
+JOB_MAX_RETRIES = int(os.getenv("JOB_MAX_RETRIES", "3"))
+JOB_RETRY_BACKOFF_SECONDS = float(os.getenv("JOB_RETRY_BACKOFF_SECONDS", "1"))
+
+# Unfinished runs younger than this are resumed from their checkpoint once their lease expires
+JOB_RECOVERY_MAX_AGE_HOURS = int(os.getenv("JOB_RECOVERY_MAX_AGE_HOURS", "12"))
+
+# Port on which a standalone scheduler process serves /metrics (0 disables it)
+SCHEDULER_METRICS_PORT = int(os.getenv("SCHEDULER_METRICS_PORT", "0"))
+
+# Notification retention policy
+NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "90"))
+NOTIFICATION_WEEKLY_SUMMARY_KEEP = int(os.getenv("NOTIFICATION_WEEKLY_SUMMARY_KEEP", "4"))
+NOTIFICATION_PRUNE_BATCH_SIZE = int(os.getenv("NOTIFICATION_PRUNE_BATCH_SIZE", "5000"))
+NOTIFICATION_PRUNE_MAX_BATCHES = int(os.getenv("NOTIFICATION_PRUNE_MAX_BATCHES", "200"))
+NOTIFICATION_PRUNE_PAUSE_SECONDS = float(os.getenv("NOTIFICATION_PRUNE_PAUSE_SECONDS", "0.5"))
+
+# Streak counters: rows reset per database call by the nightly activity job,
+# at most ACTIVITY_RESET_MAX_BATCHES calls per run with a pause between them
+ACTIVITY_RESET_BATCH_SIZE = int(os.getenv("ACTIVITY_RESET_BATCH_SIZE", "5000"))
+ACTIVITY_RESET_MAX_BATCHES = int(os.getenv("ACTIVITY_RESET_MAX_BATCHES", "200"))
+ACTIVITY_RESET_PAUSE_SECONDS = float(os.getenv("ACTIVITY_RESET_PAUSE_SECONDS", "0.5"))
+
+def current_run_key(now: Optional[datetime] = None) -> str:
+    """
+    Identify a cron fire by its scheduled minute.
+
+    Rounding to the nearest minute lets workers whose clocks or start-up
+    delays differ by up to 30 seconds agree on the same key.
+    """
+    now = (now or datetime.utcnow()) + timedelta(seconds=30)
+    return now.strftime("%Y-%m-%dT%H:%M")
+
+def run_once_across_workers(job_name: str):
+    """
+    Make a scheduled job execute on exactly one worker per cron fire.
+
+    Every worker tries to claim (job_name, run key) in scheduled_job_runs;
+    only the worker whose claim succeeds runs the job, passing it the run key
+    so it can checkpoint its progress. The undecorated job is available as
+    `job.__wrapped__` for manual runs.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(run_key: Optional[str] = None):
+            run_key = run_key or current_run_key()
+            try:
+                claimed = await job_runs_repo.claim_run(job_name, run_key, WORKER_ID, JOB_LEASE_SECONDS)
+            except Exception as e:
+                logger.error(f"Could not claim {job_name} run {run_key}: {e}")
+                return None
+
+            if not claimed:
+                logger.info(f"Skipping {job_name} run {run_key}: claimed by another worker")
+                return None
+
+            started = time.perf_counter()
+            stats = await func(run_key=run_key)
+            record_job_run(job_name, time.perf_counter() - started, stats)
+            try:
+                await job_runs_repo.finish_run(job_name, run_key, WORKER_ID, stats)
+            except Exception as e:
+                logger.error(f"Could not record completion of {job_name} run {run_key}: {e}")
+            return stats
+
+        JOB_REGISTRY[job_name] = wrapper
+        return wrapper
+    return decorator
+
+def executor_options(job_name: str, run_key: Optional[str]) -> Dict[str, Any]:
+    """
+    Chunked executor settings for a job, checkpointing into its claimed run when it has one.
+    """
+    options = {
+        "chunk_size": JOB_PAGE_SIZE,
+        "concurrency": JOB_CONCURRENCY,
+        "max_retries": JOB_MAX_RETRIES,
+        "backoff_seconds": JOB_RETRY_BACKOFF_SECONDS,
+    }
+    if run_key:
+        options["load_checkpoint"] = lambda: job_runs_repo.get_checkpoint(job_name, run_key)
+        options["save_checkpoint"] = lambda cursor: job_runs_repo.save_checkpoint(job_name, run_key, cursor)
+    return options
+
+def notification_id_for(job_name: str, run_id: str, user_id: str) -> str:
+    """
+    Derive a stable notification id so a retried or resumed chunk cannot notify a user twice.
+    """
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"fitrek:{job_name}:{run_id}:{user_id}"))
+
+def build_notification(user_id: str, notification_type: str, message: str, details: dict, notification_id: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "id": notification_id or str(uuid.uuid4()),
+        "user_id": user_id,
+        "type": notification_type,
+        "message": message,
+        "details": details,
+        "is_read": False
+    }
+
+# Helper function to create notifications
+async def create_notification(user_id: str, notification_type: str, message: str, details: dict):
+    try:
+        await notifications_repo.insert_notifications([
+            build_notification(user_id, notification_type, message, details)
+        ])
+        await invalidate(user_id, NOTIFICATIONS)
+        logger.info(f"Notification '{notification_type}' created for user {user_id}")
+    except Exception as e:
+        logger.error(f"Error creating notification for user {user_id}: {e}")
+
+def classify_user(user_data: Dict[str, Any], current_date: date) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, bool]]]:
+    """
+    Decide what the daily check should do for one user.
+
+    Returns the notification row to insert and the status flag patch to merge,
+    either of which may be None.
+    """
+    user_id = user_data["id"]
+    last_workout_date_str = user_data.get("last_workout_date")
+    user_status_flags = user_data.get("user_status_flags") or {}
+
+    if not last_workout_date_str:
+        # Send initial motivation if no workout ever logged
+        if not user_status_flags.get("initial_motivation_sent"):
+            return (
+                build_notification(
+                    user_id,
+                    "motivation",
+                    "⚡ Stay consistent! Log your first workout to start tracking your progress.",
+                    {"reason": "No workouts logged yet."}
+                ),
+                {"initial_motivation_sent": True},
+            )
+        return None, None
+
+    last_workout_date = datetime.fromisoformat(last_workout_date_str.replace("Z", "+00:00")).date()
+    days_since = (current_date - last_workout_date).days
+
+    # Low motivation alert (3-6 days since last workout)
+    if 3 <= days_since <= 6 and not user_status_flags.get("low_motivation_sent"):
+        return (
+            build_notification(
+                user_id,
+                "low_motivation_alert",
+                "💡 You've been away a few days. Let's get back to it!",
+                {"days_since_last_workout": days_since}
+            ),
+            {"low_motivation_sent": True, "welcome_back_sent": False},
+        )
+
+    # Welcome back (7+ days since last workout)
+    if days_since >= 7 and not user_status_flags.get("welcome_back_sent"):
+        return (
+            build_notification(
+                user_id,
+                "welcome_back",
+                "👋 Welcome back! Let's restart your journey strong!",
+                {"days_since_last_workout": days_since}
+            ),
+            {"welcome_back_sent": True, "low_motivation_sent": False},
+        )
+
+    # Reset flags if user has returned (less than 3 days since last workout)
+    if days_since < 3 and (user_status_flags.get("low_motivation_sent") or user_status_flags.get("welcome_back_sent")):
+        return None, {"low_motivation_sent": False, "welcome_back_sent": False, "initial_motivation_sent": False}
+
+    return None, None
+
+# Daily check job - runs every day at 9 PM UTC
+@scheduler.scheduled_job("cron", hour=21, minute=0, id="daily_check_job")
+@run_once_across_workers("daily_check_job")
+async def daily_check_job(run_key: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Walk the users whose next_check_at has passed, in (next_check_at, id)
+    order in chunks of JOB_PAGE_SIZE, processing up to JOB_CONCURRENCY chunks
+    at once. Each chunk costs at most one bulk notification insert and one
+    bulk flag update.
+
+    next_check_at is recomputed by the database whenever last_workout_date or
+    user_status_flags change, so the flag updates made here reschedule the
+    users they touch and the job only ever reads users with something to do.
+    """
+    logger.info(f"Running daily check job at {datetime.utcnow()} UTC")
+    started_at = datetime.utcnow()
+    current_date = started_at.date()
+    due_before = started_at.isoformat() + "Z"
+    run_id = run_key or uuid.uuid4().hex
+    pages = 0
+
+    async def fetch_users(cursor: Optional[str]):
+        nonlocal pages
+        after = None
+        if cursor:
+            try:
+                after = decode_cursor(cursor, 2)
+            except InvalidCursor:
+                # A checkpoint from an older layout: start over, the checks are idempotent per run
+                logger.warning(f"Ignoring unreadable daily check checkpoint {cursor!r}")
+        users = await users_repo.list_due_users(
+            "id, next_check_at, last_workout_date, user_status_flags", due_before, after, JOB_PAGE_SIZE
+        )
+        pages += 1
+        return users, encode_cursor(users[-1]["next_check_at"], users[-1]["id"]) if users else None
+
+    async def process_users(users) -> Dict[str, int]:
+        counters = {"users_processed": len(users), "notifications_created": 0, "flags_updated": 0, "round_trips": 0, "errors": 0}
+        notifications = []
+        flag_updates = []
+        for user_data in users:
+            try:
+                notification, flags_patch = classify_user(user_data, current_date)
+            except Exception as e:
+                logger.error(f"Error processing user {user_data.get('id')} in daily_check_job: {e}")
+                counters["errors"] += 1
+                continue
+            if notification:
+                notification["id"] = notification_id_for("daily_check_job", run_id, user_data["id"])
+                notifications.append(notification)
+            if flags_patch:
+                flag_updates.append({"id": user_data["id"], "flags": flags_patch})
+
+        # Notifications go first so a failed chunk is retried rather than silently flagged as sent
+        if notifications:
+            await notifications_repo.insert_notifications(notifications, ignore_duplicates=True)
+            await invalidate_many([notification["user_id"] for notification in notifications], NOTIFICATIONS)
+            counters["round_trips"] += 1
+            counters["notifications_created"] += len(notifications)
+        if flag_updates:
+            counters["flags_updated"] += await users_repo.merge_status_flags(flag_updates)
+            counters["round_trips"] += 1
+        return counters
+
+    stats: Dict[str, Any] = {}
+    try:
+        report = await run_chunked(fetch_users, process_users, **executor_options("daily_check_job", run_key))
+        stats = report.as_stats()
+        stats["round_trips"] = stats.get("round_trips", 0) + pages
+
+        if not stats.get("users_processed"):
+            logger.info("No users found to process in daily check job.")
+
+    except Exception as e:
+        logger.error(f"An error occurred during the daily check job: {e}")
+        stats["error"] = str(e)
+
+    logger.info("Daily check job finished", extra={"stats": {k: v for k, v in stats.items() if k != "chunk_timings"}})
+    return stats
+
+# Weekly summary job - runs every Sunday at 11 PM UTC
+@scheduler.scheduled_job("cron", day_of_week="sun", hour=23, minute=0, id="weekly_summary_job")
+@run_once_across_workers("weekly_summary_job")
+async def weekly_summary_job(run_key: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Aggregate the last 7 days of workouts in the database in chunks of
+    JOB_PAGE_SIZE users and bulk-insert a summary notification per user,
+    with volume per muscle group resolved through the exercise catalog.
+    """
+    logger.info(f"Running weekly summary job at {datetime.utcnow()} UTC")
+    run_id = run_key or uuid.uuid4().hex
+    pages = 0
+
+    # Calculate date 7 days ago
+    seven_days_ago = (datetime.utcnow() - timedelta(days=7)).isoformat() + "Z"
+
+    async def fetch_summaries(after_id: Optional[str]):
+        nonlocal pages
+        summaries = await workout_logs_repo.weekly_summaries(seven_days_ago, after_id, JOB_PAGE_SIZE)
+        pages += 1
+        return summaries, summaries[-1]["user_id"] if summaries else None
+
+    async def process_summaries(summaries) -> Dict[str, int]:
+        # Label custom exercises for the whole chunk in one query; built-in ones come from the catalog
+        try:
+            custom_exercises = await load_custom_exercises(
+                {exercise_id for summary in summaries for exercise_id in (summary.get("exercise_volumes") or {})}
+            )
+        except Exception as e:
+            logger.error(f"Error loading custom exercises for weekly summaries: {e}")
+            custom_exercises = {}
+
+        notifications = [
+            build_notification(
+                summary["user_id"],
+                "weekly_summary",
+                "📊 Your weekly summary is here!",
+                {
+                    "total_workouts": summary["total_workouts"],
+                    "total_volume": round(float(summary["total_volume"] or 0), 2),
+                    "unique_exercises": summary["unique_exercises"],
+                    "muscle_group_volume": muscle_group_volumes(summary.get("exercise_volumes"), custom_exercises),
+                },
+                notification_id=notification_id_for("weekly_summary_job", run_id, summary["user_id"])
+            )
+            for summary in summaries
+        ]
+        await notifications_repo.insert_notifications(notifications, ignore_duplicates=True)
+        await invalidate_many([notification["user_id"] for notification in notifications], NOTIFICATIONS)
+        return {"users_processed": len(summaries), "notifications_created": len(notifications), "round_trips": 1}
+
+    stats: Dict[str, Any] = {}
+    try:
+        report = await run_chunked(fetch_summaries, process_summaries, **executor_options("weekly_summary_job", run_key))
+        stats = report.as_stats()
+        stats["round_trips"] = stats.get("round_trips", 0) + pages
+
+        if not stats.get("users_processed"):
+            logger.info("No users found to process in weekly summary job.")
+
+    except Exception as e:
+        logger.error(f"An error occurred during the weekly summary job: {e}")
+        stats["error"] = str(e)
+
+    logger.info("Weekly summary job finished", extra={"stats": {k: v for k, v in stats.items() if k != "chunk_timings"}})
+    return stats
+
+async def run_in_batches(
+    run_batch: Callable[[], Awaitable[int]],
+    stats: Dict[str, int],
+    batch_size: int,
+    max_batches: int,
+    pause: float,
+) -> int:
+    """
+    Call run_batch until it affects less than a full batch of rows or
+    max_batches calls have been made, pausing `pause` seconds between
+    batches so the job does not monopolise the database.
+    """
+    affected = 0
+    for batch_number in range(max_batches):
+        if batch_number:
+            await asyncio.sleep(pause)
+        batch_affected = await run_batch()
+        stats["batches"] += 1
+        affected += batch_affected
+        if batch_affected < batch_size:
+            break
+    return affected
+
+# Notification retention job - runs every day at 3 AM UTC
+@scheduler.scheduled_job("cron", hour=3, minute=0, id="notification_retention_job")
+@run_once_across_workers("notification_retention_job")
+async def notification_retention_job(run_key: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Delete read notifications past the retention window and weekly summaries
+    superseded by newer ones.
+    """
+    logger.info(f"Running notification retention job at {datetime.utcnow()} UTC")
+    stats = {"read_notifications_removed": 0, "weekly_summaries_removed": 0, "batches": 0}
+
+    try:
+        retention_cutoff = (datetime.utcnow() - timedelta(days=NOTIFICATION_RETENTION_DAYS)).isoformat() + "Z"
+
+        stats["read_notifications_removed"] = await run_in_batches(
+            lambda: notifications_repo.prune_read(retention_cutoff, NOTIFICATION_PRUNE_BATCH_SIZE),
+            stats,
+            NOTIFICATION_PRUNE_BATCH_SIZE,
+            NOTIFICATION_PRUNE_MAX_BATCHES,
+            NOTIFICATION_PRUNE_PAUSE_SECONDS
+        )
+        stats["weekly_summaries_removed"] = await run_in_batches(
+            lambda: notifications_repo.collapse_weekly_summaries(NOTIFICATION_WEEKLY_SUMMARY_KEEP, NOTIFICATION_PRUNE_BATCH_SIZE),
+            stats,
+            NOTIFICATION_PRUNE_BATCH_SIZE,
+            NOTIFICATION_PRUNE_MAX_BATCHES,
+            NOTIFICATION_PRUNE_PAUSE_SECONDS
+        )
+
+    except Exception as e:
+        logger.error(f"An error occurred during the notification retention job: {e}")
+        stats["error"] = str(e)
+
+    logger.info("Notification retention job finished", extra={"stats": stats})
+    return stats
+
+
+# Activity reset job - runs every day just after midnight UTC
+@scheduler.scheduled_job("cron", hour=0, minute=15, id="activity_reset_job")
+@run_once_across_workers("activity_reset_job")
+async def activity_reset_job(run_key: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Zero the streaks broken by a day without a workout, and the weekly
+    counts once a new week starts, in batches.
+
+    Saving a workout keeps the counters current but nothing runs when a user
+    skips a day; GET /activity already reports those streaks as broken, so
+    this keeps the stored rows consistent for everything else reading them.
+    """
+    logger.info(f"Running activity reset job at {datetime.utcnow()} UTC")
+    stats = {"activity_stats_reset": 0, "batches": 0}
+
+    try:
+        today = datetime.utcnow().date().isoformat()
+        stats["activity_stats_reset"] = await run_in_batches(
+            lambda: activity_stats_repo.reset_stale(today, ACTIVITY_RESET_BATCH_SIZE),
+            stats,
+            ACTIVITY_RESET_BATCH_SIZE,
+            ACTIVITY_RESET_MAX_BATCHES,
+            ACTIVITY_RESET_PAUSE_SECONDS
+        )
+
+    except Exception as e:
+        logger.error(f"An error occurred during the activity reset job: {e}")
+        stats["error"] = str(e)
+
+    logger.info("Activity reset job finished", extra={"stats": stats})
+    return stats
+
+
+# Stale run recovery - runs every 10 minutes
+@scheduler.scheduled_job("interval", minutes=10, id="recover_stale_job_runs")
+async def recover_stale_job_runs() -> int:
+    """
+    Resume runs whose worker died before finishing, from their last checkpoint.
+
+    Taking over a run goes through the same claim as a normal fire, so only
+    one worker resumes each abandoned run.
+    """
+    try:
+        claimed_after = (datetime.utcnow() - timedelta(hours=JOB_RECOVERY_MAX_AGE_HOURS)).isoformat() + "Z"
+        stale_runs = await job_runs_repo.list_stale_runs(claimed_after)
+    except Exception as e:
+        logger.error(f"Could not look up stale job runs: {e}")
+        return 0
+
+    resumed = 0
+    for run in stale_runs:
+        job = JOB_REGISTRY.get(run["job_name"])
+        if job is None:
+            continue
+        logger.info(f"Resuming {run['job_name']} run {run['run_key']} abandoned by {run['holder']}")
+        if await job(run_key=run["run_key"]) is not None:
+            resumed += 1
+    return resumed
+
+async def run_scheduler() -> None:
+    """
+    Run the scheduler in this process until it is interrupted.
+    """
+    if SCHEDULER_METRICS_PORT:
+        start_http_server(SCHEDULER_METRICS_PORT)
+    scheduler.start()
+    logger.info(f"Scheduler process {WORKER_ID} started")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        scheduler.shutdown()
+        await close_client()
+
+if __name__ == "__main__":
+    asyncio.run(run_scheduler())
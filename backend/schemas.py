@@ -1,6 +1,7 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
 from typing import List, Dict, Any, Optional
-from datetime import datetime
+from datetime import date, datetime
+from uuid import UUID
 from enum import Enum
 
 class GoalType(str, Enum):
@@ -16,14 +17,58 @@ class GoalStatus(str, Enum):
     failed = "failed"
     archived = "archived"
 
+class ProgressionPeriod(str, Enum):
+    session = "session"
+    week = "week"
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+class WorkoutSet(BaseModel):
+    # Known fields are validated; anything else the app sends is stored with the set as before
+    model_config = ConfigDict(extra="allow")
+
+    # int | float keeps numbers as the app sent them (20 stays 20, not 20.0)
+    weight: Optional[int | float] = Field(default=None, ge=0)
+    # Fractional reps (partials) are kept as logged, in the log and in every table derived from it
+    reps: Optional[int | float] = Field(default=None, ge=0)
+    # Rate of perceived exertion on the usual 0-10 scale
+    rpe: Optional[int | float] = Field(default=None, ge=0, le=10)
+    # Seconds, for timed sets such as planks or intervals
+    duration: Optional[int | float] = Field(default=None, ge=0)
+
 class WorkoutExercise(BaseModel):
     exerciseId: int | str
-    sets: List[Dict[str, Any]]
+    sets: List[WorkoutSet]
 
 class WorkoutLogRequest(BaseModel):
     workout_id: str
     exercises: List[WorkoutExercise]
     date: Optional[str] = None
+    # Client-generated key; resending a log with the same key never creates a second copy
+    idempotency_key: Optional[str] = Field(default=None, min_length=1, max_length=128)
+
+    @field_validator("date")
+    @classmethod
+    def check_date(cls, value):
+        if value is not None:
+            datetime.fromisoformat(value)
+        return value
+
+class WorkoutLogBatchRequest(BaseModel):
+    logs: List[WorkoutLogRequest] = Field(min_length=1, max_length=100)
+
+class WorkoutLogBatchItemResult(BaseModel):
+    index: int
+    idempotency_key: Optional[str] = None
+    status: str
+    id: Optional[str] = None
+
+class WorkoutLogBatchResponse(BaseModel):
+    created: int
+    duplicates: int
+    results: List[WorkoutLogBatchItemResult]
 
 class UserStatusRequest(BaseModel):
     status: Dict[str, Any]
@@ -40,6 +85,23 @@ class NotificationResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class NotificationPage(BaseModel):
+    items: List[NotificationResponse]
+    next_cursor: Optional[str] = None
+
+class UnreadCountResponse(BaseModel):
+    unread_count: int
+
+class NotificationBulkReadRequest(BaseModel):
+    ids: Optional[List[UUID]] = Field(default=None, min_length=1, max_length=500)
+    all_before: Optional[datetime] = None
+
+    @model_validator(mode="after")
+    def check_selector(self):
+        if (self.ids is None) == (self.all_before is None):
+            raise ValueError("Provide exactly one of ids or all_before")
+        return self
+
 class GoalRequest(BaseModel):
     type: GoalType
     name: str
@@ -81,4 +143,80 @@ class GoalResponse(BaseModel):
     updated_at: datetime
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class ExerciseResponse(BaseModel):
+    id: int | str
+    name: str
+    muscle_group: str
+    equipment: Optional[str] = None
+    difficulty: Optional[str] = None
+    custom: bool = False
+
+class ProgressionPoint(BaseModel):
+    date: datetime
+    sessions: int
+    max_weight: float
+    total_reps: float
+    volume: float
+    estimated_1rm: float
+
+class ExerciseProgression(BaseModel):
+    exercise_id: str
+    period: ProgressionPeriod
+    points: List[ProgressionPoint]
+
+class DashboardProfile(BaseModel):
+    id: str
+    name: str = ""
+    email: Optional[str] = None
+    height: Optional[int] = None
+    sex: Optional[str] = None
+    weight_unit: Optional[str] = None
+    weekly_workout_goal: Optional[int] = None
+    notifications: Optional[Dict[str, Any]] = None
+    referral_code: Optional[str] = None
+    completed_referrals_count: Optional[int] = None
+    last_workout_date: Optional[datetime] = None
+
+class DashboardGoal(BaseModel):
+    id: str
+    type: str
+    name: str
+    target_value: float
+    current_value: float
+    unit: str
+    end_date: Optional[datetime] = None
+    exercise_id: Optional[str] = None
+
+class WorkoutLogSummary(BaseModel):
+    id: str
+    workout_id: Optional[str] = None
+    date: Optional[datetime] = None
+    exercise_count: int
+    set_count: int
+    total_volume: float
+
+class WeeklyProgress(BaseModel):
+    start_date: datetime
+    end_date: datetime
+    total_workouts: int
+    workout_days: int
+    total_volume: float
+    unique_exercises: int
+    weekly_workout_goal: int
+    consistency_percentage: int
+
+class DashboardResponse(BaseModel):
+    profile: Optional[DashboardProfile] = None
+    active_goals: List[DashboardGoal]
+    recent_logs: List[WorkoutLogSummary]
+    unread_notifications: int
+    weekly_progress: WeeklyProgress
+
+class ActivityStatsResponse(BaseModel):
+    current_streak: int = 0
+    streak_start: Optional[date] = None
+    last_workout_day: Optional[date] = None
+    week_start: date
+    week_workout_days: int = 0
@@ -1,8 +1,18 @@
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from starlette.concurrency import run_in_threadpool
 from supabase import Client
+from typing import Optional, Tuple
+import hashlib
 import os
+import time
+import jwt
 from dotenv import load_dotenv
+from .cache import TTLCache
+from .log import get_logger
+from .metrics import AUTH_VERIFICATION_DURATION
+
+logger = get_logger(__name__)
 
 load_dotenv()
 
@@ -12,31 +22,147 @@ SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
     raise ValueError("Supabase URL and Service Role Key must be set in .env file")
 
+# Token verification settings
+# "remote" asks Supabase Auth about every uncached token, "local" checks the
+# JWT signature and claims in-process and only falls back to Supabase when no
+# key is available for the token.
+AUTH_VERIFY_MODE = os.getenv("AUTH_VERIFY_MODE", "remote")
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+SUPABASE_JWKS_URL = os.getenv("SUPABASE_JWKS_URL", f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json")
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+AUTH_TOKEN_CACHE_TTL = float(os.getenv("AUTH_TOKEN_CACHE_TTL", "300"))
+
+SYMMETRIC_ALGORITHMS = {"HS256"}
+ASYMMETRIC_ALGORITHMS = {"RS256", "ES256"}
+
 from supabase import create_client
 supabase_auth: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
 
 security = HTTPBearer()
 
+# Verified tokens, keyed by a digest of the token and expiring no later than the token itself
+token_cache = TTLCache(maxsize=AUTH_TOKEN_CACHE_SIZE, ttl=AUTH_TOKEN_CACHE_TTL)
+
+_jwks_client = None
+
+
+class LocalVerificationUnavailable(Exception):
+    """
+    Raised when a token cannot be checked locally and must be verified remotely.
+    """
+
+
+def _get_jwks_client() -> jwt.PyJWKClient:
+    global _jwks_client
+    if _jwks_client is None:
+        _jwks_client = jwt.PyJWKClient(SUPABASE_JWKS_URL, cache_keys=True, lifespan=600)
+    return _jwks_client
+
+
+def _token_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+def cached_user_id(token: str) -> Optional[str]:
+    """
+    User ID of a token already verified and still cached, without verifying it.
+    """
+    return token_cache.get(_token_key(token))
+
+
+def verify_token_locally(token: str) -> Tuple[str, float]:
+    """
+    Verify a Supabase JWT in-process and return its user ID and expiry.
+
+    Raises jwt.InvalidTokenError for tokens that are definitely invalid and
+    LocalVerificationUnavailable when no signing key is available for the token.
+    """
+    algorithm = jwt.get_unverified_header(token).get("alg")
+
+    if algorithm in SYMMETRIC_ALGORITHMS:
+        if not SUPABASE_JWT_SECRET:
+            raise LocalVerificationUnavailable("SUPABASE_JWT_SECRET is not configured")
+        key = SUPABASE_JWT_SECRET
+    elif algorithm in ASYMMETRIC_ALGORITHMS:
+        try:
+            key = _get_jwks_client().get_signing_key_from_jwt(token).key
+        except jwt.PyJWKClientError as e:
+            raise LocalVerificationUnavailable(str(e))
+    else:
+        raise jwt.InvalidAlgorithmError(f"Unsupported token algorithm: {algorithm}")
+
+    claims = jwt.decode(
+        token,
+        key,
+        algorithms=[algorithm],
+        audience=SUPABASE_JWT_AUDIENCE,
+        options={"require": ["exp", "sub", "aud"]},
+    )
+    return claims["sub"], float(claims["exp"])
+
+
+def verify_token_remotely(token: str) -> Tuple[str, float]:
+    """
+    Verify a token with Supabase Auth and return its user ID and expiry.
+    """
+    response = supabase_auth.auth.get_user(token)
+    if not response or not response.user:
+        raise jwt.InvalidTokenError("Supabase Auth rejected the token")
+
+    # The token has just been accepted by Supabase, so its claims can be trusted
+    claims = jwt.decode(token, options={"verify_signature": False})
+    return response.user.id, float(claims.get("exp", time.time() + AUTH_TOKEN_CACHE_TTL))
+
+
+def verify_token(token: str) -> str:
+    """
+    Resolve a bearer token to a user ID, using the verified-token cache first.
+    """
+    cache_key = _token_key(token)
+    user_id = token_cache.get(cache_key)
+    if user_id is not None:
+        return user_id
+
+    method = AUTH_VERIFY_MODE
+    started = time.perf_counter()
+    try:
+        if AUTH_VERIFY_MODE == "local":
+            try:
+                user_id, expires_at = verify_token_locally(token)
+            except LocalVerificationUnavailable as e:
+                logger.warning(f"Local token verification unavailable, falling back to Supabase Auth: {e}")
+                method = "remote"
+                user_id, expires_at = verify_token_remotely(token)
+        else:
+            user_id, expires_at = verify_token_remotely(token)
+    except Exception:
+        AUTH_VERIFICATION_DURATION.labels(method, "rejected").observe(time.perf_counter() - started)
+        raise
+    AUTH_VERIFICATION_DURATION.labels(method, "ok").observe(time.perf_counter() - started)
+
+    token_cache.set(cache_key, user_id, ttl=expires_at - time.time())
+    return user_id
+
+
 async def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
     """
     Extract and validate the user ID from the Supabase JWT token.
     """
+    token = credentials.credentials
+    started = time.perf_counter()
+    user_id = token_cache.get(_token_key(token))
+    if user_id is not None:
+        AUTH_VERIFICATION_DURATION.labels("cache", "ok").observe(time.perf_counter() - started)
+        return user_id
+
     try:
-        # Verify the JWT token with Supabase
-        response = supabase_auth.auth.get_user(credentials.credentials)
-        
-        if response.user:
-            return response.user.id
-        else:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication token",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
+        # Remote verification uses the blocking Supabase client, so keep it off the event loop
+        return await run_in_threadpool(verify_token, token)
     except Exception as e:
-        print(f"Authentication error: {e}")
+        logger.warning(f"Authentication error: {e}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,89 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import os
+from dotenv import load_dotenv
+from .metrics import REQUESTS_COALESCED
+
+load_dotenv()
+
+# Read endpoints whose identical concurrent GETs share one response, by path prefix
+COALESCE_PATH_PREFIXES = tuple(
+    prefix.strip().rstrip("/")
+    for prefix in os.getenv("COALESCE_PATH_PREFIXES", "/goals,/notifications,/dashboard,/activity").split(",")
+    if prefix.strip()
+)
+
+# The matched route and every response message of the request that did the work
+SharedResponse = Tuple[Any, List[Message]]
+
+
+class RequestCoalescingMiddleware:
+    """
+    Singleflight for hot reads: while a GET is being handled, identical GETs
+    wait for it and are sent a copy of its response instead of running
+    authentication and the database queries again.
+
+    Requests are identical when the path, query string, Authorization and
+    If-None-Match headers all match, so a response is only ever shared with
+    a request made with the same credentials. If the first request fails,
+    the waiting ones are handled on their own.
+    """
+
+    def __init__(self, app: ASGIApp, prefixes: Tuple[str, ...] = COALESCE_PATH_PREFIXES):
+        self.app = app
+        self.prefixes = prefixes
+        self._in_flight: Dict[Tuple[Any, ...], "asyncio.Future[Optional[SharedResponse]]"] = {}
+
+    def _prefix(self, path: str) -> Optional[str]:
+        for prefix in self.prefixes:
+            if path == prefix or path.startswith(prefix + "/"):
+                return prefix
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        prefix = self._prefix(scope["path"]) if scope["type"] == "http" and scope["method"] == "GET" else None
+        headers = dict(scope.get("headers") or []) if prefix else {}
+        authorization = headers.get(b"authorization")
+        if not authorization:
+            await self.app(scope, receive, send)
+            return
+
+        key = (
+            scope["path"],
+            scope.get("query_string", b""),
+            hashlib.sha256(authorization).digest(),
+            headers.get(b"if-none-match"),
+        )
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            # Shielded so a waiting client disconnecting does not cancel the shared result
+            shared = await asyncio.shield(in_flight)
+            if shared is None:
+                await self.app(scope, receive, send)
+                return
+            REQUESTS_COALESCED.labels(prefix).inc()
+            route, messages = shared
+            if route is not None:
+                scope["route"] = route
+            for message in messages:
+                await send(dict(message, headers=list(message["headers"])) if "headers" in message else dict(message))
+            return
+
+        future: "asyncio.Future[Optional[SharedResponse]]" = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        messages: List[Message] = []
+
+        async def send_and_record(message: Message) -> None:
+            # Outer middleware add headers to the message they are given, so keep a clean copy
+            messages.append(dict(message, headers=list(message["headers"])) if "headers" in message else dict(message))
+            await send(message)
+
+        shared: Optional[SharedResponse] = None
+        try:
+            await self.app(scope, receive, send_and_record)
+            shared = (scope.get("route"), messages)
+        finally:
+            del self._in_flight[key]
+            future.set_result(shared)
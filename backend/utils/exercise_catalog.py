@@ -0,0 +1,240 @@
+from bisect import bisect_left
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import json
+import os
+import re
+import uuid
+from dotenv import load_dotenv
+from ..repositories import custom_exercises as custom_exercises_repo
+from .cache import TTLCache
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+load_dotenv()
+
+# The built-in catalog the frontend ships; override when the backend is deployed without src/
+EXERCISE_CATALOG_PATH = os.getenv(
+    "EXERCISE_CATALOG_PATH",
+    str(Path(__file__).resolve().parents[2] / "src" / "data" / "fitness_exercises.json"),
+)
+# Custom exercises are edited directly through Supabase, so cached copies simply expire
+CUSTOM_EXERCISE_CACHE_TTL = float(os.getenv("CUSTOM_EXERCISE_CACHE_TTL", "300"))
+CUSTOM_EXERCISE_CACHE_SIZE = int(os.getenv("CUSTOM_EXERCISE_CACHE_SIZE", "10000"))
+
+FACETS = ("muscle_group", "equipment", "difficulty")
+
+# Muscle group for exercises found in neither the built-in catalog nor custom exercises
+UNKNOWN_MUSCLE_GROUP = "Other"
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text: Any) -> str:
+    return _WHITESPACE.sub(" ", str(text or "")).strip().lower()
+
+
+def trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class ExerciseIndex:
+    """
+    Exercises indexed for search: name trigrams for substring queries,
+    sorted name words for short prefix queries, and one posting set per
+    muscle group, equipment and difficulty value.
+    """
+
+    def __init__(self, exercises: Iterable[Dict[str, Any]], custom: bool = False):
+        self.exercises: Dict[str, Dict[str, Any]] = {}
+        self._names: Dict[str, str] = {}
+        self._trigrams: Dict[str, Set[str]] = defaultdict(set)
+        self._facets: Dict[str, Dict[str, Set[str]]] = {facet: defaultdict(set) for facet in FACETS}
+        words: List[Tuple[str, str]] = []
+
+        for exercise in exercises:
+            key = str(exercise["id"])
+            name = normalize(exercise.get("name"))
+            self.exercises[key] = {
+                "id": exercise["id"],
+                "name": exercise.get("name") or "",
+                "muscle_group": exercise.get("muscle_group") or UNKNOWN_MUSCLE_GROUP,
+                "equipment": exercise.get("equipment"),
+                "difficulty": exercise.get("difficulty"),
+                "custom": custom,
+            }
+            self._names[key] = name
+            for trigram in trigrams(name):
+                self._trigrams[trigram].add(key)
+            words.extend((word, key) for word in name.split(" ") if word)
+            for facet in FACETS:
+                value = normalize(exercise.get(facet))
+                if value:
+                    self._facets[facet][value].add(key)
+        self._words = sorted(words)
+
+    def __len__(self) -> int:
+        return len(self.exercises)
+
+    def get(self, exercise_id: Any) -> Optional[Dict[str, Any]]:
+        return self.exercises.get(str(exercise_id))
+
+    def _name_matches(self, query: str) -> Set[str]:
+        if len(query) < 3:
+            # Too short for trigrams: match the start of any word in the name
+            matches = set()
+            start = bisect_left(self._words, (query, ""))
+            for word, key in self._words[start:]:
+                if not word.startswith(query):
+                    break
+                matches.add(key)
+            return matches
+
+        postings = sorted((self._trigrams.get(trigram, set()) for trigram in trigrams(query)), key=len)
+        candidates = set.intersection(*postings) if postings else set()
+        # Shared trigrams do not guarantee a substring match, so confirm each candidate
+        return {key for key in candidates if query in self._names[key]}
+
+    def search(self, query: Optional[str] = None, **filters: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Exercises whose name contains `query` (or has a word starting with it,
+        for one- and two-letter queries) and that match every facet filter,
+        best name matches first.
+        """
+        keys: Optional[Set[str]] = None
+        for facet in FACETS:
+            value = filters.get(facet)
+            if value:
+                matches = self._facets[facet].get(normalize(value), set())
+                keys = matches if keys is None else keys & matches
+
+        query = normalize(query)
+        if query:
+            matches = self._name_matches(query)
+            keys = matches if keys is None else keys & matches
+        if keys is None:
+            keys = set(self.exercises)
+
+        def rank(key: str) -> Tuple[int, str]:
+            name = self._names[key]
+            if not query:
+                return 0, name
+            if name == query:
+                return 0, name
+            if name.startswith(query):
+                return 1, name
+            if f" {query}" in name:
+                return 2, name
+            return 3, name
+
+        return [self.exercises[key] for key in sorted(keys, key=rank)]
+
+
+_builtin_catalog: Optional[ExerciseIndex] = None
+
+custom_exercise_cache = TTLCache(maxsize=CUSTOM_EXERCISE_CACHE_SIZE, ttl=CUSTOM_EXERCISE_CACHE_TTL)
+
+
+def load_builtin_catalog(path: str = EXERCISE_CATALOG_PATH) -> ExerciseIndex:
+    """
+    Load and index the built-in exercise catalog; called once at startup.
+    """
+    global _builtin_catalog
+    try:
+        with open(path) as catalog_file:
+            exercises = json.load(catalog_file)
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not load the exercise catalog from {path}: {e}")
+        exercises = []
+    _builtin_catalog = ExerciseIndex(exercises)
+    logger.info(f"Loaded {len(_builtin_catalog)} built-in exercises")
+    return _builtin_catalog
+
+
+def builtin_catalog() -> ExerciseIndex:
+    return _builtin_catalog if _builtin_catalog is not None else load_builtin_catalog()
+
+
+async def custom_catalog(user_id: str) -> ExerciseIndex:
+    """
+    Index of a user's custom exercises, cached for CUSTOM_EXERCISE_CACHE_TTL.
+    """
+    index = custom_exercise_cache.get(user_id)
+    if index is None:
+        index = ExerciseIndex(await custom_exercises_repo.list_custom_exercises(user_id), custom=True)
+        custom_exercise_cache.set(user_id, index)
+    return index
+
+
+async def search_exercises(user_id: str, query: Optional[str] = None, limit: int = 50, **filters: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    Search the built-in catalog merged with the user's custom exercises.
+
+    If custom exercises cannot be loaded the built-in results are still returned.
+    """
+    results = builtin_catalog().search(query, **filters)
+    try:
+        custom = (await custom_catalog(user_id)).search(query, **filters)
+    except Exception as e:
+        logger.error(f"Error loading custom exercises for user {user_id}: {e}")
+        custom = []
+    # Custom exercises first: a user searching is more likely after their own
+    return (custom + results)[:limit]
+
+
+async def exercise_names(user_id: str, exercise_ids: Iterable[str]) -> Dict[str, str]:
+    """
+    Display names for exercise ids, from the built-in catalog or the user's
+    custom exercises; ids that resolve to neither are left out.
+    """
+    catalog = builtin_catalog()
+    names, missing = {}, []
+    for exercise_id in exercise_ids:
+        exercise = catalog.get(exercise_id)
+        if exercise is None:
+            missing.append(exercise_id)
+        else:
+            names[str(exercise_id)] = exercise["name"]
+    if missing:
+        try:
+            custom = await custom_catalog(user_id)
+        except Exception as e:
+            logger.error(f"Error loading custom exercises for user {user_id}: {e}")
+            return names
+        for exercise_id in missing:
+            exercise = custom.get(exercise_id)
+            if exercise is not None:
+                names[str(exercise_id)] = exercise["name"]
+    return names
+
+
+async def load_custom_exercises(exercise_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Resolve ids that are not built-in exercises to custom exercises, in one query.
+    """
+    catalog = builtin_catalog()
+    ids = set()
+    for exercise_id in exercise_ids:
+        if catalog.get(exercise_id) is not None:
+            continue
+        try:
+            ids.add(str(uuid.UUID(str(exercise_id))))
+        except ValueError:
+            continue
+    rows = await custom_exercises_repo.get_custom_exercises(sorted(ids))
+    return {str(row["id"]): row for row in rows}
+
+
+def muscle_group_volumes(exercise_volumes: Dict[str, Any], custom: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, float]:
+    """
+    Roll per-exercise volume up into volume per muscle group.
+    """
+    catalog = builtin_catalog()
+    custom = custom or {}
+    volumes: Dict[str, float] = defaultdict(float)
+    for exercise_id, volume in (exercise_volumes or {}).items():
+        exercise = catalog.get(exercise_id) or custom.get(str(exercise_id)) or {}
+        volumes[exercise.get("muscle_group") or UNKNOWN_MUSCLE_GROUP] += float(volume or 0)
+    return {group: round(volume, 2) for group, volume in sorted(volumes.items())}
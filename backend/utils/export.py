@@ -0,0 +1,49 @@
+from typing import Any, AsyncIterator, Dict, Iterable, List
+import csv
+import io
+import orjson
+
+# Column order of exported rows; also the CSV header
+EXPORT_COLUMNS = [
+    "workout_log_id",
+    "workout_id",
+    "date",
+    "exercise_index",
+    "exercise_id",
+    "set_index",
+    "weight",
+    "reps",
+    "rpe",
+    "duration_seconds",
+]
+
+
+def encode_ndjson(rows: Iterable[Dict[str, Any]]) -> bytes:
+    return b"".join(orjson.dumps(row) + b"\n" for row in rows)
+
+
+def encode_csv(rows: Iterable[Dict[str, Any]], header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction="ignore", lineterminator="\n")
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def encode_export(pages: AsyncIterator[List[Dict[str, Any]]], export_format: str) -> AsyncIterator[bytes]:
+    """
+    Encode pages of flat rows as one chunk per page, so only a single page
+    is ever held in memory.
+    """
+    first = True
+    async for rows in pages:
+        if export_format == "csv":
+            chunk = encode_csv(rows, header=first)
+        else:
+            chunk = encode_ndjson(rows)
+        first = False
+        if chunk:
+            yield chunk
+    if first and export_format == "csv":
+        yield encode_csv([], header=True)
@@ -0,0 +1,151 @@
+from dataclasses import dataclass, field, asdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import random
+import time
+from .log import get_logger
+
+logger = get_logger(__name__)
+
+# Fetches the chunk after a keyset cursor and returns its rows and the cursor of its last row
+FetchChunk = Callable[[Optional[str]], Awaitable[Tuple[List[Any], Optional[str]]]]
+# Processes one chunk and returns counters to add to the job totals
+ProcessChunk = Callable[[List[Any]], Awaitable[Dict[str, int]]]
+
+
+@dataclass
+class ChunkTiming:
+    index: int
+    size: int
+    seconds: float = 0.0
+    attempts: int = 0
+    error: Optional[str] = None
+
+
+@dataclass
+class JobReport:
+    totals: Dict[str, int] = field(default_factory=dict)
+    chunks: List[ChunkTiming] = field(default_factory=list)
+    resumed_from: Optional[str] = None
+    checkpoint: Optional[str] = None
+    failed_chunks: int = 0
+
+    def as_stats(self) -> Dict[str, Any]:
+        """
+        Flatten the report into the stats dict returned by scheduled jobs.
+        """
+        return {
+            **self.totals,
+            "chunks_processed": len(self.chunks),
+            "failed_chunks": self.failed_chunks,
+            "resumed_from": self.resumed_from,
+            "chunk_timings": [asdict(chunk) for chunk in self.chunks],
+        }
+
+
+async def with_retries(operation: Callable[[], Awaitable[Any]], max_retries: int, backoff_seconds: float) -> Tuple[Any, int]:
+    """
+    Await operation, retrying with exponential backoff and jitter.
+
+    Returns the result and the number of attempts made; re-raises the last
+    error once max_retries retries are exhausted.
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return await operation(), attempt
+        except Exception:
+            if attempt > max_retries:
+                raise
+            delay = backoff_seconds * (2 ** (attempt - 1))
+            await asyncio.sleep(delay + random.uniform(0, delay / 2))
+
+
+async def run_chunked(
+    fetch_chunk: FetchChunk,
+    process_chunk: ProcessChunk,
+    chunk_size: Optional[int] = None,
+    concurrency: int = 4,
+    max_retries: int = 3,
+    backoff_seconds: float = 1.0,
+    load_checkpoint: Optional[Callable[[], Awaitable[Optional[str]]]] = None,
+    save_checkpoint: Optional[Callable[[str], Awaitable[None]]] = None,
+) -> JobReport:
+    """
+    Walk a keyset-paginated source chunk by chunk, processing up to
+    `concurrency` chunks at once.
+
+    Chunks are fetched in order while earlier ones are still being processed;
+    a chunk shorter than `chunk_size` is taken to be the last one.
+    Failed chunks are retried with backoff. The checkpoint only advances past
+    a chunk once it and every chunk before it have succeeded, so a resumed
+    run never skips work, though chunks after a failed one may be repeated.
+    """
+    report = JobReport()
+    semaphore = asyncio.Semaphore(concurrency)
+    # index -> end cursor of each finished chunk, or None if it failed
+    finished: Dict[int, Optional[str]] = {}
+    next_to_checkpoint = 0
+    checkpoint_lock = asyncio.Lock()
+
+    cursor = await load_checkpoint() if load_checkpoint else None
+    report.resumed_from = cursor
+    report.checkpoint = cursor
+
+    async def advance_checkpoint():
+        nonlocal next_to_checkpoint
+        async with checkpoint_lock:
+            new_checkpoint = None
+            while next_to_checkpoint in finished and finished[next_to_checkpoint] is not None:
+                new_checkpoint = finished.pop(next_to_checkpoint)
+                next_to_checkpoint += 1
+            if new_checkpoint is not None:
+                report.checkpoint = new_checkpoint
+                if save_checkpoint:
+                    try:
+                        await save_checkpoint(new_checkpoint)
+                    except Exception as e:
+                        logger.error(f"Could not save job checkpoint {new_checkpoint}: {e}")
+
+    async def run_one(timing: ChunkTiming, rows: List[Any], end_cursor: Optional[str]):
+        try:
+            started = time.perf_counter()
+            try:
+                counters, timing.attempts = await with_retries(lambda: process_chunk(rows), max_retries, backoff_seconds)
+                for name, value in counters.items():
+                    report.totals[name] = report.totals.get(name, 0) + value
+                finished[timing.index] = end_cursor
+            except Exception as e:
+                timing.attempts = max_retries + 1
+                timing.error = str(e)
+                report.failed_chunks += 1
+                finished[timing.index] = None
+                logger.error(f"Chunk {timing.index} failed after {timing.attempts} attempts: {e}")
+            timing.seconds = round(time.perf_counter() - started, 4)
+            await advance_checkpoint()
+        finally:
+            semaphore.release()
+
+    tasks = []
+    index = 0
+    try:
+        while True:
+            (rows, end_cursor), _ = await with_retries(lambda: fetch_chunk(cursor), max_retries, backoff_seconds)
+            if not rows:
+                break
+
+            timing = ChunkTiming(index=index, size=len(rows))
+            report.chunks.append(timing)
+            await semaphore.acquire()
+            tasks.append(asyncio.create_task(run_one(timing, rows, end_cursor)))
+
+            cursor = end_cursor
+            index += 1
+            if chunk_size is not None and len(rows) < chunk_size:
+                break
+    finally:
+        # Let chunks already in flight finish and checkpoint even if fetching failed
+        await asyncio.gather(*tasks)
+
+    return report
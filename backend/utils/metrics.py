@@ -0,0 +1,145 @@
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Any, Dict
+import os
+import time
+import uuid
+from .log import get_logger, request_id_var
+
+logger = get_logger(__name__)
+
+# Set PROMETHEUS_MULTIPROC_DIR when running several workers (e.g. under gunicorn)
+# so /metrics aggregates every worker instead of whichever one answered.
+PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# Latency buckets in seconds, from a cached read up to a slow PostgREST call
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+JOB_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "fitrek_http_request_duration_seconds",
+    "Time spent handling HTTP requests, by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_CALLS = Counter(
+    "fitrek_db_calls_total",
+    "Supabase (PostgREST) calls, by table and operation",
+    ["table", "operation", "outcome"],
+)
+DB_CALL_DURATION = Histogram(
+    "fitrek_db_call_duration_seconds",
+    "Supabase (PostgREST) call latency, by table and operation",
+    ["table", "operation"],
+    buckets=LATENCY_BUCKETS,
+)
+AUTH_VERIFICATION_DURATION = Histogram(
+    "fitrek_auth_verification_duration_seconds",
+    "Time spent resolving a bearer token to a user id",
+    ["method", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_COALESCED = Counter(
+    "fitrek_requests_coalesced_total",
+    "Requests answered with the response of an identical request already in flight, by path prefix",
+    ["prefix"],
+)
+REQUESTS_THROTTLED = Counter(
+    "fitrek_requests_throttled_total",
+    "Requests rejected with 429 by the rate limiter, by the limit they exceeded",
+    ["limit"],
+)
+JOB_RUN_DURATION = Histogram(
+    "fitrek_job_run_duration_seconds",
+    "Duration of scheduled job runs",
+    ["job"],
+    buckets=JOB_BUCKETS,
+)
+JOB_RUNS = Counter("fitrek_job_runs_total", "Scheduled job runs, by outcome", ["job", "outcome"])
+JOB_USERS_PROCESSED = Counter("fitrek_job_users_processed_total", "Users processed by scheduled jobs", ["job"])
+JOB_ERRORS = Counter("fitrek_job_errors_total", "Errors (failed users, chunks or runs) in scheduled jobs", ["job"])
+JOB_LAST_RUN_USERS = Gauge(
+    "fitrek_job_last_run_users", "Users processed by the latest run of each job", ["job"], multiprocess_mode="mostrecent"
+)
+JOB_LAST_RUN_ERRORS = Gauge(
+    "fitrek_job_last_run_errors", "Errors in the latest run of each job", ["job"], multiprocess_mode="mostrecent"
+)
+
+
+def record_job_run(job_name: str, seconds: float, stats: Dict[str, Any]) -> None:
+    """
+    Record one run of a scheduled job from the stats dict it returned.
+    """
+    stats = stats or {}
+    users = int(stats.get("users_processed", 0))
+    errors = int(stats.get("errors", 0)) + int(stats.get("failed_chunks", 0)) + (1 if stats.get("error") else 0)
+    JOB_RUN_DURATION.labels(job_name).observe(seconds)
+    JOB_RUNS.labels(job_name, "error" if errors else "ok").inc()
+    JOB_USERS_PROCESSED.labels(job_name).inc(users)
+    JOB_ERRORS.labels(job_name).inc(errors)
+    JOB_LAST_RUN_USERS.labels(job_name).set(users)
+    JOB_LAST_RUN_ERRORS.labels(job_name).set(errors)
+
+
+def metrics_response() -> Response:
+    """
+    Render every metric in the Prometheus text exposition format.
+    """
+    if PROMETHEUS_MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+class RequestMetricsMiddleware:
+    """
+    Time every HTTP request by route template, tag it with a request id
+    (taken from X-Request-ID or generated) and write one JSON access log line.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        request_id = headers.get(b"x-request-id", b"").decode("latin-1")[:128] or uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_request_id(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            seconds = time.perf_counter() - started
+            route = scope.get("route")
+            # Label by template (/goals/{goal_id}) rather than raw path to bound cardinality
+            route_label = getattr(route, "path", None) or "unmatched"
+            if route_label != "/metrics":
+                HTTP_REQUEST_DURATION.labels(scope["method"], route_label, str(status_code)).observe(seconds)
+            logger.info(
+                "request finished",
+                extra={
+                    "method": scope["method"],
+                    "route": route_label,
+                    "path": scope["path"],
+                    "status": status_code,
+                    "duration_ms": round(seconds * 1000, 2),
+                },
+            )
+            request_id_var.reset(token)
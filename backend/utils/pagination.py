@@ -0,0 +1,31 @@
+from typing import Any, Tuple
+import base64
+import json
+
+
+class InvalidCursor(ValueError):
+    """
+    Raised when a client-supplied pagination cursor cannot be decoded.
+    """
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Pack keyset values into an opaque, URL-safe cursor string.
+    """
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> Tuple[Any, ...]:
+    """
+    Unpack a cursor produced by encode_cursor, checking it holds `size` values.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Malformed cursor: {e}")
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursor("Malformed cursor")
+    return tuple(values)
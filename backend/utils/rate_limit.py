@@ -0,0 +1,122 @@
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from typing import Callable, Hashable, Optional, Tuple
+import hashlib
+import math
+import os
+import time
+from dotenv import load_dotenv
+from .auth import cached_user_id
+from .cache import TTLCache
+from .metrics import REQUESTS_THROTTLED
+
+load_dotenv()
+
+# Token bucket rate limits, per worker: a client may burst up to *_BURST
+# requests, then is held to *_RATE requests per second. A rate of 0 turns the
+# limit off. Run uvicorn with --proxy-headers behind a proxy so the client
+# address is the caller's rather than the proxy's.
+RATE_LIMIT_USER_RATE = float(os.getenv("RATE_LIMIT_USER_RATE", "10"))
+RATE_LIMIT_USER_BURST = int(os.getenv("RATE_LIMIT_USER_BURST", "40"))
+RATE_LIMIT_IP_RATE = float(os.getenv("RATE_LIMIT_IP_RATE", "50"))
+RATE_LIMIT_IP_BURST = int(os.getenv("RATE_LIMIT_IP_BURST", "200"))
+# Clients tracked per limit; the least recently seen are forgotten first
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000"))
+
+# Health checks and metric scrapes are never limited
+EXEMPT_PATHS = frozenset({"/", "/metrics"})
+
+
+class TokenBucketLimiter:
+    """
+    One token bucket per key, holding up to `burst` tokens and refilling at
+    `rate` tokens per second; each request takes a token.
+    """
+
+    def __init__(self, rate: float, burst: int, maxsize: int = RATE_LIMIT_MAX_CLIENTS, timer: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self._timer = timer
+        # A bucket idle long enough to refill is the same as a new one, so it can expire
+        self._buckets = TTLCache(maxsize=maxsize, ttl=burst / rate, timer=timer)
+
+    def acquire(self, key: Hashable) -> float:
+        """
+        Take a token for `key`. Returns 0 when granted, otherwise the seconds
+        until a token will be available.
+        """
+        now = self._timer()
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens < 1:
+            self._buckets.set(key, (tokens, now))
+            return (1 - tokens) / self.rate
+        self._buckets.set(key, (tokens - 1, now))
+        return 0.0
+
+
+def make_limiter(rate: float, burst: int) -> Optional[TokenBucketLimiter]:
+    return TokenBucketLimiter(rate, max(burst, 1)) if rate > 0 else None
+
+
+def user_key(scope: Scope) -> Optional[str]:
+    """
+    Rate limit key for the caller's credentials: the user once their token
+    has been verified, so all of a user's tokens share one bucket, and the
+    token itself before that. Unverified tokens never count against a user.
+    """
+    authorization = dict(scope.get("headers") or []).get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    user_id = cached_user_id(token)
+    return f"user:{user_id}" if user_id else f"token:{hashlib.sha256(token.encode()).hexdigest()}"
+
+
+class RateLimitMiddleware:
+    """
+    Reject requests over the per-IP or per-user token bucket with 429 and a
+    Retry-After header, before they reach authentication or the database.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        user_limiter: Optional[TokenBucketLimiter] = None,
+        ip_limiter: Optional[TokenBucketLimiter] = None,
+    ):
+        self.app = app
+        self.user_limiter = user_limiter if user_limiter is not None else make_limiter(RATE_LIMIT_USER_RATE, RATE_LIMIT_USER_BURST)
+        self.ip_limiter = ip_limiter if ip_limiter is not None else make_limiter(RATE_LIMIT_IP_RATE, RATE_LIMIT_IP_BURST)
+
+    def _check(self, scope: Scope) -> Tuple[Optional[str], float]:
+        if self.ip_limiter is not None:
+            client = scope.get("client")
+            wait = self.ip_limiter.acquire(client[0] if client else "unknown")
+            if wait:
+                return "ip", wait
+        if self.user_limiter is not None:
+            key = user_key(scope)
+            if key is not None:
+                wait = self.user_limiter.acquire(key)
+                if wait:
+                    return "user", wait
+        return None, 0.0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        limit, wait = self._check(scope)
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        REQUESTS_THROTTLED.labels(limit).inc()
+        response = JSONResponse(
+            {"detail": "Too many requests"},
+            status_code=429,
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+        await response(scope, receive, send)
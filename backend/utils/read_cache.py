@@ -0,0 +1,269 @@
+from abc import ABC, abstractmethod
+from fastapi import Request, Response
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+import hashlib
+import orjson
+import os
+import uuid
+from dotenv import load_dotenv
+from .cache import TTLCache
+from .log import get_logger
+from .serialization import dumps
+
+logger = get_logger(__name__)
+
+load_dotenv()
+
+# Per-user read cache settings
+# READ_CACHE_BACKEND is "local" (this process only), "memory" (an in-process
+# stand-in for a shared store, for development) or "redis" (shared between
+# workers and the scheduler process; needs the redis package and REDIS_URL).
+READ_CACHE_BACKEND = os.getenv("READ_CACHE_BACKEND", "local")
+READ_CACHE_SIZE = int(os.getenv("READ_CACHE_SIZE", "10000"))
+READ_CACHE_TTL = float(os.getenv("READ_CACHE_TTL", "30"))
+REDIS_URL = os.getenv("REDIS_URL")
+# The dashboard also shows data the API is not told about when it changes
+# (profile edits go straight to Supabase), so it is only cached briefly
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", "10"))
+
+# Cached resources
+GOALS = "goals"
+NOTIFICATIONS = "notifications"
+DASHBOARD = "dashboard"
+ACTIVITY = "activity"
+
+# Resources built from other resources, invalidated along with them
+DEPENDENT_RESOURCES: Dict[str, Tuple[str, ...]] = {
+    GOALS: (DASHBOARD,),
+    NOTIFICATIONS: (DASHBOARD,),
+}
+
+# Bumped when the entry layout changes so workers never read another version's entries
+ENTRY_FORMAT = "v2"
+
+# Generations outlive the entries stamped with them so entries are never orphaned early
+GENERATION_TTL_FACTOR = 10
+
+
+class SharedCacheBackend(ABC):
+    """
+    Key-value store shared between processes. Values are JSON strings.
+
+    Backends implement get and set; set_many may be overridden to write in
+    one round trip.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        ...
+
+    async def set_many(self, values: Dict[str, str], ttl: float) -> None:
+        for key, value in values.items():
+            await self.set(key, value, ttl)
+
+
+class InMemoryBackend(SharedCacheBackend):
+    """
+    Stand-in for a shared store that keeps everything in this process.
+    """
+
+    def __init__(self, maxsize: int = 100000):
+        self._data = TTLCache(maxsize=maxsize, ttl=float("inf"))
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._data.get(key)
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        self._data.set(key, value, ttl=ttl)
+
+
+class RedisBackend(SharedCacheBackend):
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("READ_CACHE_BACKEND=redis requires the redis package")
+        self._redis = redis.from_url(url, decode_responses=True)
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._redis.get(key)
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        await self._redis.set(key, value, px=int(ttl * 1000))
+
+    async def set_many(self, values: Dict[str, str], ttl: float) -> None:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for key, value in values.items():
+                pipe.set(key, value, px=int(ttl * 1000))
+            await pipe.execute()
+
+
+class ReadCache:
+    """
+    Cache of API read responses keyed by user and resource.
+
+    Each (resource, user) pair has a generation token that is stamped into
+    the keys of its entries; invalidating replaces the token, which orphans
+    every cached variant (page, filter) of that resource at once. Entries are
+    kept in a local LRU and, when a shared backend is configured, in the
+    shared store too. With a shared backend the generation lives there, so a
+    write on any worker or in the scheduler process invalidates every
+    worker's local entries; without one, other processes' entries expire
+    after the TTL.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, shared: Optional[SharedCacheBackend] = None):
+        self.ttl = ttl
+        self.shared = shared
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generations = TTLCache(maxsize=maxsize, ttl=ttl * GENERATION_TTL_FACTOR)
+
+    @staticmethod
+    def _generation_key(resource: str, user_id: str) -> str:
+        return f"gen:{resource}:{user_id}"
+
+    async def _generation(self, resource: str, user_id: str) -> str:
+        key = self._generation_key(resource, user_id)
+        if self.shared is not None:
+            generation = await self.shared.get(key)
+            if generation is None:
+                generation = uuid.uuid4().hex
+                await self.shared.set(key, generation, self.ttl * GENERATION_TTL_FACTOR)
+            return generation
+
+        generation = self._generations.get(key)
+        if generation is None:
+            generation = uuid.uuid4().hex
+            self._generations.set(key, generation)
+        return generation
+
+    async def lookup(self, user_id: str, resource: str, variant: str = "") -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Return the entry key and the cached {"etag", "body"} entry, or None on a miss.
+        The body is the encoded JSON response.
+
+        Store a freshly loaded entry under the returned key: if the resource is
+        invalidated while it loads, the key belongs to the old generation and
+        the possibly stale entry is never served.
+        """
+        key = f"{ENTRY_FORMAT}:{resource}:{user_id}:{await self._generation(resource, user_id)}:{variant}"
+        entry = self._entries.get(key)
+        if entry is None and self.shared is not None:
+            raw = await self.shared.get(key)
+            if raw is not None:
+                entry = orjson.loads(raw)
+                self._entries.set(key, entry)
+        return key, entry
+
+    async def store(self, key: str, entry: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._entries.set(key, entry, ttl=ttl)
+        if self.shared is not None:
+            await self.shared.set(key, orjson.dumps(entry).decode(), ttl)
+
+    async def invalidate(self, user_id: str, resource: str) -> None:
+        await self.invalidate_many([user_id], resource)
+
+    async def invalidate_many(self, user_ids: Iterable[str], resource: str) -> None:
+        """
+        Drop every cached variant of a resource, and of the resources built
+        from it, for the given users.
+        """
+        resources = (resource, *DEPENDENT_RESOURCES.get(resource, ()))
+        generations = {
+            self._generation_key(name, user_id): uuid.uuid4().hex
+            for user_id in user_ids
+            for name in resources
+        }
+        if not generations:
+            return
+        if self.shared is not None:
+            await self.shared.set_many(generations, self.ttl * GENERATION_TTL_FACTOR)
+        else:
+            for key, generation in generations.items():
+                self._generations.set(key, generation)
+
+
+def _make_shared_backend() -> Optional[SharedCacheBackend]:
+    if READ_CACHE_BACKEND == "redis":
+        if not REDIS_URL:
+            raise ValueError("REDIS_URL must be set when READ_CACHE_BACKEND=redis")
+        return RedisBackend(REDIS_URL)
+    if READ_CACHE_BACKEND == "memory":
+        return InMemoryBackend()
+    return None
+
+
+read_cache = ReadCache(maxsize=READ_CACHE_SIZE, ttl=READ_CACHE_TTL, shared=_make_shared_backend())
+
+
+async def invalidate(user_id: str, resource: str) -> None:
+    """
+    Invalidate a user's cached resource, logging rather than raising on failure
+    so a cache outage never fails the write that triggered it.
+    """
+    await invalidate_many([user_id], resource)
+
+
+async def invalidate_many(user_ids: Iterable[str], resource: str) -> None:
+    try:
+        await read_cache.invalidate_many(user_ids, resource)
+    except Exception as e:
+        logger.error(f"Error invalidating cached {resource}: {e}")
+
+
+def compute_etag(body: bytes) -> str:
+    digest = hashlib.sha1(body).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {candidate.strip() for candidate in header.split(",")}
+    return "*" in candidates or etag in candidates or etag.removeprefix("W/") in candidates
+
+
+async def cached_json_response(
+    request: Request,
+    user_id: str,
+    resource: str,
+    variant: str,
+    load: Callable[[], Awaitable[Any]],
+    ttl: Optional[float] = None,
+) -> Response:
+    """
+    Serve a per-user read from the cache, loading and caching it on a miss.
+
+    `load` returns JSON-ready data (see utils.serialization.to_jsonable); it
+    is encoded once with orjson and the encoded body is what gets cached, so
+    a hit is served without re-encoding.
+
+    Responses carry an ETag; a request whose If-None-Match matches a cached
+    entry gets a 304 without touching the database. `ttl` shortens how long
+    this entry is kept, below READ_CACHE_TTL.
+    """
+    key, entry = None, None
+    try:
+        key, entry = await read_cache.lookup(user_id, resource, variant)
+    except Exception as e:
+        logger.error(f"Error reading cached {resource} for user {user_id}: {e}")
+
+    if entry is None:
+        body = dumps(await load())
+        entry = {"etag": compute_etag(body), "body": body.decode()}
+        try:
+            if key is not None:
+                await read_cache.store(key, entry, ttl=ttl)
+        except Exception as e:
+            logger.error(f"Error caching {resource} for user {user_id}: {e}")
+
+    headers = {"ETag": entry["etag"], "Cache-Control": "private, no-cache"}
+    if etag_matches(request, entry["etag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry["body"], media_type="application/json", headers=headers)
@@ -0,0 +1,36 @@
+from pydantic import TypeAdapter
+from typing import Any, Dict
+import orjson
+
+_adapters: Dict[Any, TypeAdapter] = {}
+
+
+def adapter_for(response_type: Any) -> TypeAdapter:
+    """
+    Return a cached TypeAdapter for a response type such as List[GoalResponse].
+
+    Building an adapter compiles a validator, so it is done once per type.
+    """
+    adapter = _adapters.get(response_type)
+    if adapter is None:
+        adapter = _adapters[response_type] = TypeAdapter(response_type)
+    return adapter
+
+
+def to_jsonable(response_type: Any, data: Any) -> Any:
+    """
+    Validate database rows against a response type in a single pass and
+    return JSON-ready data (datetimes and enums already converted).
+
+    Use this instead of building a model per row and handing the result to
+    FastAPI, which validates and serializes the whole list a second time.
+    """
+    adapter = adapter_for(response_type)
+    return adapter.dump_python(adapter.validate_python(data, from_attributes=True), mode="json")
+
+
+def dumps(data: Any) -> bytes:
+    """
+    Encode JSON-ready data with orjson.
+    """
+    return orjson.dumps(data)
@@ -0,0 +1,169 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+
+def _number(value: Any) -> float:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else 0.0
+
+
+def _optional_number(value: Any) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def estimate_one_rep_max(weight: float, reps: float) -> float:
+    """
+    Epley estimate of the one-rep max for a set.
+    """
+    if weight <= 0 or reps <= 0:
+        return 0.0
+    if reps == 1:
+        return weight
+    return weight * (1 + reps / 30)
+
+
+def summarize_exercises(exercises: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Reduce a workout log's exercises to one row of set metrics per exercise.
+
+    An exercise listed more than once in the same log is merged into one row.
+    """
+    summaries: Dict[str, Dict[str, Any]] = {}
+    for exercise in exercises:
+        if "exerciseId" not in exercise:
+            continue
+        exercise_id = str(exercise["exerciseId"])
+        summary = summaries.setdefault(exercise_id, {
+            "exercise_id": exercise_id,
+            "set_count": 0,
+            "max_weight": 0.0,
+            "total_reps": 0.0,
+            "volume": 0.0,
+            "estimated_1rm": 0.0,
+        })
+        for workout_set in exercise.get("sets") or []:
+            weight = _number(workout_set.get("weight"))
+            reps = _number(workout_set.get("reps"))
+            summary["set_count"] += 1
+            summary["max_weight"] = max(summary["max_weight"], weight)
+            summary["total_reps"] += reps
+            summary["volume"] += weight * reps
+            summary["estimated_1rm"] = max(summary["estimated_1rm"], estimate_one_rep_max(weight, reps))
+
+    for summary in summaries.values():
+        summary["total_reps"] = round(summary["total_reps"], 2)
+        summary["volume"] = round(summary["volume"], 2)
+        summary["estimated_1rm"] = round(summary["estimated_1rm"], 2)
+    return list(summaries.values())
+
+
+def goal_metrics(exercises: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Best single-set weight and reps per exercise, the inputs to goal progress.
+    """
+    metrics: Dict[str, Dict[str, Any]] = {}
+    for exercise in exercises:
+        if "exerciseId" not in exercise:
+            continue
+        exercise_id = str(exercise["exerciseId"])
+        metric = metrics.setdefault(exercise_id, {"exercise_id": exercise_id, "max_weight": 0.0, "max_reps": 0.0})
+        for workout_set in exercise.get("sets") or []:
+            metric["max_weight"] = max(metric["max_weight"], _number(workout_set.get("weight")))
+            metric["max_reps"] = max(metric["max_reps"], _number(workout_set.get("reps")))
+    return list(metrics.values())
+
+
+def record_candidates(exercises: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Per-exercise bests of a single log to check against the personal record
+    index: heaviest weight and the reps done with it, session volume, best
+    estimated 1RM and the most reps at each weight. One pass over the sets.
+    """
+    candidates: Dict[str, Dict[str, Any]] = {}
+    for exercise in exercises:
+        if "exerciseId" not in exercise:
+            continue
+        exercise_id = str(exercise["exerciseId"])
+        candidate = candidates.setdefault(exercise_id, {
+            "exercise_id": exercise_id,
+            "max_weight": 0.0,
+            "reps_at_max_weight": 0.0,
+            "volume": 0.0,
+            "estimated_1rm": 0.0,
+            "weights": {},
+        })
+        for workout_set in exercise.get("sets") or []:
+            weight = _number(workout_set.get("weight"))
+            reps = _number(workout_set.get("reps"))
+            if weight > candidate["max_weight"]:
+                candidate["max_weight"], candidate["reps_at_max_weight"] = weight, reps
+            elif weight == candidate["max_weight"]:
+                candidate["reps_at_max_weight"] = max(candidate["reps_at_max_weight"], reps)
+            candidate["volume"] += weight * reps
+            candidate["estimated_1rm"] = max(candidate["estimated_1rm"], estimate_one_rep_max(weight, reps))
+            if reps > 0:
+                candidate["weights"][weight] = max(candidate["weights"].get(weight, 0), reps)
+
+    for candidate in candidates.values():
+        candidate["volume"] = round(candidate["volume"], 2)
+        candidate["estimated_1rm"] = round(candidate["estimated_1rm"], 2)
+        candidate["weights"] = [{"weight": weight, "reps": reps} for weight, reps in candidate["weights"].items()]
+    return list(candidates.values())
+
+
+def set_rows(workout_log_id: str, user_id: str, date: str, exercises: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Flatten a workout log's exercises into one workout_sets row per set.
+
+    Rows are keyed by the exercise's and set's position in the log, so an
+    exercise listed twice keeps both entries.
+    """
+    rows = []
+    for exercise_index, exercise in enumerate(exercises):
+        if "exerciseId" not in exercise:
+            continue
+        for set_index, workout_set in enumerate(exercise.get("sets") or []):
+            rows.append({
+                "workout_log_id": workout_log_id,
+                "exercise_index": exercise_index,
+                "set_index": set_index,
+                "user_id": user_id,
+                "exercise_id": str(exercise["exerciseId"]),
+                "date": date,
+                "weight": _optional_number(workout_set.get("weight")),
+                "reps": _optional_number(workout_set.get("reps")),
+                "rpe": _optional_number(workout_set.get("rpe")),
+                "duration_seconds": _optional_number(workout_set.get("duration")),
+            })
+    return rows
+
+
+def flatten_log(log: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one flat row per set of a workout log, for exports.
+
+    An exercise without sets, or a log without exercises, still yields one
+    row with the missing fields empty so it is not lost from the export.
+    """
+    log_fields = {"workout_log_id": log["id"], "workout_id": log.get("workout_id"), "date": log.get("date")}
+    empty_set = {"set_index": None, "weight": None, "reps": None, "rpe": None, "duration_seconds": None}
+    exercises = log.get("exercises")
+    yielded = False
+    for exercise_index, exercise in enumerate(exercises if isinstance(exercises, list) else []):
+        if not isinstance(exercise, dict) or "exerciseId" not in exercise:
+            continue
+        base = {**log_fields, "exercise_index": exercise_index, "exercise_id": str(exercise["exerciseId"])}
+        sets = exercise.get("sets") if isinstance(exercise.get("sets"), list) else []
+        yielded = True
+        if not sets:
+            yield {**base, **empty_set}
+        for set_index, workout_set in enumerate(sets):
+            workout_set = workout_set if isinstance(workout_set, dict) else {}
+            yield {
+                **base,
+                "set_index": set_index,
+                "weight": _optional_number(workout_set.get("weight")),
+                "reps": _optional_number(workout_set.get("reps")),
+                "rpe": _optional_number(workout_set.get("rpe")),
+                "duration_seconds": _optional_number(workout_set.get("duration")),
+            }
+    if not yielded:
+        yield {**log_fields, "exercise_index": None, "exercise_id": None, **empty_set}
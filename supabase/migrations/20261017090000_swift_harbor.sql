@@ -0,0 +1,32 @@
+/*
+  # Bulk status flag updates for the daily check job
+
+  1. New Functions
+    - `merge_user_status_flags(p_updates jsonb)`
+      - Accepts an array of `{"id": uuid, "flags": jsonb}` objects
+      - Merges each patch into `users.user_status_flags` in one UPDATE
+      - Returns the number of users updated
+
+  2. Security
+    - Only the service role may execute the function
+*/
+
+CREATE OR REPLACE FUNCTION merge_user_status_flags(p_updates jsonb)
+RETURNS integer AS $$
+DECLARE
+  updated_count integer;
+BEGIN
+  UPDATE users u
+  SET user_status_flags = COALESCE(u.user_status_flags, '{}'::jsonb) || upd.flags
+  FROM jsonb_to_recordset(p_updates) AS upd(id uuid, flags jsonb)
+  WHERE u.id = upd.id;
+
+  GET DIAGNOSTICS updated_count = ROW_COUNT;
+  RETURN updated_count;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+REVOKE EXECUTE ON FUNCTION merge_user_status_flags(jsonb) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION merge_user_status_flags(jsonb) TO service_role;
+
+COMMENT ON FUNCTION merge_user_status_flags(jsonb) IS 'Bulk-merges per-user status flag patches; used by the daily check job';
@@ -0,0 +1,61 @@
+/*
+  # Server-side weekly workout aggregation
+
+  1. Indexes
+    - `idx_workout_logs_user_id_date` on `workout_logs (user_id, date)` for per-user date range scans
+
+  2. New Functions
+    - `weekly_workout_summaries(p_since timestamptz, p_after uuid, p_limit integer)`
+      - Returns one row per user for a page of users ordered by id, starting after `p_after`
+      - Aggregates workout count, total volume (weight x reps) and distinct exercises since `p_since`
+      - Users without workouts in the window are returned with zero totals
+
+  3. Security
+    - Only the service role may execute the function
+*/
+
+CREATE INDEX IF NOT EXISTS idx_workout_logs_user_id_date ON workout_logs (user_id, date);
+
+CREATE OR REPLACE FUNCTION weekly_workout_summaries(
+  p_since timestamptz,
+  p_after uuid DEFAULT NULL,
+  p_limit integer DEFAULT 1000
+)
+RETURNS TABLE (
+  user_id uuid,
+  total_workouts bigint,
+  total_volume numeric,
+  unique_exercises bigint
+) AS $$
+  WITH page AS (
+    SELECT u.id
+    FROM users u
+    WHERE p_after IS NULL OR u.id > p_after
+    ORDER BY u.id
+    LIMIT p_limit
+  )
+  SELECT
+    page.id AS user_id,
+    COUNT(DISTINCT wl.id) AS total_workouts,
+    COALESCE(SUM(
+      CASE WHEN jsonb_typeof(s.value->'weight') = 'number' THEN (s.value->>'weight')::numeric ELSE 0 END *
+      CASE WHEN jsonb_typeof(s.value->'reps') = 'number' THEN (s.value->>'reps')::numeric ELSE 0 END
+    ), 0) AS total_volume,
+    COUNT(DISTINCT e.value->>'exerciseId') AS unique_exercises
+  FROM page
+  LEFT JOIN workout_logs wl
+    ON wl.user_id = page.id AND wl.date >= p_since
+  LEFT JOIN LATERAL jsonb_array_elements(
+    CASE WHEN jsonb_typeof(wl.exercises) = 'array' THEN wl.exercises ELSE '[]'::jsonb END
+  ) AS e(value) ON true
+  LEFT JOIN LATERAL jsonb_array_elements(
+    CASE WHEN jsonb_typeof(e.value->'sets') = 'array' THEN e.value->'sets' ELSE '[]'::jsonb END
+  ) AS s(value) ON true
+  GROUP BY page.id
+  ORDER BY page.id;
+$$ LANGUAGE sql STABLE SECURITY DEFINER;
+
+REVOKE EXECUTE ON FUNCTION weekly_workout_summaries(timestamptz, uuid, integer) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION weekly_workout_summaries(timestamptz, uuid, integer) TO service_role;
+
+COMMENT ON FUNCTION weekly_workout_summaries(timestamptz, uuid, integer) IS 'Per-user workout totals for a page of users; used by the weekly summary job';
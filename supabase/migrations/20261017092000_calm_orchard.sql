@@ -0,0 +1,66 @@
+/*
+  # Notification retention
+
+  1. New Functions
+    - `prune_read_notifications(p_before timestamptz, p_batch_size integer)`
+      - Deletes up to `p_batch_size` read notifications created before `p_before`, oldest first
+      - Returns the number of rows deleted
+    - `collapse_weekly_summaries(p_keep integer, p_batch_size integer)`
+      - Deletes up to `p_batch_size` `weekly_summary` notifications that are older than
+        each user's `p_keep` most recent summaries
+      - Returns the number of rows deleted
+
+  2. Security
+    - Only the service role may execute the functions
+*/
+
+CREATE OR REPLACE FUNCTION prune_read_notifications(p_before timestamptz, p_batch_size integer)
+RETURNS integer AS $$
+DECLARE
+  deleted_count integer;
+BEGIN
+  DELETE FROM notifications
+  WHERE id IN (
+    SELECT n.id
+    FROM notifications n
+    WHERE n.is_read = true AND n.created_at < p_before
+    ORDER BY n.created_at
+    LIMIT p_batch_size
+  );
+
+  GET DIAGNOSTICS deleted_count = ROW_COUNT;
+  RETURN deleted_count;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE OR REPLACE FUNCTION collapse_weekly_summaries(p_keep integer, p_batch_size integer)
+RETURNS integer AS $$
+DECLARE
+  deleted_count integer;
+BEGIN
+  DELETE FROM notifications
+  WHERE id IN (
+    SELECT ranked.id
+    FROM (
+      SELECT
+        n.id,
+        row_number() OVER (PARTITION BY n.user_id ORDER BY n.created_at DESC, n.id DESC) AS position
+      FROM notifications n
+      WHERE n.type = 'weekly_summary'
+    ) ranked
+    WHERE ranked.position > p_keep
+    LIMIT p_batch_size
+  );
+
+  GET DIAGNOSTICS deleted_count = ROW_COUNT;
+  RETURN deleted_count;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+REVOKE EXECUTE ON FUNCTION prune_read_notifications(timestamptz, integer) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION collapse_weekly_summaries(integer, integer) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION prune_read_notifications(timestamptz, integer) TO service_role;
+GRANT EXECUTE ON FUNCTION collapse_weekly_summaries(integer, integer) TO service_role;
+
+COMMENT ON FUNCTION prune_read_notifications(timestamptz, integer) IS 'Deletes one batch of old read notifications; used by the notification retention job';
+COMMENT ON FUNCTION collapse_weekly_summaries(integer, integer) IS 'Deletes one batch of superseded weekly summaries; used by the notification retention job';
@@ -0,0 +1,60 @@
+/*
+  # Single-execution scheduled job runs
+
+  1. New Tables
+    - `scheduled_job_runs`
+      - `job_name` (text) and `run_key` (text, the scheduled minute) form the primary key
+      - `holder` (text, worker that claimed the run)
+      - `claimed_at` (timestamp)
+      - `lease_expires_at` (timestamp, after which an unfinished run may be taken over)
+      - `finished_at` (timestamp, nullable)
+      - `stats` (jsonb, counters reported by the job)
+
+  2. New Functions
+    - `claim_job_run(p_job_name, p_run_key, p_holder, p_lease_seconds)`
+      - Returns true for the first worker to claim a run, or for a worker taking over
+        an unfinished run whose lease has expired; false otherwise
+
+  3. Security
+    - RLS enabled with no policies, so only the service role can access the table
+    - Only the service role may execute the function
+*/
+
+CREATE TABLE IF NOT EXISTS scheduled_job_runs (
+  job_name text NOT NULL,
+  run_key text NOT NULL,
+  holder text NOT NULL,
+  claimed_at timestamptz NOT NULL DEFAULT now(),
+  lease_expires_at timestamptz NOT NULL,
+  finished_at timestamptz,
+  stats jsonb DEFAULT '{}'::jsonb,
+  PRIMARY KEY (job_name, run_key)
+);
+
+ALTER TABLE scheduled_job_runs ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION claim_job_run(
+  p_job_name text,
+  p_run_key text,
+  p_holder text,
+  p_lease_seconds integer
+)
+RETURNS boolean AS $$
+BEGIN
+  INSERT INTO scheduled_job_runs (job_name, run_key, holder, lease_expires_at)
+  VALUES (p_job_name, p_run_key, p_holder, now() + make_interval(secs => p_lease_seconds))
+  ON CONFLICT (job_name, run_key) DO UPDATE
+    SET holder = EXCLUDED.holder,
+        claimed_at = now(),
+        lease_expires_at = EXCLUDED.lease_expires_at
+    WHERE scheduled_job_runs.finished_at IS NULL
+      AND scheduled_job_runs.lease_expires_at < now();
+
+  RETURN FOUND;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+REVOKE EXECUTE ON FUNCTION claim_job_run(text, text, text, integer) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION claim_job_run(text, text, text, integer) TO service_role;
+
+COMMENT ON TABLE scheduled_job_runs IS 'One row per scheduled job fire; the row''s holder is the only worker that executes it';
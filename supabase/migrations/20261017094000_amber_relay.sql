@@ -0,0 +1,18 @@
+/*
+  # Checkpoints for scheduled job runs
+
+  1. Table Updates
+    - `scheduled_job_runs`:
+      - Add `checkpoint` (text, keyset cursor of the last contiguous chunk the run finished)
+
+  2. Indexes
+    - Partial index on unfinished runs for the stale-run recovery sweep
+*/
+
+ALTER TABLE scheduled_job_runs ADD COLUMN IF NOT EXISTS checkpoint text;
+
+CREATE INDEX IF NOT EXISTS idx_scheduled_job_runs_unfinished
+  ON scheduled_job_runs (lease_expires_at)
+  WHERE finished_at IS NULL;
+
+COMMENT ON COLUMN scheduled_job_runs.checkpoint IS 'Cursor a resumed run continues from; every chunk up to it has been processed';
@@ -0,0 +1,88 @@
+/*
+  # Per-exercise session statistics
+
+  1. New Tables
+    - `exercise_session_stats`
+      - One row per exercise per workout log, keyed by (`workout_log_id`, `exercise_id`)
+      - `user_id` (uuid), `exercise_id` (text), `date` (timestamp of the workout)
+      - `set_count`, `max_weight`, `total_reps`, `volume` (sum of weight x reps)
+      - `estimated_1rm` (best Epley estimate across the sets)
+      - Written by the API whenever a workout log is saved
+
+  2. Security
+    - Enable RLS; users can read their own rows
+
+  3. Performance
+    - Index on (user_id, exercise_id, date) for progression queries
+
+  4. Backfill
+    - Computes rows for every existing workout log from its `exercises` JSONB
+*/
+
+CREATE TABLE IF NOT EXISTS exercise_session_stats (
+  workout_log_id uuid REFERENCES workout_logs(id) ON DELETE CASCADE NOT NULL,
+  user_id uuid REFERENCES users(id) ON DELETE CASCADE NOT NULL,
+  exercise_id text NOT NULL,
+  date timestamptz NOT NULL,
+  set_count integer NOT NULL DEFAULT 0,
+  max_weight numeric NOT NULL DEFAULT 0,
+  total_reps numeric NOT NULL DEFAULT 0,
+  volume numeric NOT NULL DEFAULT 0,
+  estimated_1rm numeric NOT NULL DEFAULT 0,
+  PRIMARY KEY (workout_log_id, exercise_id)
+);
+
+ALTER TABLE exercise_session_stats ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can read own exercise session stats"
+  ON exercise_session_stats
+  FOR SELECT
+  TO authenticated
+  USING (auth.uid() = user_id);
+
+CREATE INDEX IF NOT EXISTS idx_exercise_session_stats_user_exercise_date
+  ON exercise_session_stats (user_id, exercise_id, date);
+
+-- Backfill from existing workout logs
+INSERT INTO exercise_session_stats (
+  workout_log_id, user_id, exercise_id, date, set_count, max_weight, total_reps, volume, estimated_1rm
+)
+SELECT
+  sets.workout_log_id,
+  sets.user_id,
+  sets.exercise_id,
+  sets.date,
+  COUNT(sets.weight),
+  COALESCE(MAX(sets.weight), 0),
+  COALESCE(SUM(sets.reps), 0),
+  ROUND(COALESCE(SUM(sets.weight * sets.reps), 0), 2),
+  ROUND(COALESCE(MAX(
+    CASE
+      WHEN sets.weight <= 0 OR sets.reps <= 0 THEN 0
+      WHEN sets.reps = 1 THEN sets.weight
+      ELSE sets.weight * (1 + sets.reps / 30.0)
+    END
+  ), 0), 2)
+FROM (
+  SELECT
+    wl.id AS workout_log_id,
+    wl.user_id,
+    e.value->>'exerciseId' AS exercise_id,
+    COALESCE(wl.date, wl.created_at) AS date,
+    CASE WHEN s.value IS NULL THEN NULL
+         WHEN jsonb_typeof(s.value->'weight') = 'number' THEN (s.value->>'weight')::numeric ELSE 0 END AS weight,
+    CASE WHEN s.value IS NULL THEN NULL
+         WHEN jsonb_typeof(s.value->'reps') = 'number' THEN (s.value->>'reps')::numeric ELSE 0 END AS reps
+  FROM workout_logs wl
+  CROSS JOIN LATERAL jsonb_array_elements(
+    CASE WHEN jsonb_typeof(wl.exercises) = 'array' THEN wl.exercises ELSE '[]'::jsonb END
+  ) AS e(value)
+  LEFT JOIN LATERAL jsonb_array_elements(
+    CASE WHEN jsonb_typeof(e.value->'sets') = 'array' THEN e.value->'sets' ELSE '[]'::jsonb END
+  ) AS s(value) ON true
+  WHERE e.value ? 'exerciseId'
+) sets
+GROUP BY sets.workout_log_id, sets.user_id, sets.exercise_id, sets.date
+ON CONFLICT (workout_log_id, exercise_id) DO NOTHING;
+
+COMMENT ON TABLE exercise_session_stats IS 'Per-exercise set metrics for each workout log, maintained on save for progression charts';
@@ -0,0 +1,125 @@
+/*
+  # Atomic goal progress
+
+  1. New Functions
+    - `apply_workout_to_goals(p_user_id uuid, p_log_id uuid, p_date timestamptz, p_exercises jsonb)`
+      - Applies one saved workout log to the user's active goals whose window contains `p_date`
+      - `p_exercises` is an array of `{"exercise_id": text, "max_weight": numeric, "max_reps": numeric}`
+        computed from the new log's sets only
+      - Strength goals (kg/lbs/reps) and endurance goals (reps) on a logged exercise
+        keep the best value seen; consistency goals count workouts, or distinct days
+        when the unit is `days`
+      - Goals that reach `target_value` are flipped to `completed` in the same UPDATE
+      - Returns the goals that changed
+    - `set_goal_progress(p_goal_id uuid, p_user_id uuid, p_value numeric)`
+      - Sets `current_value` and completes the goal when it reaches `target_value`
+        in one conditional UPDATE
+      - Returns the updated goal's id, status and target_value, or no row when the goal is not the user's
+
+  2. Security
+    - Only the service role may execute the functions
+
+  3. Notes
+    - New values are computed from the row being updated, so concurrent saves
+      and progress updates cannot overwrite each other
+*/
+
+CREATE OR REPLACE FUNCTION apply_workout_to_goals(
+  p_user_id uuid,
+  p_log_id uuid,
+  p_date timestamptz,
+  p_exercises jsonb
+)
+RETURNS TABLE (
+  id uuid,
+  name text,
+  type text,
+  current_value numeric,
+  target_value numeric,
+  status text
+) AS $$
+#variable_conflict use_column
+DECLARE
+  first_of_day boolean;
+BEGIN
+  SELECT NOT EXISTS (
+    SELECT 1
+    FROM workout_logs wl
+    WHERE wl.user_id = p_user_id
+      AND wl.id <> p_log_id
+      AND wl.date >= date_trunc('day', p_date)
+      AND wl.date < date_trunc('day', p_date) + interval '1 day'
+  ) INTO first_of_day;
+
+  RETURN QUERY
+  WITH metrics AS (
+    SELECT e.exercise_id, COALESCE(e.max_weight, 0) AS max_weight, COALESCE(e.max_reps, 0) AS max_reps
+    FROM jsonb_to_recordset(COALESCE(p_exercises, '[]'::jsonb)) AS e(exercise_id text, max_weight numeric, max_reps numeric)
+  ),
+  exercise_goals AS (
+    UPDATE goals g
+    SET
+      current_value = GREATEST(
+        COALESCE(g.current_value, 0),
+        CASE WHEN g.unit = 'reps' THEN m.max_reps ELSE m.max_weight END
+      ),
+      status = CASE
+        WHEN GREATEST(
+          COALESCE(g.current_value, 0),
+          CASE WHEN g.unit = 'reps' THEN m.max_reps ELSE m.max_weight END
+        ) >= g.target_value THEN 'completed'
+        ELSE g.status
+      END
+    FROM metrics m
+    WHERE g.user_id = p_user_id
+      AND g.status = 'active'
+      AND g.exercise_id = m.exercise_id
+      AND (
+        (g.type = 'strength' AND g.unit IN ('kg', 'lbs', 'reps'))
+        OR (g.type = 'endurance' AND g.unit = 'reps')
+      )
+      AND (g.start_date IS NULL OR g.start_date <= p_date)
+      AND (g.end_date IS NULL OR g.end_date >= p_date)
+      AND CASE WHEN g.unit = 'reps' THEN m.max_reps ELSE m.max_weight END > COALESCE(g.current_value, 0)
+    RETURNING g.id, g.name, g.type, g.current_value, g.target_value, g.status
+  ),
+  consistency_goals AS (
+    UPDATE goals g
+    SET
+      current_value = COALESCE(g.current_value, 0) + 1,
+      status = CASE
+        WHEN COALESCE(g.current_value, 0) + 1 >= g.target_value THEN 'completed'
+        ELSE g.status
+      END
+    WHERE g.user_id = p_user_id
+      AND g.status = 'active'
+      AND g.type = 'consistency'
+      AND (g.unit <> 'days' OR first_of_day)
+      AND (g.start_date IS NULL OR g.start_date <= p_date)
+      AND (g.end_date IS NULL OR g.end_date >= p_date)
+    RETURNING g.id, g.name, g.type, g.current_value, g.target_value, g.status
+  )
+  SELECT * FROM exercise_goals
+  UNION ALL
+  SELECT * FROM consistency_goals;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE OR REPLACE FUNCTION set_goal_progress(p_goal_id uuid, p_user_id uuid, p_value numeric)
+RETURNS TABLE (id uuid, status text, target_value numeric) AS $$
+  UPDATE goals g
+  SET
+    current_value = p_value,
+    status = CASE WHEN p_value >= g.target_value THEN 'completed' ELSE g.status END
+  WHERE g.id = p_goal_id AND g.user_id = p_user_id
+  RETURNING g.id, g.status, g.target_value;
+$$ LANGUAGE sql SECURITY DEFINER;
+
+REVOKE EXECUTE ON FUNCTION apply_workout_to_goals(uuid, uuid, timestamptz, jsonb) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION apply_workout_to_goals(uuid, uuid, timestamptz, jsonb) TO service_role;
+
+REVOKE EXECUTE ON FUNCTION set_goal_progress(uuid, uuid, numeric) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION set_goal_progress(uuid, uuid, numeric) TO service_role;
+
+COMMENT ON FUNCTION apply_workout_to_goals(uuid, uuid, timestamptz, jsonb) IS 'Incrementally advances strength, endurance and consistency goals from one saved workout log';
+COMMENT ON FUNCTION set_goal_progress(uuid, uuid, numeric) IS 'Sets goal progress and completes the goal in a single conditional update';
@@ -0,0 +1,25 @@
+/*
+  # Idempotent workout log ingestion
+
+  1. Modified Tables
+    - `workout_logs`
+      - Add `idempotency_key` (text, nullable), a client-generated key for each log
+
+  2. Constraints
+    - Unique (`user_id`, `idempotency_key`) so a replayed log is skipped instead of
+      stored twice; logs without a key are unaffected because NULLs never conflict
+*/
+
+ALTER TABLE workout_logs ADD COLUMN IF NOT EXISTS idempotency_key text;
+
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM pg_constraint WHERE conname = 'workout_logs_user_id_idempotency_key_key'
+  ) THEN
+    ALTER TABLE workout_logs
+      ADD CONSTRAINT workout_logs_user_id_idempotency_key_key UNIQUE (user_id, idempotency_key);
+  END IF;
+END $$;
+
+COMMENT ON COLUMN workout_logs.idempotency_key IS 'Client-generated key used to deduplicate replayed or retried log uploads';
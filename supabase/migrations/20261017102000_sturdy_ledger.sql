@@ -0,0 +1,131 @@
+/*
+  # Normalized workout sets
+
+  1. New Tables
+    - `workout_sets`
+      - One row per set of a workout log, keyed by (`workout_log_id`, `exercise_index`, `set_index`),
+        the positions of the exercise and set within the log's `exercises` JSONB
+      - `user_id` (uuid), `exercise_id` (text), `date` (timestamp of the workout)
+      - `weight`, `reps`, `rpe` (0-10) and `duration_seconds`, each nullable
+      - `volume` (weight x reps, 0 when either is missing), generated
+      - Written by the API alongside the JSONB whenever a workout log is saved
+
+  2. Security
+    - Enable RLS; users can read their own rows
+
+  3. Performance
+    - Index on (user_id, exercise_id, date) for per-exercise history
+    - Index on (user_id, date) for per-user date range aggregation
+
+  4. Backfill
+    - Flattens the `exercises` JSONB of every existing workout log; non-numeric or negative
+      values become NULL; fractional reps are kept as logged
+
+  5. Changed Functions
+    - `weekly_workout_summaries` now aggregates volume and distinct exercises from `workout_sets`
+      instead of unpacking JSONB, so exercises logged without sets are no longer counted
+*/
+
+CREATE TABLE IF NOT EXISTS workout_sets (
+  workout_log_id uuid REFERENCES workout_logs(id) ON DELETE CASCADE NOT NULL,
+  exercise_index integer NOT NULL,
+  set_index integer NOT NULL,
+  user_id uuid REFERENCES users(id) ON DELETE CASCADE NOT NULL,
+  exercise_id text NOT NULL,
+  date timestamptz NOT NULL,
+  weight numeric CHECK (weight >= 0),
+  reps numeric CHECK (reps >= 0),
+  rpe numeric CHECK (rpe BETWEEN 0 AND 10),
+  duration_seconds numeric CHECK (duration_seconds >= 0),
+  volume numeric GENERATED ALWAYS AS (COALESCE(weight, 0) * COALESCE(reps, 0)) STORED,
+  PRIMARY KEY (workout_log_id, exercise_index, set_index)
+);
+
+ALTER TABLE workout_sets ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can read own workout sets"
+  ON workout_sets
+  FOR SELECT
+  TO authenticated
+  USING (auth.uid() = user_id);
+
+CREATE INDEX IF NOT EXISTS idx_workout_sets_user_exercise_date
+  ON workout_sets (user_id, exercise_id, date);
+
+CREATE INDEX IF NOT EXISTS idx_workout_sets_user_date
+  ON workout_sets (user_id, date);
+
+-- Backfill from existing workout logs
+INSERT INTO workout_sets (
+  workout_log_id, exercise_index, set_index, user_id, exercise_id, date, weight, reps, rpe, duration_seconds
+)
+SELECT
+  wl.id,
+  (e.ordinality - 1)::integer,
+  (s.ordinality - 1)::integer,
+  wl.user_id,
+  e.value->>'exerciseId',
+  COALESCE(wl.date, wl.created_at),
+  CASE WHEN jsonb_typeof(s.value->'weight') = 'number' AND (s.value->>'weight')::numeric >= 0
+       THEN (s.value->>'weight')::numeric END,
+  CASE WHEN jsonb_typeof(s.value->'reps') = 'number' AND (s.value->>'reps')::numeric >= 0
+       THEN (s.value->>'reps')::numeric END,
+  CASE WHEN jsonb_typeof(s.value->'rpe') = 'number' AND (s.value->>'rpe')::numeric BETWEEN 0 AND 10
+       THEN (s.value->>'rpe')::numeric END,
+  CASE WHEN jsonb_typeof(s.value->'duration') = 'number' AND (s.value->>'duration')::numeric >= 0
+       THEN (s.value->>'duration')::numeric END
+FROM workout_logs wl
+CROSS JOIN LATERAL jsonb_array_elements(
+  CASE WHEN jsonb_typeof(wl.exercises) = 'array' THEN wl.exercises ELSE '[]'::jsonb END
+) WITH ORDINALITY AS e(value, ordinality)
+CROSS JOIN LATERAL jsonb_array_elements(
+  CASE WHEN jsonb_typeof(e.value->'sets') = 'array' THEN e.value->'sets' ELSE '[]'::jsonb END
+) WITH ORDINALITY AS s(value, ordinality)
+WHERE e.value ? 'exerciseId'
+  AND jsonb_typeof(s.value) = 'object'
+ON CONFLICT (workout_log_id, exercise_index, set_index) DO NOTHING;
+
+COMMENT ON TABLE workout_sets IS 'One row per set of each workout log, maintained on save for indexed aggregation';
+
+-- Weekly totals from the normalized sets; each side is an index range scan per user
+CREATE OR REPLACE FUNCTION weekly_workout_summaries(
+  p_since timestamptz,
+  p_after uuid DEFAULT NULL,
+  p_limit integer DEFAULT 1000
+)
+RETURNS TABLE (
+  user_id uuid,
+  total_workouts bigint,
+  total_volume numeric,
+  unique_exercises bigint
+) AS $$
+  WITH page AS (
+    SELECT u.id
+    FROM users u
+    WHERE p_after IS NULL OR u.id > p_after
+    ORDER BY u.id
+    LIMIT p_limit
+  )
+  SELECT
+    page.id AS user_id,
+    logs.total_workouts,
+    sets.total_volume,
+    sets.unique_exercises
+  FROM page
+  CROSS JOIN LATERAL (
+    SELECT COUNT(*) AS total_workouts
+    FROM workout_logs wl
+    WHERE wl.user_id = page.id AND wl.date >= p_since
+  ) logs
+  CROSS JOIN LATERAL (
+    SELECT
+      COALESCE(SUM(ws.volume), 0) AS total_volume,
+      COUNT(DISTINCT ws.exercise_id) AS unique_exercises
+    FROM workout_sets ws
+    WHERE ws.user_id = page.id AND ws.date >= p_since
+  ) sets
+  ORDER BY page.id;
+$$ LANGUAGE sql STABLE SECURITY DEFINER;
+
+REVOKE EXECUTE ON FUNCTION weekly_workout_summaries(timestamptz, uuid, integer) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION weekly_workout_summaries(timestamptz, uuid, integer) TO service_role;
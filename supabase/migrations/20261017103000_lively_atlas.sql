@@ -0,0 +1,71 @@
+/*
+  # Per-exercise volume in weekly workout summaries
+
+  1. Changed Functions
+    - `weekly_workout_summaries(p_since timestamptz, p_after uuid, p_limit integer)`
+      - Adds `exercise_volumes` (jsonb): total volume per exercise id in the window,
+        which the weekly summary job rolls up into volume per muscle group using the
+        exercise catalog
+      - Dropped and recreated because its result columns change
+
+  2. Security
+    - Only the service role may execute the function
+
+  3. Performance
+    - Index on `custom_exercises (user_id)` for per-user custom exercise lookups
+*/
+
+DROP FUNCTION IF EXISTS weekly_workout_summaries(timestamptz, uuid, integer);
+
+CREATE FUNCTION weekly_workout_summaries(
+  p_since timestamptz,
+  p_after uuid DEFAULT NULL,
+  p_limit integer DEFAULT 1000
+)
+RETURNS TABLE (
+  user_id uuid,
+  total_workouts bigint,
+  total_volume numeric,
+  unique_exercises bigint,
+  exercise_volumes jsonb
+) AS $$
+  WITH page AS (
+    SELECT u.id
+    FROM users u
+    WHERE p_after IS NULL OR u.id > p_after
+    ORDER BY u.id
+    LIMIT p_limit
+  )
+  SELECT
+    page.id AS user_id,
+    logs.total_workouts,
+    sets.total_volume,
+    sets.unique_exercises,
+    sets.exercise_volumes
+  FROM page
+  CROSS JOIN LATERAL (
+    SELECT COUNT(*) AS total_workouts
+    FROM workout_logs wl
+    WHERE wl.user_id = page.id AND wl.date >= p_since
+  ) logs
+  CROSS JOIN LATERAL (
+    SELECT
+      COALESCE(SUM(per_exercise.volume), 0) AS total_volume,
+      COUNT(*) AS unique_exercises,
+      COALESCE(jsonb_object_agg(per_exercise.exercise_id, per_exercise.volume), '{}'::jsonb) AS exercise_volumes
+    FROM (
+      SELECT ws.exercise_id, SUM(ws.volume) AS volume
+      FROM workout_sets ws
+      WHERE ws.user_id = page.id AND ws.date >= p_since
+      GROUP BY ws.exercise_id
+    ) per_exercise
+  ) sets
+  ORDER BY page.id;
+$$ LANGUAGE sql STABLE SECURITY DEFINER;
+
+REVOKE EXECUTE ON FUNCTION weekly_workout_summaries(timestamptz, uuid, integer) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION weekly_workout_summaries(timestamptz, uuid, integer) TO service_role;
+
+COMMENT ON FUNCTION weekly_workout_summaries(timestamptz, uuid, integer) IS 'Per-user workout totals and per-exercise volume for a page of users; used by the weekly summary job';
+
+CREATE INDEX IF NOT EXISTS idx_custom_exercises_user_id ON custom_exercises (user_id);
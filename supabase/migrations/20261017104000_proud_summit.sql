@@ -0,0 +1,248 @@
+/*
+  # Personal record index
+
+  1. New Tables
+    - `personal_records`
+      - One row per user and exercise, keyed by (`user_id`, `exercise_id`)
+      - `best_weight` and `best_weight_reps` (most reps lifted at that weight)
+      - `best_volume` (most weight x reps for the exercise in a single workout log)
+      - `best_e1rm` (best Epley estimated one-rep max of any set)
+      - `reps_by_weight` (jsonb): most reps at each weight, keyed by the weight with trailing zeros trimmed
+      - `last_workout_log_id`: the latest log applied; NULL until the first one
+      - Maintained by the API as workout logs are saved
+
+  2. New Functions
+    - `apply_personal_records(p_user_id uuid, p_log_id uuid, p_records jsonb)`
+      - `p_records` is an array of `{"exercise_id", "max_weight", "reps_at_max_weight", "volume",
+        "estimated_1rm", "weights": [{"weight", "reps"}]}` computed from the new log's sets only
+      - Locks each exercise's row, returns every record the log beats (`weight`, `reps`, `volume`,
+        `estimated_1rm`) with the previous value, then folds the log into the row
+      - The first log of an exercise only sets the baseline and returns nothing
+    - `rebuild_personal_records(p_user_ids uuid[])`
+      - Recomputes the rows of the given users from `workout_sets` in bulk; returns the rows written
+
+  3. Security
+    - Enable RLS; users can read their own rows
+    - Only the service role may execute the functions
+
+  4. Backfill
+    - Rebuilds the index for every user from existing sets
+*/
+
+CREATE TABLE IF NOT EXISTS personal_records (
+  user_id uuid REFERENCES users(id) ON DELETE CASCADE NOT NULL,
+  exercise_id text NOT NULL,
+  best_weight numeric NOT NULL DEFAULT 0,
+  best_weight_reps numeric NOT NULL DEFAULT 0,
+  best_volume numeric NOT NULL DEFAULT 0,
+  best_e1rm numeric NOT NULL DEFAULT 0,
+  reps_by_weight jsonb NOT NULL DEFAULT '{}'::jsonb,
+  last_workout_log_id uuid,
+  updated_at timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (user_id, exercise_id)
+);
+
+ALTER TABLE personal_records ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can read own personal records"
+  ON personal_records
+  FOR SELECT
+  TO authenticated
+  USING (auth.uid() = user_id);
+
+CREATE OR REPLACE FUNCTION apply_personal_records(
+  p_user_id uuid,
+  p_log_id uuid,
+  p_records jsonb
+)
+RETURNS TABLE (
+  exercise_id text,
+  record_type text,
+  value numeric,
+  previous_value numeric,
+  weight numeric
+) AS $$
+#variable_conflict use_column
+DECLARE
+  candidate record;
+  current_record personal_records%ROWTYPE;
+  lift record;
+  previous_reps numeric;
+BEGIN
+  FOR candidate IN
+    SELECT
+      c.exercise_id AS id,
+      COALESCE(c.max_weight, 0) AS max_weight,
+      COALESCE(c.reps_at_max_weight, 0) AS reps_at_max_weight,
+      COALESCE(c.volume, 0) AS volume,
+      COALESCE(c.estimated_1rm, 0) AS estimated_1rm,
+      COALESCE(c.weights, '[]'::jsonb) AS weights
+    FROM jsonb_to_recordset(COALESCE(p_records, '[]'::jsonb)) AS c(
+      exercise_id text, max_weight numeric, reps_at_max_weight numeric, volume numeric, estimated_1rm numeric, weights jsonb
+    )
+    ORDER BY c.exercise_id
+  LOOP
+    -- Create the row if needed, then lock it so concurrent saves apply one after the other
+    INSERT INTO personal_records (user_id, exercise_id)
+    VALUES (p_user_id, candidate.id)
+    ON CONFLICT (user_id, exercise_id) DO NOTHING;
+
+    SELECT * INTO current_record
+    FROM personal_records pr
+    WHERE pr.user_id = p_user_id AND pr.exercise_id = candidate.id
+    FOR UPDATE;
+
+    IF current_record.last_workout_log_id IS NOT NULL THEN
+      IF candidate.max_weight > current_record.best_weight THEN
+        exercise_id := candidate.id; record_type := 'weight'; value := candidate.max_weight;
+        previous_value := current_record.best_weight; weight := candidate.max_weight;
+        RETURN NEXT;
+      END IF;
+
+      FOR lift IN
+        SELECT trim_scale(l.weight) AS weight, MAX(l.reps) AS reps
+        FROM jsonb_to_recordset(candidate.weights) AS l(weight numeric, reps numeric)
+        WHERE l.weight IS NOT NULL AND l.reps IS NOT NULL
+        GROUP BY trim_scale(l.weight)
+      LOOP
+        previous_reps := (current_record.reps_by_weight->>lift.weight::text)::numeric;
+        IF previous_reps IS NOT NULL AND lift.reps > previous_reps THEN
+          exercise_id := candidate.id; record_type := 'reps'; value := lift.reps;
+          previous_value := previous_reps; weight := lift.weight;
+          RETURN NEXT;
+        END IF;
+      END LOOP;
+
+      IF candidate.volume > current_record.best_volume THEN
+        exercise_id := candidate.id; record_type := 'volume'; value := candidate.volume;
+        previous_value := current_record.best_volume; weight := NULL;
+        RETURN NEXT;
+      END IF;
+
+      IF candidate.estimated_1rm > current_record.best_e1rm THEN
+        exercise_id := candidate.id; record_type := 'estimated_1rm'; value := candidate.estimated_1rm;
+        previous_value := current_record.best_e1rm; weight := NULL;
+        RETURN NEXT;
+      END IF;
+    END IF;
+
+    UPDATE personal_records pr
+    SET
+      best_weight = GREATEST(pr.best_weight, candidate.max_weight),
+      best_weight_reps = CASE
+        WHEN candidate.max_weight > pr.best_weight THEN candidate.reps_at_max_weight
+        WHEN candidate.max_weight = pr.best_weight THEN GREATEST(pr.best_weight_reps, candidate.reps_at_max_weight)
+        ELSE pr.best_weight_reps
+      END,
+      best_volume = GREATEST(pr.best_volume, candidate.volume),
+      best_e1rm = GREATEST(pr.best_e1rm, candidate.estimated_1rm),
+      reps_by_weight = pr.reps_by_weight || COALESCE((
+        SELECT jsonb_object_agg(
+          l.weight_key,
+          GREATEST(l.reps, COALESCE((pr.reps_by_weight->>l.weight_key)::numeric, 0))
+        )
+        FROM (
+          SELECT trim_scale(w.weight)::text AS weight_key, MAX(w.reps) AS reps
+          FROM jsonb_to_recordset(candidate.weights) AS w(weight numeric, reps numeric)
+          WHERE w.weight IS NOT NULL AND w.reps IS NOT NULL
+          GROUP BY trim_scale(w.weight)
+        ) l
+      ), '{}'::jsonb),
+      last_workout_log_id = p_log_id,
+      updated_at = now()
+    WHERE pr.user_id = p_user_id AND pr.exercise_id = candidate.id;
+  END LOOP;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE OR REPLACE FUNCTION rebuild_personal_records(p_user_ids uuid[])
+RETURNS integer AS $$
+DECLARE
+  written integer;
+BEGIN
+  DELETE FROM personal_records pr
+  WHERE pr.user_id = ANY(p_user_ids);
+
+  WITH lifts AS (
+    SELECT ws.user_id, ws.exercise_id, trim_scale(ws.weight) AS weight, MAX(ws.reps) AS reps
+    FROM workout_sets ws
+    WHERE ws.user_id = ANY(p_user_ids) AND ws.weight IS NOT NULL AND ws.reps IS NOT NULL
+    GROUP BY ws.user_id, ws.exercise_id, trim_scale(ws.weight)
+  ),
+  by_weight AS (
+    SELECT
+      lifts.user_id,
+      lifts.exercise_id,
+      jsonb_object_agg(lifts.weight::text, lifts.reps) AS reps_by_weight,
+      (array_agg(lifts.weight ORDER BY lifts.weight DESC))[1] AS best_weight,
+      (array_agg(lifts.reps ORDER BY lifts.weight DESC))[1] AS best_weight_reps
+    FROM lifts
+    GROUP BY lifts.user_id, lifts.exercise_id
+  ),
+  sessions AS (
+    SELECT
+      ws.user_id,
+      ws.exercise_id,
+      ws.workout_log_id,
+      MAX(ws.date) AS date,
+      SUM(ws.volume) AS volume,
+      MAX(CASE
+        WHEN COALESCE(ws.weight, 0) <= 0 OR COALESCE(ws.reps, 0) <= 0 THEN 0
+        WHEN ws.reps = 1 THEN ws.weight
+        ELSE ws.weight * (1 + ws.reps / 30.0)
+      END) AS estimated_1rm
+    FROM workout_sets ws
+    WHERE ws.user_id = ANY(p_user_ids)
+    GROUP BY ws.user_id, ws.exercise_id, ws.workout_log_id
+  ),
+  totals AS (
+    SELECT
+      sessions.user_id,
+      sessions.exercise_id,
+      MAX(sessions.volume) AS best_volume,
+      ROUND(MAX(sessions.estimated_1rm), 2) AS best_e1rm,
+      (array_agg(sessions.workout_log_id ORDER BY sessions.date DESC))[1] AS last_workout_log_id
+    FROM sessions
+    GROUP BY sessions.user_id, sessions.exercise_id
+  )
+  INSERT INTO personal_records (
+    user_id, exercise_id, best_weight, best_weight_reps, best_volume, best_e1rm, reps_by_weight, last_workout_log_id
+  )
+  SELECT
+    totals.user_id,
+    totals.exercise_id,
+    COALESCE(by_weight.best_weight, 0),
+    COALESCE(by_weight.best_weight_reps, 0),
+    totals.best_volume,
+    totals.best_e1rm,
+    COALESCE(by_weight.reps_by_weight, '{}'::jsonb),
+    totals.last_workout_log_id
+  FROM totals
+  LEFT JOIN by_weight
+    ON by_weight.user_id = totals.user_id AND by_weight.exercise_id = totals.exercise_id
+  ON CONFLICT (user_id, exercise_id) DO UPDATE SET
+    best_weight = EXCLUDED.best_weight,
+    best_weight_reps = EXCLUDED.best_weight_reps,
+    best_volume = EXCLUDED.best_volume,
+    best_e1rm = EXCLUDED.best_e1rm,
+    reps_by_weight = EXCLUDED.reps_by_weight,
+    last_workout_log_id = EXCLUDED.last_workout_log_id,
+    updated_at = now();
+
+  GET DIAGNOSTICS written = ROW_COUNT;
+  RETURN written;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+REVOKE EXECUTE ON FUNCTION apply_personal_records(uuid, uuid, jsonb) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION rebuild_personal_records(uuid[]) FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION apply_personal_records(uuid, uuid, jsonb) TO service_role;
+GRANT EXECUTE ON FUNCTION rebuild_personal_records(uuid[]) TO service_role;
+
+COMMENT ON TABLE personal_records IS 'Best weight, reps at each weight, session volume and estimated 1RM per user and exercise';
+COMMENT ON FUNCTION apply_personal_records(uuid, uuid, jsonb) IS 'Checks a new workout log against the personal record index and folds it in; used when logs are saved';
+COMMENT ON FUNCTION rebuild_personal_records(uuid[]) IS 'Recomputes the personal record index for a set of users from workout_sets';
+
+-- Backfill from existing sets
+SELECT rebuild_personal_records(ARRAY(SELECT id FROM users));
@@ -0,0 +1,106 @@
+/*
+  # Inactivity due queue for the daily check job
+
+  1. Modified Tables
+    - `users`
+      - Add `next_check_at` (timestamptz, nullable): when the daily check next has something
+        to do for the user, NULL when nothing can happen until they log a workout
+      - Kept current by a trigger whenever `last_workout_date` or `user_status_flags` change,
+        so saving a workout log reschedules the user without a separate write
+
+  2. New Functions
+    - `user_status_flag_set(p_flags jsonb, p_key text)`
+      - Whether a status flag is set, with the truthiness the daily check applies in Python:
+        false, null, 0, "", [] and {} (or a missing key) are unset, anything else is set;
+        `user_status_flags` is free-form JSON, so this never raises on unexpected values
+    - `inactivity_next_check_at(p_last_workout_date timestamptz, p_flags jsonb)`
+      - Mirrors the daily check rules on UTC calendar days:
+        - No workout yet: due now until `initial_motivation_sent`, then NULL
+        - `low_motivation_sent` or `welcome_back_sent` with a workout in the last 3 days: due now (flags reset)
+        - Otherwise the start of day 3 (low motivation, unless already sent or past day 6),
+          then the start of day 7 (welcome back, unless already sent), then NULL
+    - `set_users_next_check_at()` trigger function
+
+  3. Performance
+    - Partial index on `users (next_check_at, id)`, so the job reads only due users
+      instead of scanning every user each night; the job pages on the same
+      (next_check_at, id) keyset, so each page is one index range scan
+
+  4. Backfill
+    - Computes `next_check_at` for existing users
+*/
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS next_check_at timestamptz;
+
+CREATE OR REPLACE FUNCTION user_status_flag_set(p_flags jsonb, p_key text)
+RETURNS boolean AS $$
+  SELECT CASE jsonb_typeof(p_flags->p_key)
+    WHEN 'boolean' THEN p_flags->p_key = 'true'::jsonb
+    WHEN 'number' THEN p_flags->p_key <> '0'::jsonb
+    WHEN 'string' THEN p_flags->p_key <> '""'::jsonb
+    WHEN 'array' THEN jsonb_array_length(p_flags->p_key) > 0
+    WHEN 'object' THEN p_flags->p_key <> '{}'::jsonb
+    ELSE false
+  END;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION inactivity_next_check_at(p_last_workout_date timestamptz, p_flags jsonb)
+RETURNS timestamptz AS $$
+DECLARE
+  low_motivation_sent boolean := user_status_flag_set(p_flags, 'low_motivation_sent');
+  welcome_back_sent boolean := user_status_flag_set(p_flags, 'welcome_back_sent');
+  today date := (now() AT TIME ZONE 'UTC')::date;
+  last_day date;
+BEGIN
+  IF p_last_workout_date IS NULL THEN
+    IF user_status_flag_set(p_flags, 'initial_motivation_sent') THEN
+      RETURN NULL;
+    END IF;
+    RETURN now();
+  END IF;
+
+  last_day := (p_last_workout_date AT TIME ZONE 'UTC')::date;
+
+  -- Back within 3 days of a workout: the next check resets the inactivity flags
+  IF (low_motivation_sent OR welcome_back_sent) AND today - last_day < 3 THEN
+    RETURN now();
+  END IF;
+
+  IF NOT low_motivation_sent AND today - last_day <= 6 THEN
+    RETURN (last_day + 3)::timestamp AT TIME ZONE 'UTC';
+  END IF;
+
+  IF NOT welcome_back_sent THEN
+    RETURN (last_day + 7)::timestamp AT TIME ZONE 'UTC';
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+CREATE OR REPLACE FUNCTION set_users_next_check_at()
+RETURNS TRIGGER AS $$
+BEGIN
+  NEW.next_check_at := inactivity_next_check_at(NEW.last_workout_date, NEW.user_status_flags);
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_users_next_check_at ON users;
+
+CREATE TRIGGER trg_users_next_check_at
+BEFORE INSERT OR UPDATE OF last_workout_date, user_status_flags ON users
+FOR EACH ROW
+EXECUTE FUNCTION set_users_next_check_at();
+
+CREATE INDEX IF NOT EXISTS idx_users_next_check_at
+  ON users (next_check_at, id)
+  WHERE next_check_at IS NOT NULL;
+
+COMMENT ON COLUMN users.next_check_at IS 'When the daily check next needs to look at the user; maintained by trg_users_next_check_at';
+COMMENT ON FUNCTION user_status_flag_set(jsonb, text) IS 'Whether a user_status_flags key is set, with the daily check''s truthiness; never raises on non-boolean values';
+COMMENT ON FUNCTION inactivity_next_check_at(timestamptz, jsonb) IS 'Next time the daily check can notify or reset flags for a user; used by trg_users_next_check_at';
+
+-- Backfill existing users
+UPDATE users
+SET next_check_at = inactivity_next_check_at(last_workout_date, user_status_flags);
@@ -0,0 +1,118 @@
+/*
+  # Single-call workout log saves
+
+  1. New Functions
+    - `save_workout_logs(p_user_id uuid, p_logs jsonb)`
+      - `p_logs` is an array of `{"id", "workout_id", "date", "exercises", "idempotency_key"}` rows,
+        each with what the API derived from its sets: `sets` (workout_sets rows), `session_stats`
+        (exercise_session_stats rows), `goal_metrics` (for `apply_workout_to_goals`) and
+        `records` (for `apply_personal_records`)
+      - In one transaction:
+        - Inserts the logs, skipping any whose idempotency key the user already used
+        - Moves `users.last_workout_date` to the latest new log date, never backwards,
+          so backfilled logs cannot make an active user look inactive
+        - Clears the inactivity flags in `user_status_flags` when that date is within
+          the last 3 days, as the daily check would
+      - Then, for each new log oldest first, writes its sets and session stats and
+        applies it to goals and personal records
+      - Everything is one transaction: if any of these writes fails, the whole save
+        rolls back and the error reaches the API, so the derived tables never drift
+        from `workout_logs`
+      - Returns `{"inserted": [{"id", "idempotency_key"}], "goals": [changed goals],
+        "records": [beaten personal records with their "workout_log_id"]}`
+
+  2. Security
+    - Only the service role may execute the function
+*/
+
+CREATE OR REPLACE FUNCTION save_workout_logs(p_user_id uuid, p_logs jsonb)
+RETURNS jsonb AS $$
+DECLARE
+  inserted jsonb;
+  latest timestamptz;
+  changed_goals jsonb := '[]'::jsonb;
+  beaten_records jsonb := '[]'::jsonb;
+  new_log record;
+BEGIN
+  WITH new_logs AS (
+    INSERT INTO workout_logs (id, user_id, workout_id, date, exercises, idempotency_key)
+    SELECT l.id, p_user_id, l.workout_id, COALESCE(l.date, now()), COALESCE(l.exercises, '[]'::jsonb), l.idempotency_key
+    FROM jsonb_to_recordset(COALESCE(p_logs, '[]'::jsonb)) AS l(
+      id uuid, workout_id uuid, date timestamptz, exercises jsonb, idempotency_key text
+    )
+    ON CONFLICT (user_id, idempotency_key) DO NOTHING
+    RETURNING workout_logs.id, workout_logs.idempotency_key, workout_logs.date
+  )
+  SELECT
+    COALESCE(jsonb_agg(jsonb_build_object('id', new_logs.id, 'idempotency_key', new_logs.idempotency_key)), '[]'::jsonb),
+    MAX(new_logs.date)
+  INTO inserted, latest
+  FROM new_logs;
+
+  IF latest IS NULL THEN
+    RETURN jsonb_build_object('inserted', inserted, 'goals', changed_goals, 'records', beaten_records);
+  END IF;
+
+  UPDATE users u
+  SET
+    last_workout_date = latest,
+    user_status_flags = CASE
+      WHEN (now() AT TIME ZONE 'UTC')::date - (latest AT TIME ZONE 'UTC')::date < 3
+        THEN COALESCE(u.user_status_flags, '{}'::jsonb)
+          || '{"low_motivation_sent": false, "welcome_back_sent": false, "initial_motivation_sent": false}'::jsonb
+      ELSE u.user_status_flags
+    END
+  WHERE u.id = p_user_id
+    AND (u.last_workout_date IS NULL OR u.last_workout_date < latest);
+
+  FOR new_log IN
+    SELECT
+      l.id,
+      COALESCE(l.date, now()) AS date,
+      COALESCE(l.sets, '[]'::jsonb) AS sets,
+      COALESCE(l.session_stats, '[]'::jsonb) AS session_stats,
+      COALESCE(l.goal_metrics, '[]'::jsonb) AS goal_metrics,
+      COALESCE(l.records, '[]'::jsonb) AS records
+    FROM jsonb_to_recordset(p_logs) AS l(
+      id uuid, date timestamptz, sets jsonb, session_stats jsonb, goal_metrics jsonb, records jsonb
+    )
+    WHERE l.id IN (SELECT (i->>'id')::uuid FROM jsonb_array_elements(inserted) i)
+    ORDER BY COALESCE(l.date, now()), l.id
+  LOOP
+    INSERT INTO workout_sets (
+      workout_log_id, exercise_index, set_index, user_id, exercise_id, date, weight, reps, rpe, duration_seconds
+    )
+    SELECT new_log.id, s.exercise_index, s.set_index, p_user_id, s.exercise_id, new_log.date, s.weight, s.reps, s.rpe, s.duration_seconds
+    FROM jsonb_to_recordset(new_log.sets) AS s(
+      exercise_index integer, set_index integer, exercise_id text, weight numeric, reps numeric, rpe numeric, duration_seconds numeric
+    )
+    ON CONFLICT (workout_log_id, exercise_index, set_index) DO NOTHING;
+
+    INSERT INTO exercise_session_stats (
+      workout_log_id, user_id, exercise_id, date, set_count, max_weight, total_reps, volume, estimated_1rm
+    )
+    SELECT new_log.id, p_user_id, s.exercise_id, new_log.date, s.set_count, s.max_weight, s.total_reps, s.volume, s.estimated_1rm
+    FROM jsonb_to_recordset(new_log.session_stats) AS s(
+      exercise_id text, set_count integer, max_weight numeric, total_reps numeric, volume numeric, estimated_1rm numeric
+    )
+    ON CONFLICT (workout_log_id, exercise_id) DO NOTHING;
+
+    changed_goals := changed_goals || COALESCE((
+      SELECT jsonb_agg(to_jsonb(g))
+      FROM apply_workout_to_goals(p_user_id, new_log.id, new_log.date, new_log.goal_metrics) g
+    ), '[]'::jsonb);
+
+    beaten_records := beaten_records || COALESCE((
+      SELECT jsonb_agg(to_jsonb(r) || jsonb_build_object('workout_log_id', new_log.id))
+      FROM apply_personal_records(p_user_id, new_log.id, new_log.records) r
+    ), '[]'::jsonb);
+  END LOOP;
+
+  RETURN jsonb_build_object('inserted', inserted, 'goals', changed_goals, 'records', beaten_records);
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+REVOKE EXECUTE ON FUNCTION save_workout_logs(uuid, jsonb) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION save_workout_logs(uuid, jsonb) TO service_role;
+
+COMMENT ON FUNCTION save_workout_logs(uuid, jsonb) IS 'Inserts workout logs, advances last_workout_date, resets inactivity flags and applies the logs to sets, stats, goals and personal records in one transaction';
@@ -0,0 +1,257 @@
+/*
+  # Incremental streak and weekly workout counters
+
+  1. New Tables
+    - `user_activity_stats`
+      - One row per user with a dated workout, keyed by `user_id`
+      - `last_workout_day`: the latest UTC day with a workout
+      - `recent_days` (bigint bitmask): bit `i` is set when there was a workout on
+        `last_workout_day - i`, for the 63 days up to `last_workout_day`
+      - `streak_start`: first day of the run of consecutive workout days ending on `last_workout_day`
+      - `current_streak`: the run's length in days, or 0 once a day has been missed
+      - `week_start` (ISO week, Monday) and `week_workout_days`: distinct days with a workout
+        in the week of `last_workout_day`, or zero for the current week once the nightly job has
+        rolled a past week forward
+      - Updated for every new workout log by a trigger, and reset by the API's nightly job
+
+  2. New Functions
+    - `record_workout_activity(p_user_id uuid, p_date timestamptz)`
+      - Folds one workout into the user's row in constant time, from the row alone:
+        a workout after `last_workout_day` shifts the bitmask and extends or restarts the run,
+        an earlier one sets its bit; a backdated workout the day before the run starts
+        also joins the consecutive days before it already in the bitmask
+      - Several workouts on one day count once, as `GET /activity` reports them
+    - `reset_stale_activity_stats(p_today date, p_batch_size integer)`
+      - Zeroes up to `p_batch_size` broken streaks and day counts of past weeks; returns the rows updated
+    - `rebuild_activity_stats(p_user_ids uuid[])`
+      - Recomputes the rows of the given users from `workout_logs`; returns the rows written
+    - `record_workout_log_activity()` trigger function
+
+  3. Triggers
+    - `trg_workout_logs_activity` after each insert into `workout_logs`, so logs saved by
+      `save_workout_logs` (in its transaction) and logs inserted directly are both counted
+
+  4. Security
+    - Enable RLS; users can read their own row
+    - Only the service role may execute the functions
+
+  5. Performance
+    - Partial indexes matching the nightly reset, so it only visits rows it changes
+
+  6. Backfill
+    - Rebuilds the counters for every user from existing logs
+*/
+
+CREATE TABLE IF NOT EXISTS user_activity_stats (
+  user_id uuid PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+  last_workout_day date,
+  recent_days bigint NOT NULL DEFAULT 0,
+  streak_start date,
+  current_streak integer NOT NULL DEFAULT 0,
+  week_start date,
+  week_workout_days integer NOT NULL DEFAULT 0,
+  updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+ALTER TABLE user_activity_stats ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can read own activity stats"
+  ON user_activity_stats
+  FOR SELECT
+  TO authenticated
+  USING (auth.uid() = user_id);
+
+CREATE INDEX IF NOT EXISTS idx_user_activity_stats_streaks
+  ON user_activity_stats (last_workout_day)
+  WHERE current_streak > 0;
+
+CREATE INDEX IF NOT EXISTS idx_user_activity_stats_weeks
+  ON user_activity_stats (week_start)
+  WHERE week_workout_days > 0;
+
+CREATE OR REPLACE FUNCTION record_workout_activity(p_user_id uuid, p_date timestamptz)
+RETURNS void AS $$
+DECLARE
+  -- Bits 0-62, so the mask never reaches the sign bit
+  window_days constant integer := 63;
+  window_mask constant bigint := 9223372036854775807;
+  today date := (now() AT TIME ZONE 'UTC')::date;
+  workout_day date := (p_date AT TIME ZONE 'UTC')::date;
+  stats user_activity_stats%ROWTYPE;
+  day_offset integer;
+BEGIN
+  -- Create the row if needed, then lock it so concurrent saves apply one after the other
+  INSERT INTO user_activity_stats (user_id)
+  VALUES (p_user_id)
+  ON CONFLICT (user_id) DO NOTHING;
+
+  SELECT * INTO stats
+  FROM user_activity_stats s
+  WHERE s.user_id = p_user_id
+  FOR UPDATE;
+
+  IF stats.last_workout_day IS NULL THEN
+    stats.last_workout_day := workout_day;
+    stats.recent_days := 1;
+    stats.streak_start := workout_day;
+  ELSIF workout_day > stats.last_workout_day THEN
+    day_offset := workout_day - stats.last_workout_day;
+    stats.recent_days := CASE
+      WHEN day_offset < window_days THEN ((stats.recent_days << day_offset) | 1) & window_mask
+      ELSE 1
+    END;
+    IF day_offset > 1 THEN
+      stats.streak_start := workout_day;
+    END IF;
+    stats.last_workout_day := workout_day;
+  ELSE
+    day_offset := stats.last_workout_day - workout_day;
+    IF day_offset < window_days THEN
+      stats.recent_days := stats.recent_days | (1::bigint << day_offset);
+    END IF;
+    IF workout_day = stats.streak_start - 1 THEN
+      -- Backdated into the day before the run: it now also reaches the consecutive days before that
+      stats.streak_start := workout_day;
+      day_offset := day_offset + 1;
+      WHILE day_offset < window_days AND (stats.recent_days >> day_offset) & 1 = 1 LOOP
+        stats.streak_start := stats.streak_start - 1;
+        day_offset := day_offset + 1;
+      END LOOP;
+    END IF;
+  END IF;
+
+  stats.week_start := date_trunc('week', stats.last_workout_day)::date;
+  day_offset := stats.last_workout_day - stats.week_start + 1;
+
+  UPDATE user_activity_stats s
+  SET
+    last_workout_day = stats.last_workout_day,
+    recent_days = stats.recent_days,
+    streak_start = stats.streak_start,
+    current_streak = CASE
+      WHEN stats.last_workout_day >= today - 1 THEN stats.last_workout_day - stats.streak_start + 1
+      ELSE 0
+    END,
+    week_start = stats.week_start,
+    week_workout_days = bit_count((stats.recent_days & ((1::bigint << day_offset) - 1))::bit(64)),
+    updated_at = now()
+  WHERE s.user_id = p_user_id;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE OR REPLACE FUNCTION record_workout_log_activity()
+RETURNS TRIGGER AS $$
+BEGIN
+  PERFORM record_workout_activity(NEW.user_id, NEW.date);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS trg_workout_logs_activity ON workout_logs;
+
+CREATE TRIGGER trg_workout_logs_activity
+AFTER INSERT ON workout_logs
+FOR EACH ROW
+WHEN (NEW.date IS NOT NULL)
+EXECUTE FUNCTION record_workout_log_activity();
+
+CREATE OR REPLACE FUNCTION reset_stale_activity_stats(p_today date, p_batch_size integer DEFAULT 5000)
+RETURNS integer AS $$
+DECLARE
+  current_week date := date_trunc('week', p_today)::date;
+  reset_count integer;
+BEGIN
+  UPDATE user_activity_stats s
+  SET
+    current_streak = CASE WHEN s.last_workout_day < p_today - 1 THEN 0 ELSE s.current_streak END,
+    week_workout_days = CASE WHEN s.week_start < current_week THEN 0 ELSE s.week_workout_days END,
+    week_start = GREATEST(s.week_start, current_week),
+    updated_at = now()
+  WHERE s.user_id IN (
+    SELECT stale.user_id
+    FROM user_activity_stats stale
+    WHERE (stale.current_streak > 0 AND stale.last_workout_day < p_today - 1)
+       OR (stale.week_workout_days > 0 AND stale.week_start < current_week)
+    LIMIT p_batch_size
+    FOR UPDATE SKIP LOCKED
+  );
+
+  GET DIAGNOSTICS reset_count = ROW_COUNT;
+  RETURN reset_count;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+CREATE OR REPLACE FUNCTION rebuild_activity_stats(p_user_ids uuid[])
+RETURNS integer AS $$
+DECLARE
+  today date := (now() AT TIME ZONE 'UTC')::date;
+  written integer;
+BEGIN
+  WITH days AS (
+    SELECT DISTINCT wl.user_id, (wl.date AT TIME ZONE 'UTC')::date AS day
+    FROM workout_logs wl
+    WHERE wl.user_id = ANY(p_user_ids) AND wl.date IS NOT NULL
+  ),
+  islands AS (
+    SELECT days.user_id, days.day, days.day - (ROW_NUMBER() OVER (PARTITION BY days.user_id ORDER BY days.day))::integer AS island
+    FROM days
+  ),
+  latest_runs AS (
+    SELECT DISTINCT ON (islands.user_id)
+      islands.user_id, MIN(islands.day) AS streak_start, MAX(islands.day) AS last_workout_day
+    FROM islands
+    GROUP BY islands.user_id, islands.island
+    ORDER BY islands.user_id, MAX(islands.day) DESC
+  ),
+  windows AS (
+    SELECT
+      r.user_id,
+      (SUM(1::bigint << (r.last_workout_day - days.day))
+        FILTER (WHERE r.last_workout_day - days.day < 63))::bigint AS recent_days,
+      COUNT(*) FILTER (WHERE days.day >= date_trunc('week', r.last_workout_day)::date) AS week_workout_days
+    FROM latest_runs r
+    JOIN days ON days.user_id = r.user_id
+    GROUP BY r.user_id
+  )
+  INSERT INTO user_activity_stats (
+    user_id, last_workout_day, recent_days, streak_start, current_streak, week_start, week_workout_days
+  )
+  SELECT
+    r.user_id,
+    r.last_workout_day,
+    w.recent_days,
+    r.streak_start,
+    CASE WHEN r.last_workout_day >= today - 1 THEN r.last_workout_day - r.streak_start + 1 ELSE 0 END,
+    date_trunc('week', r.last_workout_day)::date,
+    w.week_workout_days
+  FROM latest_runs r
+  JOIN windows w ON w.user_id = r.user_id
+  ON CONFLICT (user_id) DO UPDATE SET
+    last_workout_day = EXCLUDED.last_workout_day,
+    recent_days = EXCLUDED.recent_days,
+    streak_start = EXCLUDED.streak_start,
+    current_streak = EXCLUDED.current_streak,
+    week_start = EXCLUDED.week_start,
+    week_workout_days = EXCLUDED.week_workout_days,
+    updated_at = now();
+
+  GET DIAGNOSTICS written = ROW_COUNT;
+  RETURN written;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+REVOKE EXECUTE ON FUNCTION record_workout_activity(uuid, timestamptz) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION reset_stale_activity_stats(date, integer) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION rebuild_activity_stats(uuid[]) FROM PUBLIC, anon, authenticated;
+
+GRANT EXECUTE ON FUNCTION record_workout_activity(uuid, timestamptz) TO service_role;
+GRANT EXECUTE ON FUNCTION reset_stale_activity_stats(date, integer) TO service_role;
+GRANT EXECUTE ON FUNCTION rebuild_activity_stats(uuid[]) TO service_role;
+
+COMMENT ON TABLE user_activity_stats IS 'Current workout streak and workout days in the latest week per user, maintained as logs are inserted';
+COMMENT ON FUNCTION record_workout_activity(uuid, timestamptz) IS 'Folds one workout into the user''s streak and weekly day count in constant time; used by trg_workout_logs_activity';
+COMMENT ON FUNCTION reset_stale_activity_stats(date, integer) IS 'Zeroes a batch of broken streaks and past-week day counts; used by the nightly activity stats job';
+COMMENT ON FUNCTION rebuild_activity_stats(uuid[]) IS 'Recomputes streaks and weekly day counts for a set of users from workout_logs';
+
+-- Backfill from existing logs
+SELECT rebuild_activity_stats(ARRAY(SELECT id FROM users));
@@ -0,0 +1,49 @@
+/*
+  # Dashboard weekly progress in one aggregate
+
+  1. New Functions
+    - `dashboard_week_summary(p_user_id uuid, p_since timestamptz)`
+      - One row for the user's workouts since `p_since`: `total_workouts` (logs),
+        `workout_days` (distinct UTC days with a workout, counted as `GET /activity` counts them),
+        and `total_volume` and `unique_exercises` from `workout_sets`
+      - Replaces reading every log of the week and unpacking its JSONB in the API
+
+  2. Security
+    - Only the service role may execute the function
+
+  3. Performance
+    - Index range scans on `workout_logs (user_id, date)` and `workout_sets (user_id, date)`
+*/
+
+CREATE OR REPLACE FUNCTION dashboard_week_summary(p_user_id uuid, p_since timestamptz)
+RETURNS TABLE (
+  total_workouts bigint,
+  workout_days bigint,
+  total_volume numeric,
+  unique_exercises bigint
+) AS $$
+  SELECT
+    logs.total_workouts,
+    logs.workout_days,
+    sets.total_volume,
+    sets.unique_exercises
+  FROM (
+    SELECT
+      COUNT(*) AS total_workouts,
+      COUNT(DISTINCT (wl.date AT TIME ZONE 'UTC')::date) AS workout_days
+    FROM workout_logs wl
+    WHERE wl.user_id = p_user_id AND wl.date >= p_since
+  ) logs
+  CROSS JOIN (
+    SELECT
+      COALESCE(SUM(ws.volume), 0) AS total_volume,
+      COUNT(DISTINCT ws.exercise_id) AS unique_exercises
+    FROM workout_sets ws
+    WHERE ws.user_id = p_user_id AND ws.date >= p_since
+  ) sets;
+$$ LANGUAGE sql STABLE SECURITY DEFINER;
+
+REVOKE EXECUTE ON FUNCTION dashboard_week_summary(uuid, timestamptz) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION dashboard_week_summary(uuid, timestamptz) TO service_role;
+
+COMMENT ON FUNCTION dashboard_week_summary(uuid, timestamptz) IS 'Workouts, workout days, volume and distinct exercises of one user since a time; used by GET /dashboard';